@@ -0,0 +1,190 @@
+# api_client.py (Pooled, concurrent client for the scoring API)
+#
+# A ScoringClient keeps keep-alive connections to the API open, so only the first
+# call pays for the TCP/TLS handshake. It sets connect/read timeouts on every call and
+# retries transient failures with exponential backoff: connection errors and
+# 429/502/503/504 responses, honouring Retry-After. Scoring is a pure function of the
+# payload, so POSTs are safe to retry. score_many() sends many applicants concurrently
+# from a thread pool. It uses chunks to POST /score/batch when the server offers it,
+# and otherwise one POST /score per applicant. score_arrow() sends a whole Arrow batch
+# as columns, which the server validates and scores without per-row JSON objects.
+#
+# Used by dashboard.py and bulk_score.py --api-url; also runnable on its own
+# (one JSON applicant per line in, one result per line out):
+#   python api_client.py applicants.jsonl --url http://localhost:8000 > scores.jsonl
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- 0. CONFIGURATION ---
+SCORING_API_URL = os.environ.get("SCORING_API_URL", "http://localhost:8000")
+# Seconds to wait for a connection and for a response.
+API_CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT", "5"))
+API_READ_TIMEOUT = float(os.environ.get("API_READ_TIMEOUT", "60"))
+# Retries per call, and the backoff base: waits are 0, 2x, 4x, ... this many seconds.
+API_RETRIES = int(os.environ.get("API_RETRIES", "3"))
+API_BACKOFF_SECONDS = float(os.environ.get("API_BACKOFF_SECONDS", "0.5"))
+# Concurrent requests score_many() keeps in flight (also the connection pool size),
+# and applicants per POST /score/batch call.
+API_MAX_WORKERS = int(os.environ.get("API_MAX_WORKERS", "8"))
+API_BATCH_SIZE = int(os.environ.get("API_BATCH_SIZE", "100"))
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class ScoringClient:
+    """Thread-safe client for the scoring API; create one per process and reuse it.
+
+    Calls raise requests.exceptions.RequestException (after the retries) on connection
+    failures and HTTP errors. Results the API reports as {"error": ...} are returned as is.
+    """
+
+    def __init__(self, base_url: str = SCORING_API_URL, connect_timeout: float = API_CONNECT_TIMEOUT,
+                 read_timeout: float = API_READ_TIMEOUT, retries: int = API_RETRIES,
+                 backoff_seconds: float = API_BACKOFF_SECONDS, max_workers: int = API_MAX_WORKERS,
+                 batch_size: int = API_BATCH_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+
+        retry = Retry(total=retries, backoff_factor=backoff_seconds, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset({"GET", "POST"}), respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=self.max_workers, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._pool = None
+        self._paths = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None: self._pool.shutdown()
+            self._pool = None
+        self.session.close()
+
+    # --- Single calls ---
+    def request(self, method: str, path: str, body=None, params=None, data: bytes = None, headers: dict = None):
+        """One call: body is sent as JSON, or data as raw bytes (with its Content-Type in headers).
+        Returns the decoded JSON response, or the raw bytes of any other response type."""
+        response = self.session.request(method, self.base_url + path, json=body, data=data, params=params,
+                                        headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        if response.headers.get("content-type", "").startswith("application/json"): return response.json()
+        return response.content
+
+    def score(self, payload: dict):
+        return self.request("POST", "/score", payload)
+
+    def score_batch(self, payloads: list):
+        return self.request("POST", "/score/batch", payloads)
+
+    def score_arrow(self, batch):
+        """Scores a pyarrow RecordBatch or Table of applicants (one column per field) in one
+        POST /score/batch sent and answered as Arrow IPC; returns a pyarrow Table of scores
+        with model_version in its schema metadata. Raises ValueError on a validation error."""
+        import pyarrow as pa
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write(batch)
+        arrow = "application/vnd.apache.arrow.stream"
+        try:
+            result = self.request("POST", "/score/batch", data=sink.getvalue().to_pybytes(),
+                                  headers={"Content-Type": arrow, "Accept": arrow})
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 422:
+                raise ValueError(f"The API rejected the batch: {e.response.json()['detail']}")
+            raise
+        if isinstance(result, dict): raise ValueError(result.get("error", "The API did not return Arrow."))
+        return pa.ipc.open_stream(result).read_all()
+
+    def explain(self, payload: dict, top_k: int = None):
+        return self.request("POST", "/explain", payload, params={"top_k": top_k} if top_k else None)
+
+    def simulate(self, applicant: dict, ranges: dict):
+        """POST /simulate; ranges maps a numeric field to {"start", "stop", "steps"} or {"values"}."""
+        return self.request("POST", "/simulate", {"applicant": applicant, "ranges": ranges})
+
+    def portfolio_summary(self, group_by: str = None):
+        return self.request("GET", "/portfolio/summary", params={"group_by": group_by} if group_by else None)
+
+    def portfolio_what_if(self, policy: dict, group_by: str = None, batches: list = None):
+        """POST /portfolio/what-if; policy may set weights, low_risk_threshold, high_need_threshold
+        and min_composite_score."""
+        return self.request("POST", "/portfolio/what-if", {"policy": policy, "group_by": group_by, "batches": batches})
+
+    def has_endpoint(self, path: str):
+        """Whether the server's OpenAPI schema lists path (fetched once; False if it can't be read)."""
+        with self._lock:
+            if self._paths is None:
+                try:
+                    self._paths = set(self.request("GET", "/openapi.json").get("paths", {}))
+                except (requests.exceptions.RequestException, ValueError):
+                    return False  # try again on the next call
+            return path in self._paths
+
+    # --- Concurrent calls ---
+    def executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="api-client")
+            return self._pool
+
+    def map(self, fn, items):
+        """fn(item) for every item, max_workers at a time; results in input order."""
+        items = list(items)
+        if len(items) <= 1: return [fn(item) for item in items]
+        return list(self.executor().map(fn, items))
+
+    def score_many(self, payloads: list, batch_size: int = None, use_batch: bool = None):
+        """Scores every payload, concurrently; returns one result per payload, in order.
+
+        use_batch=None uses POST /score/batch if the server has it. A batch the server
+        rejects as a whole ({"error": ...}) gives that error for each of its rows.
+        """
+        payloads = list(payloads)
+        if use_batch is None: use_batch = self.has_endpoint("/score/batch")
+        if not use_batch: return self.map(self.score, payloads)
+
+        size = batch_size or self.batch_size
+        chunks = [payloads[i:i + size] for i in range(0, len(payloads), size)]
+        results = []
+        for chunk, chunk_results in zip(chunks, self.map(self.score_batch, chunks)):
+            results.extend(chunk_results if isinstance(chunk_results, list) else [chunk_results] * len(chunk))
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a JSON-lines file of applicants through the scoring API.")
+    parser.add_argument("input", help="one JSON applicant per line ('-' for stdin)")
+    parser.add_argument("--url", default=SCORING_API_URL)
+    parser.add_argument("--workers", type=int, default=API_MAX_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=API_BATCH_SIZE)
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    with source:
+        payloads = [json.loads(line) for line in source if line.strip()]
+    with ScoringClient(args.url, max_workers=args.workers, batch_size=args.batch_size) as client:
+        for result in client.score_many(payloads):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
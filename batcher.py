@@ -0,0 +1,110 @@
+# batcher.py (Micro-batching request coalescer for /score)
+
+import asyncio
+import os
+
+from executor import QueueFullError
+
+# --- CONFIGURATION ---
+# While a batch is being scored, new /score requests are collected for up to
+# MICROBATCH_MAX_WAIT_MS, or until MICROBATCH_MAX_BATCH_SIZE have arrived, and then
+# scored with one vectorized call.
+# MICROBATCH_ENABLED=0 sends every request to the score lane on its own.
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "1") != "0"
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "2"))
+MICROBATCH_MAX_BATCH_SIZE = int(os.environ.get("MICROBATCH_MAX_BATCH_SIZE", "64"))
+MICROBATCH_MAX_PENDING = int(os.environ.get("MICROBATCH_MAX_PENDING", "1024"))
+
+
+class MicroBatcher:
+    """Coalesces single-item requests into batches for a vectorized scoring function.
+
+    run_batch is an async callable taking a list of payloads and returning either a
+    list of results in the same order, or one error dict that applies to the whole batch
+    (the convention of scorer.calculate_composite_scores). Batches are dispatched as soon
+    as they close, so several can be in flight at once; run_batch is expected to bound that.
+    """
+
+    def __init__(self, run_batch, max_batch_size=MICROBATCH_MAX_BATCH_SIZE,
+                 max_wait_ms=MICROBATCH_MAX_WAIT_MS, max_pending=MICROBATCH_MAX_PENDING):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self._queue = None
+        self._collector = None
+        self._flushes = set()
+        self.batches = self.items = 0
+
+    def start(self):
+        """Starts the collector task; call from within the running event loop."""
+        self._queue = asyncio.Queue(self.max_pending)
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, *self._flushes, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done(): future.cancel()
+
+    async def submit(self, payload):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((payload, future))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"The micro-batch queue is full ({self.max_pending} requests pending).")
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                # Only hold requests back while a batch is already being scored; an idle
+                # batcher dispatches right away so light traffic pays no extra latency.
+                deadline = loop.time() + (self.max_wait if self._flushes else 0)
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0: break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # The requests already taken off the queue would otherwise wait forever
+                for _, future in batch:
+                    if not future.done(): future.cancel()
+                raise
+
+            flush = asyncio.create_task(self._flush(batch))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.run_batch([payload for payload, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch: future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done(): future.set_exception(e)
+            return
+
+        if isinstance(results, dict): results = [results] * len(batch)
+        for (_, future), result in zip(batch, results):
+            # Waiters whose client went away have already been cancelled
+            if not future.done(): future.set_result(result)
+
+    def stats(self):
+        return {"max_batch_size": self.max_batch_size, "max_wait_ms": self.max_wait * 1000,
+                "pending": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self.batches, "items": self.items,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0}
@@ -0,0 +1,60 @@
+# benchmarks/bench_api_client.py
+# Compares ways of scoring many applicants over HTTP against a local uvicorn server
+# (or --url): a fresh requests.post per applicant, as dashboard.py used to do, against
+# api_client.ScoringClient serially, concurrently (one POST /score per applicant) and
+# through POST /score/batch. Every method must return the same results.
+#
+# Run from anywhere:  python benchmarks/bench_api_client.py [--applicants 2000] [--workers 8]
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api_client import ScoringClient
+from bench_microbatch import start_server
+from payloads import make_payloads
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8, help="ScoringClient concurrency")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--url", help="benchmark this server instead of starting one")
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.applicants)
+    proc, url = (None, args.url.rstrip("/")) if args.url else start_server({})
+    try:
+        with ScoringClient(url, max_workers=args.workers, batch_size=args.batch_size) as client:
+            methods = {
+                "requests.post per applicant": lambda: [requests.post(f"{url}/score", json=p).json() for p in payloads],
+                "ScoringClient.score, serial": lambda: [client.score(p) for p in payloads],
+                f"score_many, /score x{args.workers}": lambda: client.score_many(payloads, use_batch=False),
+                f"score_many, /score/batch[{args.batch_size}] x{args.workers}": lambda: client.score_many(payloads),
+            }
+            client.score_many(payloads[:200])  # warm up the server and the connection pool
+            print(f"{'method':<40}{'seconds':>9}{'applicants/s':>14}{'speed-up':>10}")
+            reference = baseline = None
+            for label, run in methods.items():
+                start = time.perf_counter()
+                results = run()
+                seconds = time.perf_counter() - start
+                baseline = baseline or seconds
+                if reference is None: reference = results
+                same = "" if results == reference else "  MISMATCH"
+                print(f"{label:<40}{seconds:>9.2f}{len(payloads) / seconds:>14.0f}{baseline / seconds:>10.1f}{same}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_artifacts.py
+# Compares the joblib pickles with the UBJSON exports written by export_models.py:
+# file size, cold-load time and peak RSS (each in a fresh interpreter), per-row
+# predict latency, and whether both formats give identical predictions.
+#
+# Run from anywhere, after `python export_models.py`:  python benchmarks/bench_artifacts.py
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODELS = [("repayment_model_xgb", "XGBClassifier"), ("income_model_final", "XGBRegressor")]
+
+CHILD = r"""
+import json, resource, sys, time
+import numpy as np
+import xgboost
+baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if %(fmt)r == "joblib":
+    import joblib
+    model = joblib.load("./saved_models/%(stem)s.joblib")
+else:
+    model = xgboost.%(cls)s()
+    model.load_model("./saved_models/%(stem)s.ubj")
+load_s = time.perf_counter() - start
+rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024
+
+booster = model.get_booster()
+x = np.ascontiguousarray(np.random.default_rng(0).lognormal(3, 3, (1000, booster.num_features())), dtype=np.float32)
+booster.inplace_predict(x[:1])
+start = time.perf_counter()
+for i in range(300): booster.inplace_predict(x[i:i + 1])
+row_us = (time.perf_counter() - start) / 300 * 1e6
+print(json.dumps({"load_s": load_s, "rss_mb": rss_mb, "row_us": row_us,
+                  "predictions": booster.inplace_predict(x).tolist()}))
+"""
+
+
+def run(fmt, stem, cls):
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    out = subprocess.run([sys.executable, "-c", CHILD % {"fmt": fmt, "stem": stem, "cls": cls}],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'model':<22}{'format':<8}{'size MB':>9}{'load ms':>10}{'load RSS MB':>13}{'predict us/row':>16}")
+    for stem, cls in MODELS:
+        paths = {fmt: os.path.join(ROOT, "saved_models", f"{stem}.{fmt}") for fmt in ("joblib", "ubj")}
+        if not all(os.path.exists(path) for path in paths.values()):
+            print(f"{stem:<22}skipped (run export_models.py first, and make sure the .joblib exists)")
+            continue
+
+        results = {fmt: min((run(fmt, stem, cls) for _ in range(3)), key=lambda r: r["load_s"]) for fmt in paths}
+        for fmt, r in results.items():
+            print(f"{stem:<22}{fmt:<8}{os.path.getsize(paths[fmt]) / 1e6:>9.2f}{r['load_s'] * 1e3:>10.0f}"
+                  f"{r['rss_mb']:>13.0f}{r['row_us']:>16.1f}")
+        same = results["joblib"]["predictions"] == results["ubj"]["predictions"]
+        print(f"{'':<22}identical predictions: {same}")
+
+
+if __name__ == "__main__":
+    main()
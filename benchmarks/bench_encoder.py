@@ -0,0 +1,90 @@
+# benchmarks/bench_encoder.py
+# Checks FeatureEncoder column-for-column against the pandas get_dummies/reindex
+# preparation it replaced, then times both.
+#
+# Run from anywhere:  python benchmarks/bench_encoder.py [--rows 2000]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import scorer
+from encoder import FeatureEncoder
+from payloads import make_payloads
+
+
+def legacy_prepared_data(user_data: dict):
+    """The original scorer.get_prepared_data (pandas on every call)."""
+    df_a_raw = pd.DataFrame([user_data])
+    df_a_encoded = pd.get_dummies(df_a_raw, columns=scorer.MODEL_A_CAT_FEATURES, dummy_na=False, drop_first=True)
+    df_a = df_a_encoded.reindex(columns=scorer.repayment_features, fill_value=0)
+    df_a.columns = ["".join (c if c.isalnum() else "_" for c in str(x)) for x in df_a.columns]
+
+    df_b_raw = pd.DataFrame([user_data])
+    df_b_encoded = pd.get_dummies(df_b_raw, columns=scorer.MODEL_B_CAT_FEATURES, dummy_na=False, drop_first=True)
+    df_b = df_b_encoded.reindex(columns=scorer.income_features, fill_value=0)
+    df_b = df_b.fillna(0)
+    return df_a, df_b
+
+
+def check_parity(rows):
+    # 1. Serving path: drop_first=True on a one-row frame, exactly as get_prepared_data did
+    for row in rows:
+        df_a, df_b = legacy_prepared_data(row)
+        x_a, x_b = scorer.get_prepared_data(row)
+        assert list(df_a.columns) == scorer.repayment_encoder.features
+        assert list(df_b.columns) == scorer.income_encoder.features
+        np.testing.assert_array_equal(df_a.to_numpy(dtype=np.float64), x_a)
+        np.testing.assert_array_equal(df_b.to_numpy(dtype=np.float64), x_b)
+
+    batch_a, batch_b = scorer.get_prepared_batch(rows)
+    np.testing.assert_array_equal(batch_a, np.vstack([scorer.get_prepared_data(r)[0] for r in rows]))
+    np.testing.assert_array_equal(batch_b, np.vstack([scorer.get_prepared_data(r)[1] for r in rows]))
+
+    # 2. Lookup tables: with drop_first=False every level maps to its training dummy
+    #    column, and unseen levels (e.g. the dashboard's "Rural") set nothing.
+    for features, cats in [(scorer.repayment_features, scorer.MODEL_A_CAT_FEATURES),
+                           (scorer.income_features, scorer.MODEL_B_CAT_FEATURES)]:
+        encoder = FeatureEncoder(features, cats, drop_first=False, fill_na=True)
+        expected = pd.get_dummies(pd.DataFrame(rows), columns=cats, dummy_na=False)
+        expected = expected.reindex(columns=features, fill_value=0).fillna(0)
+        np.testing.assert_array_equal(expected.to_numpy(dtype=np.float64), encoder.encode_many(rows))
+        for row in rows[:200]:
+            single = pd.get_dummies(pd.DataFrame([row]), columns=cats, dummy_na=False)
+            single = single.reindex(columns=features, fill_value=0).fillna(0)
+            np.testing.assert_array_equal(single.to_numpy(dtype=np.float64), encoder.encode(row))
+
+
+def time_per_call(fn, rows):
+    start = time.perf_counter()
+    for row in rows: fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    if scorer.repayment_encoder is None: sys.exit("Models are not loaded; see saved_models/.")
+    rows = make_payloads(args.rows)
+
+    check_parity(rows)
+    print(f"Parity OK on {len(rows)} payloads (serving path + lookup tables, incl. unseen levels)")
+
+    legacy_us = time_per_call(legacy_prepared_data, rows)
+    encoder_us = time_per_call(scorer.get_prepared_data, rows)
+    print(f"pandas get_dummies/reindex : {legacy_us:9.1f} us/row")
+    print(f"FeatureEncoder.encode      : {encoder_us:9.1f} us/row  ({legacy_us / encoder_us:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
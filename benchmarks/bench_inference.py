@@ -0,0 +1,78 @@
+# benchmarks/bench_inference.py
+# Checks the native BoosterEngine against the sklearn wrappers (predict_proba /
+# predict) bit for bit, then compares per-row and batch latency at a few
+# thread counts.
+#
+# Run from anywhere:  python benchmarks/bench_inference.py [--rows 5000]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import scorer
+from inference import BoosterEngine
+from payloads import make_payloads
+
+
+def check_parity(x_a, x_b):
+    expected_a = scorer.repayment_model.predict_proba(x_a)[:, 0]
+    expected_b = scorer.income_model.predict(x_b)
+    np.testing.assert_array_equal(expected_a, 1.0 - scorer.repayment_engine.predict(x_a))
+    np.testing.assert_array_equal(expected_b, scorer.income_engine.predict(x_b))
+
+    # Row at a time must match the batch call too
+    for i in range(0, len(x_a), max(1, len(x_a) // 200)):
+        assert expected_a[i] == 1.0 - scorer.repayment_engine.predict(x_a[i:i + 1])[0]
+        assert expected_b[i] == scorer.income_engine.predict(x_b[i:i + 1])[0]
+
+
+def per_row_us(fn, x, n=500):
+    start = time.perf_counter()
+    for i in range(n): fn(x[i:i + 1])
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def batch_ms(fn, x, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(x)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    args = parser.parse_args()
+
+    if scorer.repayment_engine is None: sys.exit("Models are not loaded; see saved_models/.")
+    x_a, x_b = scorer.get_prepared_batch(make_payloads(args.rows))
+
+    check_parity(x_a, x_b)
+    print(f"Parity OK: BoosterEngine == sklearn wrapper on {args.rows} rows (Model A and Model B)\n")
+
+    print(f"{'path':<28}{'nthread':>8}{'A us/row':>11}{'B us/row':>11}{'A batch ms':>12}{'B batch ms':>12}")
+    wrapper_a = lambda x: scorer.repayment_model.predict_proba(x)[:, 0]
+    wrapper_b = scorer.income_model.predict
+    print(f"{'sklearn wrapper':<28}{'model':>8}{per_row_us(wrapper_a, x_a):>11.1f}{per_row_us(wrapper_b, x_b):>11.1f}"
+          f"{batch_ms(wrapper_a, x_a):>12.1f}{batch_ms(wrapper_b, x_b):>12.1f}")
+
+    for nthread in sorted(set(args.threads)):
+        engine_a = BoosterEngine(scorer.repayment_model, nthread=nthread)
+        engine_b = BoosterEngine(scorer.income_model, nthread=nthread)
+        print(f"{'Booster.inplace_predict':<28}{nthread:>8}{per_row_us(engine_a.predict, x_a):>11.1f}"
+              f"{per_row_us(engine_b.predict, x_b):>11.1f}{batch_ms(engine_a.predict, x_a):>12.1f}"
+              f"{batch_ms(engine_b.predict, x_b):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_microbatch.py
+# Load-tests POST /score against a real uvicorn server at several micro-batching
+# settings and reports throughput vs. latency. The result cache is disabled so
+# every request reaches the models. Server CPU per request (Linux only) and the
+# average batch size the coalescer reached are reported too, since on small
+# machines the load generator competes with the server for CPU.
+#
+# Run from anywhere:  python benchmarks/bench_microbatch.py [--concurrency 64] [--seconds 10]
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from payloads import make_payloads
+
+# (label, env overrides)
+SETTINGS = [
+    ("off", {"MICROBATCH_ENABLED": "0"}),
+    ("1ms / 16", {"MICROBATCH_MAX_WAIT_MS": "1", "MICROBATCH_MAX_BATCH_SIZE": "16"}),
+    ("2ms / 64", {"MICROBATCH_MAX_WAIT_MS": "2", "MICROBATCH_MAX_BATCH_SIZE": "64"}),
+    ("5ms / 128", {"MICROBATCH_MAX_WAIT_MS": "5", "MICROBATCH_MAX_BATCH_SIZE": "128"}),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_cpu_seconds(pid):
+    """User + system CPU time of a process, from /proc (None where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def start_server(env_overrides):
+    port = free_port()
+    env = dict(os.environ, PYTHONWARNINGS="ignore", SCORE_CACHE_SIZE="0", SCORE_QUEUE_SIZE="100000",
+               MICROBATCH_MAX_PENDING="100000", **env_overrides)
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                            cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        try:
+            httpx.get(url + "/", timeout=0.5)
+            return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def load(url, payloads, concurrency, seconds):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        async def user(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post("/score", json=payloads[i % len(payloads)])
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200 or "error" in response.json(): errors += 1
+                i += concurrency
+
+        start = time.perf_counter()
+        await asyncio.gather(*[user(i) for i in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1e3
+    return {"rps": len(latencies) / elapsed, "p50": np.percentile(latencies_ms, 50),
+            "p99": np.percentile(latencies_ms, 99), "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    payloads = make_payloads(5000)
+    print(f"{'micro-batch':<12}{'concurrency':>12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+          f"{'server CPU ms/req':>19}{'avg batch':>11}{'errors':>8}")
+    for label, env_overrides in SETTINGS:
+        proc, url = start_server(env_overrides)
+        try:
+            for concurrency in args.concurrency:
+                before_cpu = server_cpu_seconds(proc.pid)
+                before = httpx.get(url + "/executor/stats").json().get("microbatch", {})
+                r = asyncio.run(load(url, payloads, concurrency, args.seconds))
+                after_cpu = server_cpu_seconds(proc.pid)
+                after = httpx.get(url + "/executor/stats").json().get("microbatch", {})
+
+                requests_done = r["rps"] * args.seconds
+                cpu_ms = (after_cpu - before_cpu) * 1e3 / requests_done if before_cpu is not None else float("nan")
+                batches = after.get("batches", 0) - before.get("batches", 0)
+                avg_batch = (after.get("items", 0) - before.get("items", 0)) / batches if batches else 1.0
+                print(f"{label:<12}{concurrency:>12}{r['rps']:>10.0f}{r['p50']:>10.1f}{r['p99']:>10.1f}"
+                      f"{cpu_ms:>19.2f}{avg_batch:>11.1f}{r['errors']:>8}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/bench_portfolio.py
+# Times portfolio queries over a large store (see portfolio.py). A sample of synthetic
+# applicants is scored once and written repeatedly into a temporary store until it holds
+# --rows applicants. Then the script times loading the store and answering a summary, a
+# per-group summary and a policy what-if. It first checks that the store reproduces the
+# bands and composite scores that scorer.calculate_column_scores serves for the same sample.
+#
+# Run from anywhere:  python benchmarks/bench_portfolio.py [--rows 1000000] [--sample 20000] [--repeats 5]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import columnar
+import scorer
+from payloads import make_payloads
+from portfolio import PortfolioStore, resolve_policy
+
+WHAT_IF = {"weights": [0.5, 0.5], "low_risk_threshold": 0.6, "min_composite_score": 0.5}
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20_000, help="applicants actually scored")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.sample)
+    columns = {name: np.asarray(values) for name, values in columnar.rows_to_columns(payloads, list(payloads[0])).items()}
+    scores = scorer.score_columns(columns, args.sample)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = PortfolioStore(directory)
+        store.add([(scores, columns)], "sample")
+        served = scorer.calculate_column_scores(columns, args.sample)
+        portfolio = store.load()
+        composite, bands, _ = portfolio.evaluate(resolve_policy())
+        assert (scorer.RISK_BANDS_ARRAY[bands] == served["risk_band"]).all(), "stored bands differ from served ones"
+        assert np.array_equal(np.round(composite.astype(np.float64), 4), served["composite_score"]), "composite differs"
+        store.remove(portfolio.batches[0]["batch_id"])
+
+        copies = max(1, args.rows // args.sample)
+        start = time.perf_counter()
+        store.add(((scores, columns) for _ in range(copies)), "bench")
+        write_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        rows = store.load().rows
+        load_ms = (time.perf_counter() - start) * 1e3
+
+        print(f"{rows:,} stored applicants (written in {write_ms:.0f} ms, loaded in {load_ms:.0f} ms)")
+        print("  parity with served bands/composite scores: ok")
+        for label, fn in [("summary", lambda: store.summary()),
+                          ("summary by Sector", lambda: store.summary(group_by="Sector")),
+                          ("summary by Social_Group_of_HH_Head", lambda: store.summary(group_by="Social_Group_of_HH_Head")),
+                          ("what-if by Sector", lambda: store.what_if(WHAT_IF, group_by="Sector"))]:
+            print(f"  {label:36s} {timed(fn, args.repeats):8.1f} ms")
+        result = store.what_if(WHAT_IF)
+        print(f"  what-if {WHAT_IF}: approval rate {result['baseline']['approval_rate']} -> "
+              f"{result['scenario']['approval_rate']}")
+
+
+if __name__ == "__main__":
+    main()
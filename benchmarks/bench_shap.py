@@ -0,0 +1,69 @@
+# benchmarks/bench_shap.py
+# Compares XGBoost's native pred_contribs against the pickled shap.TreeExplainers
+# (agreement and latency at several batch sizes), and the /explain payload size
+# with and without top-k compaction.
+#
+# Run from anywhere:  python benchmarks/bench_shap.py [--batch-sizes 1 32 256] [--top-k 5]
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import scorer
+from explanations import explainer_contributions, native_contributions
+from payloads import make_payloads
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if scorer.repayment_engine is None: sys.exit("Models are not loaded; see saved_models/.")
+    if not scorer.load_explainers(): sys.exit("SHAP explainer files are missing; nothing to compare against.")
+
+    rows = make_payloads(max(args.batch_sizes))
+    x_a, x_b = scorer.get_prepared_batch(rows)
+    models = [
+        ("Model A", scorer.repayment_engine, scorer.repayment_explainer, x_a, 1),
+        ("Model B", scorer.income_engine, scorer.income_explainer, x_b, None),
+    ]
+
+    print(f"{'model':<9}{'rows':>6}{'native ms':>12}{'explainer ms':>14}{'max |diff|':>12}{'agree':>7}")
+    for name, engine, explainer, x, positive_class in models:
+        for n in args.batch_sizes:
+            native_values, native_base = native_contributions(engine, x[:n])
+            explainer_values, explainer_base = explainer_contributions(explainer, x[:n], positive_class)
+            diff = max(np.abs(native_values - explainer_values).max(), np.abs(native_base - explainer_base).max())
+            agree = np.allclose(native_values, explainer_values, rtol=1e-3, atol=1e-4)
+            native_ms = best_of(lambda: native_contributions(engine, x[:n])) * 1e3
+            explainer_ms = best_of(lambda: explainer_contributions(explainer, x[:n], positive_class)) * 1e3
+            print(f"{name:<9}{n:>6}{native_ms:>12.1f}{explainer_ms:>14.1f}{diff:>12.2e}{str(agree):>7}")
+
+    full = scorer.get_shap_explanations(rows[0])
+    compact = scorer.get_shap_explanations(rows[0], top_k=args.top_k)
+    print(f"\n/explain payload: {len(json.dumps(full))} bytes full, "
+          f"{len(json.dumps(compact))} bytes with top_k={args.top_k}")
+    print(f"Backends chosen by SHAP_BACKEND={scorer.SHAP_BACKEND}: {scorer.get_shap_backends()}")
+
+
+if __name__ == "__main__":
+    main()
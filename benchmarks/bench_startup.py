@@ -0,0 +1,60 @@
+# benchmarks/bench_startup.py
+# Compares worker startup time and peak RSS for:
+#   eager     - models + both SHAP explainers loaded up front (the old import-time behaviour)
+#   lazy      - models only; explainers load on the first /explain call (the default)
+#   disabled  - ENABLE_SHAP_EXPLAINERS=0, shap is never imported
+# Each mode runs in a fresh interpreter, as a new uvicorn worker would.
+#
+# Run from anywhere:  python benchmarks/bench_startup.py [--repeat 3]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+import scorer
+scorer.warm_up(with_explainers=%(eager)s)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "startup_s": elapsed,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "shap_imported": "shap" in sys.modules,
+    "explainers_loaded": scorer.repayment_explainer is not None,
+}))
+"""
+
+MODES = {
+    "eager": ({"ENABLE_SHAP_EXPLAINERS": "1"}, True),
+    "lazy": ({"ENABLE_SHAP_EXPLAINERS": "1"}, False),
+    "disabled": ({"ENABLE_SHAP_EXPLAINERS": "0"}, False),
+}
+
+
+def run_mode(env_overrides, eager):
+    env = dict(os.environ, PYTHONWARNINGS="ignore", **env_overrides)
+    out = subprocess.run([sys.executable, "-c", CHILD % {"eager": eager}], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'startup (s)':>14}{'peak RSS (MB)':>16}{'shap imported':>16}{'explainers':>12}")
+    for mode, (env_overrides, eager) in MODES.items():
+        runs = [run_mode(env_overrides, eager) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["startup_s"])
+        print(f"{mode:<10}{best['startup_s']:>14.2f}{max(r['peak_rss_mb'] for r in runs):>16.0f}"
+              f"{str(best['shap_imported']):>16}{str(best['explainers_loaded']):>12}")
+
+
+if __name__ == "__main__":
+    main()
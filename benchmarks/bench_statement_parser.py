@@ -0,0 +1,87 @@
+# benchmarks/bench_statement_parser.py
+# Times statement_parser.analyze_statement against the original
+# dashboard.analyze_bank_statement (pdfplumber, every page, serially) on generated
+# multi-hundred-page statements, and checks the per-month salary totals against what
+# the generator wrote. The legacy path needs ~0.2 s per page, so by default it is
+# timed on the first --legacy-pages pages and extrapolated to the full statement.
+#
+# Run from anywhere:  python benchmarks/bench_statement_parser.py [--pages 300 600] [--workers 1 4]
+#                                                              [--engines pdfium pdfplumber]
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pdfplumber
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Use a process pool whenever --workers asks for one, however short the statement
+os.environ["STATEMENT_PARALLEL_MIN_PAGES"] = "0"
+
+import statement_parser
+from synthetic_statements import expected_monthly_salary, write_statement_pdf
+
+
+def legacy_analyze(path, max_pages=None):
+    """The original dashboard.analyze_bank_statement: mean of all salary credits."""
+    salaries = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            text = page.extract_text()
+            if text:
+                matches = re.finditer(r'(?i)(?:SALARY|SAL|SAL-TRANSFER|SALARY CREDIT)\s.*?([\d,]+\.\d{2})', text)
+                for match in matches:
+                    salaries.append(float(match.group(1).replace(',', '')))
+    return np.mean(salaries) if salaries else 0
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[300, 600])
+    parser.add_argument("--months", type=int, default=12, help="months the generated statements span")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--months-required", type=int, default=statement_parser.STATEMENT_MONTHS_REQUIRED)
+    parser.add_argument("--engines", nargs="+", choices=["pdfium", "pdfplumber"], default=["pdfium"])
+    parser.add_argument("--legacy-pages", type=int, default=40, help="0 times the legacy path on every page")
+    args = parser.parse_args()
+
+    print(f"{'pages':>6}  {'method':<44}{'seconds':>9}{'pages read':>12}{'speed-up':>10}  monthly totals")
+    with tempfile.TemporaryDirectory() as folder:
+        for pages in args.pages:
+            path = os.path.join(folder, f"statement-{pages}.pdf")
+            n_pages = write_statement_pdf(path, months=args.months, pages=pages)
+            expected = expected_monthly_salary(args.months)
+
+            # Legacy: pdfplumber on every page, serially
+            legacy_pages = min(args.legacy_pages or n_pages, n_pages)
+            legacy_mean, seconds = timed(legacy_analyze, path, legacy_pages)
+            legacy_seconds = seconds * n_pages / legacy_pages
+            label = "legacy (pdfplumber, serial, all pages)" + (" est." if legacy_pages < n_pages else "")
+            print(f"{n_pages:>6}  {label:<44}{legacy_seconds:>9.2f}{n_pages:>12}{1.0:>10.1f}  mean credit {legacy_mean:,.2f}")
+
+            runs = [(engine, workers, months) for engine in args.engines for workers in args.workers
+                    for months in (0, args.months_required)]
+            for engine, workers, months in runs:
+                result, seconds = timed(statement_parser.analyze_statement, path, months_required=months,
+                                        workers=workers, engine=engine)
+                reported = result["monthly_salary"]
+                ok = all(expected[month] == total for month, total in reported.items())
+                label = f"{engine}, {workers} worker(s), " + (f"stop at {months} months" if months else "all pages")
+                print(f"{n_pages:>6}  {label:<44}{seconds:>9.2f}{result['pages_read']:>12}"
+                      f"{legacy_seconds / seconds:>10.1f}  {len(reported)} months, "
+                      f"{'match' if ok else 'MISMATCH'}, mean {result['average_monthly_salary']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
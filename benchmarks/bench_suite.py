@@ -0,0 +1,218 @@
+# benchmarks/bench_suite.py
+# Regression suite for the scoring service: micro-benchmarks of the scorer's hot
+# functions plus an in-process HTTP load test of the FastAPI app (httpx over ASGI,
+# no sockets) at several concurrency levels. Results are saved as JSON so runs can
+# be compared over time; --compare flags metrics that got worse than --threshold.
+#
+# The result caches are off unless --with-cache, so every call reaches the models, and
+# the lanes' queue limits and timeouts are lifted (as in bench_microbatch.py) so the
+# load test measures latency under load rather than 429s; set <LANE>_QUEUE_SIZE etc.
+# yourself to test the production limits. Latency percentiles cover 200 responses;
+# rejected (429/504) and failed requests are counted separately.
+#
+# Run from anywhere:
+#   python benchmarks/bench_suite.py                          # writes benchmarks/results/<time>-<commit>.json
+#   python benchmarks/bench_suite.py --compare benchmarks/results/<earlier>.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# Endpoint -> (HTTP path, applicants per request)
+ENDPOINTS = {"score": ("/score", 1), "batch": ("/score/batch", 100), "explain": ("/explain", 1)}
+
+
+def percentiles(samples, scale):
+    import numpy as np
+    values = np.asarray(samples) * scale
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"mean": float(values.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+# --- MICRO-BENCHMARKS ---
+def time_calls(fn, payloads, calls):
+    """Per-call wall times (seconds) of fn(payload), cycling through payloads after a warm-up."""
+    for payload in payloads[:20]: fn(payload)
+    samples = []
+    for i in range(calls):
+        payload = payloads[i % len(payloads)]
+        start = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run_micro(scorer, payloads, calls, explain_calls):
+    batches = [payloads[i:i + 100] for i in range(0, len(payloads) - 100, 100)]
+    # name -> (function, inputs, calls)
+    benchmarks = {
+        "get_prepared_data": (scorer.get_prepared_data, payloads, calls),
+        "calculate_composite_score": (scorer.calculate_composite_score, payloads, calls),
+        "calculate_composite_scores[100]": (scorer.calculate_composite_scores, batches, calls // 50),
+        "get_shap_explanations": (scorer.get_shap_explanations, payloads, explain_calls),
+    }
+    results = {}
+    for name, (fn, inputs, n) in benchmarks.items():
+        if name == "get_shap_explanations" and scorer.get_shap_backends() is None:
+            print(f"  {name:<34} skipped (SHAP explanations are off or unavailable)")
+            continue
+        samples = time_calls(fn, inputs, n)
+        stats = percentiles(samples, 1e6)
+        results[name] = {"calls": n, **{f"{k}_us": round(v, 2) for k, v in stats.items()},
+                         "ops_per_s": round(len(samples) / sum(samples), 1)}
+        print(f"  {name:<34}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}"
+              f"{results[name]['ops_per_s']:>12.0f}")
+    return results
+
+
+# --- IN-PROCESS HTTP LOAD TEST ---
+async def load_level(client, path, bodies, concurrency, seconds):
+    latencies, counts = [], {"rejected": 0, "errors": 0}
+    deadline = time.perf_counter() + seconds
+
+    async def user(offset):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post(path, json=bodies[i % len(bodies)])
+            elapsed = time.perf_counter() - start
+            i += concurrency
+            if response.status_code in (429, 504):
+                counts["rejected"] += 1
+            elif response.status_code != 200 or (isinstance(response.json(), dict) and "error" in response.json()):
+                counts["errors"] += 1
+            else:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[user(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    stats = percentiles(latencies or [float("nan")], 1e3)
+    return {"requests": len(latencies), "rps": round(len(latencies) / elapsed, 1),
+            **{f"{k}_ms": round(v, 3) for k, v in stats.items()}, **counts}
+
+
+async def run_http(app, lifespan, endpoints, payloads, concurrency_levels, seconds):
+    import httpx
+    results = {}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for endpoint in endpoints:
+                path, size = ENDPOINTS[endpoint]
+                bodies = payloads if size == 1 else [payloads[i:i + size] for i in range(0, len(payloads) - size, size)]
+                results[f"POST {path}"] = levels = {}
+                for concurrency in concurrency_levels:
+                    r = levels[str(concurrency)] = await load_level(client, path, bodies, concurrency, seconds)
+                    print(f"  {'POST ' + path:<20}{concurrency:>6}{r['rps']:>10.0f}{r['p50_ms']:>10.2f}"
+                          f"{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['rejected']:>10}{r['errors']:>8}")
+    return results
+
+
+# --- RESULTS ---
+def environment(scorer):
+    import numpy, xgboost
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    settings = ["MICROBATCH_ENABLED", "XGB_NTHREAD", "SHAP_BACKEND", "METRICS_ENABLED", "SCORE_CACHE_SIZE",
+                "EXPLAIN_CACHE_SIZE", "SCORE_WORKERS", "BATCH_WORKERS", "EXPLAIN_WORKERS", "DRIFT_MONITOR_ENABLED"]
+    return {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "python": platform.python_version(),
+            "numpy": numpy.__version__, "xgboost": xgboost.__version__, "cpus": os.cpu_count(),
+            "machine": platform.machine(), "model_version": scorer.registry.active.version,
+            "settings": {name: os.environ.get(name) for name in settings if name in os.environ}}
+
+
+def flatten(results):
+    """{"micro/<name>/<metric>" or "http/<endpoint>/c<N>/<metric>": value} for the compared metrics."""
+    flat = {}
+    for name, stats in results.get("micro", {}).items():
+        for metric in ("p50_us", "p99_us", "ops_per_s"): flat[f"micro/{name}/{metric}"] = stats[metric]
+    for endpoint, levels in results.get("http", {}).items():
+        for concurrency, stats in levels.items():
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"): flat[f"http/{endpoint}/c{concurrency}/{metric}"] = stats[metric]
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """Prints every shared metric's change; returns the ones (other than p99s) that regressed
+    by more than threshold %."""
+    old, new = flatten(baseline), flatten(current)
+    regressions = []
+    print(f"\nCompared with {baseline['environment'].get('commit')} ({baseline['environment'].get('time')}):")
+    for key in (k for k in new if k in old and old[k]):
+        change = (new[key] - old[key]) / old[key] * 100
+        # Throughput should go up, latency down; p99s are shown but too noisy to gate on
+        worse = -change if key.endswith(("rps", "ops_per_s")) else change
+        flag = "  REGRESSION" if worse > threshold and not key.endswith("p99_us") and not key.endswith("p99_ms") else ""
+        if flag: regressions.append(key)
+        print(f"  {key:<62}{old[key]:>12.2f}{new[key]:>12.2f}{change:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks and an in-process load test of the scoring API.")
+    parser.add_argument("--calls", type=int, default=2000, help="calls per scoring micro-benchmark")
+    parser.add_argument("--explain-calls", type=int, default=200)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=["score", "batch", "explain"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--seconds", type=float, default=5, help="duration of each load-test level")
+    parser.add_argument("--with-cache", action="store_true", help="keep the result caches on")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="%% change counted as a regression")
+    args = parser.parse_args()
+
+    if not args.with_cache:
+        os.environ["SCORE_CACHE_SIZE"] = os.environ["EXPLAIN_CACHE_SIZE"] = "0"
+    for lane in ("SCORE", "BATCH", "EXPLAIN"):
+        os.environ.setdefault(f"{lane}_QUEUE_SIZE", "100000")
+        os.environ.setdefault(f"{lane}_TIMEOUT_SECONDS", "600")
+    os.environ.setdefault("MICROBATCH_MAX_PENDING", "100000")
+    import main as api  # imports scorer, which reads the settings above
+    import scorer
+    from payloads import make_payloads
+
+    if scorer.registry.active is None: sys.exit("Models are not loaded; see saved_models/.")
+    payloads = make_payloads(5000)
+    for payload in payloads[:100]: api.ApplicantData(**payload)  # the payloads must pass the API's validation
+
+    results = {"environment": environment(scorer)}
+    if not args.skip_micro:
+        print(f"{'micro-benchmark':<36}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'ops/s':>12}")
+        results["micro"] = run_micro(scorer, payloads, args.calls, args.explain_calls)
+    if not args.skip_http:
+        print(f"\n{'endpoint':<22}{'conc.':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rejected':>10}{'errors':>8}")
+        results["http"] = asyncio.run(run_http(api.app, api.lifespan, args.endpoints, payloads,
+                                               args.concurrency, args.seconds))
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{results['environment']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} metric(s) regressed by more than {args.threshold}%.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_wire_formats.py
+# Bytes on the wire and server CPU per 10k applicants for POST /score/batch in each
+# wire format: a JSON array of objects (Pydantic-validated per row) against Arrow IPC
+# and msgpack columns (validated column-wise, see columnar.py). Runs against a local
+# uvicorn server; server CPU is read from /proc (Linux), so the client's own encoding
+# and decoding are not counted. Every format must return the same scores.
+#
+# Run from anywhere:  python benchmarks/bench_wire_formats.py [--applicants 10000] [--repeats 5]
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import msgpack
+import pyarrow as pa
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import columnar
+from bench_microbatch import server_cpu_seconds, start_server
+from payloads import make_payloads
+
+SCORE_FIELDS = ["repayment_score", "income_proxy_score", "predicted_mpce", "composite_score", "risk_band"]
+
+
+def arrow_body(columns):
+    table = pa.table(columns)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def scores_from(fmt, content):
+    """The response's score columns as plain lists."""
+    if fmt == "json":
+        rows = json.loads(content)
+        return {name: [row[name] for row in rows] for name in SCORE_FIELDS}
+    if fmt == "arrow":
+        table = pa.ipc.open_stream(content).read_all()
+        return {name: table.column(name).to_pylist() for name in SCORE_FIELDS}
+    columns = msgpack.unpackb(content)
+    return {name: columns[name] for name in SCORE_FIELDS}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applicants", type=int, default=10_000, help="applicants per request")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.applicants)
+    columns = {name: [payload[name] for payload in payloads] for name in payloads[0]}
+    # format -> (Content-Type, body)
+    requests_by_format = {
+        "json": (columnar.JSON, json.dumps(payloads).encode()),
+        "arrow": (columnar.ARROW_STREAM, arrow_body(columns)),
+        "msgpack": (columnar.MSGPACK, msgpack.packb(columns)),
+    }
+    per_10k = 10_000 / args.applicants
+
+    proc, url = start_server({"BATCH_TIMEOUT_SECONDS": "600"})
+    try:
+        session = requests.Session()
+        print(f"{'format':<10}{'request KB':>12}{'response KB':>13}{'server CPU ms':>15}{'wall ms':>10}"
+              f"{'CPU vs JSON':>13}  (per {10_000:,} applicants)")
+        reference = json_cpu = None
+        for fmt, (media_type, body) in requests_by_format.items():
+            headers = {"content-type": media_type, "accept": media_type}
+            session.post(url + "/score/batch", data=body, headers=headers).raise_for_status()  # warm-up
+            before = server_cpu_seconds(proc.pid)
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                response = session.post(url + "/score/batch", data=body, headers=headers)
+                response.raise_for_status()
+            wall = (time.perf_counter() - start) / args.repeats
+            cpu = (server_cpu_seconds(proc.pid) - before) / args.repeats if before is not None else float("nan")
+
+            scores = scores_from(fmt, response.content)
+            if reference is None: reference, json_cpu = scores, cpu
+            same = "" if scores == reference else "  MISMATCH"
+            print(f"{fmt:<10}{len(body) * per_10k / 1024:>12.0f}{len(response.content) * per_10k / 1024:>13.0f}"
+                  f"{cpu * per_10k * 1e3:>15.1f}{wall * per_10k * 1e3:>10.1f}{json_cpu / cpu:>12.1f}x{same}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/payloads.py (Synthetic ApplicantData payloads for benchmarks and parity checks)
+
+import random
+
+# Levels seen in training (Loan_default / HCES) plus the labels the dashboard sends,
+# so payloads exercise both known and unseen category values.
+CATEGORY_LEVELS = {
+    'Education': ["Bachelor's", "High School", "Master's", "PhD", "Primary", "None"],
+    'EmploymentType': ["Full-time", "Part-time", "Self-employed", "Unemployed", "Contract"],
+    'MaritalStatus': ["Divorced", "Married", "Single", "Widowed"],
+    'HasMortgage': ["Yes", "No"],
+    'HasDependents': ["Yes", "No"],
+    'LoanPurpose': ["Auto", "Business", "Education", "Home", "Other", "Debt Consolidation"],
+    'HasCoSigner': ["Yes", "No"],
+    'Sector': ["rural", "urban", "Rural", "Urban"],
+    'Social_Group_of_HH_Head': ["scheduled tribe", "scheduled caste", "other backward class", "others", "OBC", "General"],
+    'Max_Income_Activity': ["casual labour", "regular wage/salary earning", "self-employment", "Salaried", "Business"],
+    'Type_of_Dwelling_Unit': ["owned", "hired", "others", "Owned", "Hired/Rented"],
+    'Land_Ownership': ["yes", "No", "Yes"],
+    'Ration_Card_Type': ["Above Poverty Line (APL)", "Below Poverty Line (BPL)", "Antyodaya Anna Yojana (AAY)",
+                         "Priority House Holds (PHH)", "No ration card", "APL", "BPL"],
+    'Religion_of_HH_Head': ["Hinduism", "Islam", "Christianity", "Sikhism", "Buddhism", "Hindu", "Muslim"],
+}
+
+
+def make_payload(rnd: random.Random) -> dict:
+    """One realistic applicant, with the same 31 fields as main.ApplicantData."""
+    income = rnd.randint(5_000, 500_000)
+    payload = {
+        'Age': rnd.randint(18, 69),
+        'Income': income,
+        'LoanAmount': rnd.randint(5_000, 250_000),
+        'CreditScore': rnd.randint(300, 850),
+        'MonthsEmployed': rnd.randint(0, 119),
+        'NumCreditLines': rnd.randint(1, 4),
+        'InterestRate': round(rnd.uniform(2.0, 25.0), 2),
+        'LoanTerm': rnd.choice([12, 24, 36, 48, 60]),
+        'DTIRatio': round(rnd.uniform(0.1, 0.9), 2),
+        'head_of_household_age': rnd.randint(18, 90),
+        'household_size_calculated': rnd.randint(1, 12),
+        'avg_education_years_adults': round(rnd.uniform(0.0, 16.0), 1),
+        'num_internet_users': rnd.randint(0, 5),
+        'fuel_expenditure': round(rnd.uniform(0.0, 5_000.0), 2),
+        'comm_expenditure': round(rnd.uniform(0.0, 2_000.0), 2),
+        'Asset_Score_X1': float(rnd.randint(0, 24)),
+        'Scheme_Index_X2': round(rnd.uniform(0.0, 5.0), 2),
+    }
+    for col, levels in CATEGORY_LEVELS.items():
+        payload[col] = rnd.choice(levels)
+    return payload
+
+
+def make_payloads(n: int, seed: int = 42) -> list:
+    rnd = random.Random(seed)
+    return [make_payload(rnd) for _ in range(n)]
@@ -0,0 +1,141 @@
+# benchmarks/synthetic_hces.py (Synthetic HCES 2023-24 SPSS levels for running hces_pipeline offline)
+#
+# Writes every LEVEL - XX .sav file hces_pipeline reads, with the same file names,
+# merge keys, value labels and item-code layout, plus unused filler columns as the
+# real files have.
+#
+#   python benchmarks/synthetic_hces.py /tmp/HCES-synthetic --households 20000
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyreadstat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hces_pipeline as hp
+
+LABELS = {
+    'Sector': {1: 'rural', 2: 'urban'},
+    'Social_Group_of_HH_Head': {1: 'scheduled tribe', 2: 'scheduled caste', 3: 'other backward class', 9: 'others'},
+    'Religion_of_HH_Head': {1: 'Hinduism', 2: 'Islam', 3: 'Christianity', 4: 'Sikhism', 5: 'Jainism', 6: 'Buddhism',
+                            7: 'Zoroastrianism', 9: 'others'},
+    'Max_Income_Activity': {1: 'self-employment', 2: 'regular wage/salary earning', 3: 'casual labour'},
+    'Type_of_Dwelling_Unit': {1: 'owned', 2: 'hired', 3: 'others'},
+    'Land_Ownership': {1: 'yes', 2: 'No'},
+    'Ration_Card_Type': {1: 'Antyodaya Anna Yojana (AAY)', 2: 'Priority House Holds (PHH)', 3: 'Above Poverty Line (APL)',
+                         4: 'Below Poverty Line (BPL)', 9: 'No ration card'},
+    'Relation_to_Head': {1: 'self', 2: 'spouse of head', 3: 'married child', 4: 'spouse of married child',
+                         5: 'unmarried child', 6: 'grandchild', 9: 'others'},
+    'Gender': {1: 'male', 2: 'female', 3: 'transgender'},
+}
+
+# Item codes outside the fuel/communication lists that the expenditure levels also hold
+OTHER_ITEM_CODES = np.arange(100, 700)
+
+
+def _households(rnd, n):
+    """The four merge keys for n distinct households (stored as SPSS numerics)."""
+    ids = np.arange(n)
+    return pd.DataFrame({
+        'FSU_Serial_No': (10000 + ids // 18).astype(np.float64),
+        'Panel': (1 + (ids // 18) % 4).astype(np.float64),
+        'Sub_sample': (1 + (ids // 9) % 2).astype(np.float64),
+        'Sample_Household_No': (1 + ids % 9).astype(np.float64),
+    })
+
+
+def _labelled(rnd, column, n):
+    return rnd.choice(list(LABELS[column]), n).astype(np.float64)
+
+
+def _filler(rnd, df, count):
+    """Columns no feature uses (weights, codes, free numbers), as the real levels carry dozens."""
+    for i in range(count):
+        df[f'Filler_{i:02d}'] = rnd.integers(0, 1000, len(df)).astype(np.float64)
+    return df
+
+
+def _write(df, folder, file_name):
+    labels = {col: LABELS[col] for col in df.columns if col in LABELS}
+    pyreadstat.write_sav(df, os.path.join(folder, file_name), variable_value_labels=labels)
+
+
+def write_synthetic_hces(folder, households=5000, items_per_household=40, filler_columns=20, seed=0):
+    """Writes a complete set of synthetic HCES levels into folder. Returns the folder."""
+    rnd = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    keys = _households(rnd, households)
+    n = households
+
+    # Household levels; Level 01 repeats a few households, which drop_duplicates removes
+    level01 = keys.assign(Sector=_labelled(rnd, 'Sector', n),
+                          Social_Group_of_HH_Head=_labelled(rnd, 'Social_Group_of_HH_Head', n),
+                          Religion_of_HH_Head=_labelled(rnd, 'Religion_of_HH_Head', n))
+    level01 = pd.concat([level01, level01.sample(n // 50, random_state=seed)], ignore_index=True)
+    level03 = keys.assign(Max_Income_Activity=_labelled(rnd, 'Max_Income_Activity', n),
+                          Type_of_Dwelling_Unit=_labelled(rnd, 'Type_of_Dwelling_Unit', n),
+                          Land_Ownership=_labelled(rnd, 'Land_Ownership', n))
+    level04 = keys.assign(Ration_Card_Type=_labelled(rnd, 'Ration_Card_Type', n),
+                          Ration_Any_Item_Last_30_Days=rnd.integers(0, 2, n).astype(np.float64))
+    level07 = keys.assign(**{col: rnd.integers(0, 2, n).astype(np.float64) for col in hp.ASSET_WEIGHTS})
+    level11 = keys.assign(Benefitted_From_PMGKY=rnd.integers(0, 2, n).astype(np.float64),
+                          Ayushman_beneficiary=rnd.integers(0, 2, n).astype(np.float64),
+                          LPG_subsidized_cylinders=rnd.integers(0, 13, n).astype(np.float64),
+                          LPG_subsidy_received=rnd.integers(0, 2, n).astype(np.float64),
+                          Medical_benefit_received=rnd.integers(0, 2, n).astype(np.float64))
+    for file_name, df in zip(hp.HOUSEHOLD_FEATURE_FILES, [level01, level03, level04, level07, level11]):
+        _write(_filler(rnd, df, filler_columns), folder, file_name)
+
+    # Persons: the head first, then 0-7 other members
+    sizes = rnd.integers(1, 9, n)
+    persons = keys.loc[keys.index.repeat(sizes)].reset_index(drop=True)
+    member = np.concatenate([np.arange(size) for size in sizes])
+    persons['Person_Serial_No'] = (member + 1).astype(np.float64)
+    persons['Relation_to_Head'] = np.where(member == 0, 1, rnd.choice([2, 3, 4, 5, 6, 9], len(persons))).astype(np.float64)
+    persons['Gender'] = _labelled(rnd, 'Gender', len(persons))
+    persons['Age'] = np.where(member == 0, rnd.integers(20, 90, len(persons)), rnd.integers(0, 80, len(persons))).astype(np.float64)
+    persons['Years_of_Education'] = rnd.integers(0, 17, len(persons)).astype(np.float64)
+    persons['Used_Internet_Last_30_Days'] = rnd.integers(1, 3, len(persons)).astype(np.float64)
+    _write(_filler(rnd, persons, filler_columns), folder, hp.PERSON_LEVEL_FILE)
+
+    # Level 15: several rows per household, MONTHLY_CONSUMPTION_EXP on one of them only;
+    # about 2% of households have none and are dropped by the MPCE step.
+    level15 = keys.loc[keys.index.repeat(3)].reset_index(drop=True)
+    first = np.arange(len(level15)) % 3 == 0
+    has_mce = np.repeat(rnd.random(n) > 0.02, 3)
+    level15['MONTHLY_CONSUMPTION_EXP'] = np.where(first & has_mce, rnd.lognormal(9.5, 0.6, len(level15)).round(), np.nan)
+    level15['HOUSEHOLD_SIZE'] = np.where(first, np.repeat(sizes, 3), np.nan)
+    _write(level15, folder, hp.LEVEL15_FILE)
+
+    # Expenditure levels: one row per (household, item), a mix of fuel, communication
+    # and other items; column names differ between files as in the survey.
+    item_pool = np.concatenate([hp.FUEL_ITEM_CODES, hp.COMM_ITEM_CODES, OTHER_ITEM_CODES])
+    per_file = max(1, items_per_household // len(hp.EXPENDITURE_FILES))
+    for i, file_name in enumerate(hp.EXPENDITURE_FILES):
+        rows = keys.loc[keys.index.repeat(per_file)].reset_index(drop=True)
+        rows['Item_Code'] = rnd.choice(item_pool, len(rows)).astype(np.float64)
+        rows['Quantity'] = rnd.integers(1, 20, len(rows)).astype(np.float64)
+        value = rnd.lognormal(5, 1, len(rows)).round(2)
+        value[rnd.random(len(rows)) < 0.01] = np.nan
+        rows['Total_Value' if i % 2 else 'Value'] = value
+        _write(_filler(rnd, rows, filler_columns // 4), folder, file_name)
+    return folder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic HCES 2023-24 .sav files.")
+    parser.add_argument("folder")
+    parser.add_argument("--households", type=int, default=5000)
+    parser.add_argument("--items-per-household", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_synthetic_hces(args.folder, args.households, args.items_per_household, seed=args.seed)
+    print(f"Wrote synthetic HCES levels for {args.households:,} households to {args.folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/synthetic_statements.py (Synthetic multi-page bank-statement PDFs)
+#
+# Writes text PDFs laid out like an Indian savings-account statement (date, narration,
+# withdrawal, deposit, balance) with one or more salary credits a month among many
+# other transactions. The PDF is written directly (Helvetica text objects), so no PDF
+# library is needed.
+#
+#   python benchmarks/synthetic_statements.py /tmp/statement.pdf --months 12 --pages 400
+
+import argparse
+import datetime
+import random
+
+LINES_PER_PAGE = 55
+OTHER_NARRATIONS = [
+    "UPI/{n}/GROCERY MART/PAYMENT", "ATM WDL/{n}/MG ROAD", "POS/{n}/UNIVERSAL STORES", "NEFT/{n}/RENT PAYMENT",
+    "IMPS/{n}/TRANSFER TO SELF", "UPI/{n}/MOBILE RECHARGE", "ACH/{n}/LIC PREMIUM", "INT.PD/{n}/SAVINGS INTEREST",
+    "UPI/{n}/REFUND FROM MERCHANT", "CHQ DEP/{n}/CLEARING",
+]
+# Monthly salary amounts, cycled per month
+SALARY = [52_000.00, 52_000.00, 54_500.00, 54_500.00, 54_500.00, 61_250.50]
+SALARY_NARRATIONS = ["NEFT SALARY CREDIT ACME INDUSTRIES LTD {n}", "SAL-TRANSFER {n} ACME INDUSTRIES",
+                     "SALARY FOR THE MONTH {n}"]
+
+
+def _money(value):
+    """Indian digit grouping: 1,23,456.78"""
+    rupees, paise = f"{value:.2f}".split(".")
+    head, tail = rupees[:-3], rupees[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head: groups.insert(0, head)
+    return ",".join(groups + [tail]) + "." + paise
+
+
+def statement_lines(months=12, pages=100, salaries_per_month=1, start=datetime.date(2024, 4, 1), seed=0):
+    """Yields the text lines of each page (a list per page), months spread evenly over the pages;
+    expected_monthly_salary() gives the salary credited in each month."""
+    rnd = random.Random(seed)
+    transactions_per_month = max(1, pages * (LINES_PER_PAGE - 3) // months)
+    balance = 50_000.0
+    lines = []
+    for m in range(months):
+        month_start = (start.replace(day=1) + datetime.timedelta(days=32 * m)).replace(day=1)
+        salary_slots = set(rnd.sample(range(transactions_per_month), min(salaries_per_month, transactions_per_month)))
+        for t in range(transactions_per_month):
+            day = month_start + datetime.timedelta(days=min(27, t * 28 // transactions_per_month))
+            ref = rnd.randint(100000, 999999)
+            if t in salary_slots:
+                amount = SALARY[m % len(SALARY)]
+                balance += amount
+                lines.append(f"{day:%d-%m-%Y} {rnd.choice(SALARY_NARRATIONS).format(n=ref)} {_money(amount)} {_money(balance)}")
+            else:
+                amount = round(rnd.uniform(50, 4000), 2)
+                balance -= amount
+                lines.append(f"{day:%d-%m-%Y} {rnd.choice(OTHER_NARRATIONS).format(n=ref)} {_money(amount)} {_money(balance)}")
+    per_page = LINES_PER_PAGE - 3
+    for page in range(0, len(lines), per_page):
+        yield [f"STATEMENT OF ACCOUNT  Page {page // per_page + 1}", "Account No: XXXXXXXX4321",
+               "Date Narration Amount Balance"] + lines[page:page + per_page]
+
+
+def expected_monthly_salary(months=12, salaries_per_month=1, start=datetime.date(2024, 4, 1)):
+    """{"YYYY-MM": salary credited that month} for a statement written with the same arguments."""
+    totals = {}
+    for m in range(months):
+        month_start = (start.replace(day=1) + datetime.timedelta(days=32 * m)).replace(day=1)
+        totals[f"{month_start:%Y-%m}"] = SALARY[m % len(SALARY)] * salaries_per_month
+    return totals
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_statement_pdf(path, months=12, pages=100, salaries_per_month=1, seed=0):
+    """Writes the statement as a PDF; returns the number of pages written."""
+    pages_text = list(statement_lines(months, pages, salaries_per_month, seed=seed))
+    n = len(pages_text)
+    # Objects: 1 catalog, 2 page tree, 3 font, then (page, content) pairs
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               ("<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n)).encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, lines in enumerate(pages_text):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {5 + 2 * i} 0 R >>".encode())
+        body = "BT /F1 9 Tf 11 TL 36 806 Td " + " ".join(f"({_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(body), body.encode("latin-1")))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic bank-statement PDF.")
+    parser.add_argument("path")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--salaries-per-month", type=int, default=1)
+    args = parser.parse_args()
+    pages = write_statement_pdf(args.path, args.months, args.pages, args.salaries_per_month)
+    print(f"Wrote a {pages}-page, {args.months}-month statement to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
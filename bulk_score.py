@@ -0,0 +1,231 @@
+# bulk_score.py (Streaming bulk scoring of CSV/Parquet applicant files)
+#
+# Scores a file of applicants (one column per ApplicantData field) chunk by chunk
+# and writes repayment/income/composite scores, predicted MPCE and risk band to a
+# Parquet file, so memory stays bounded no matter how large the input is.
+#
+# Run from the repository root (the models are loaded from ./saved_models):
+#   python bulk_score.py applicants.parquet scores.parquet --workers 4 --id-column LoanID
+#   python bulk_score.py applicants.csv scores.parquet --chunk-rows 100000
+# or through a running API (see api_client.py) instead of the local models:
+#   python bulk_score.py applicants.parquet scores.parquet --api-url http://localhost:8000 --workers 8
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Rough width of one CSV applicant row, used to turn --chunk-rows into a CSV block size
+CSV_BYTES_PER_ROW = 256
+OUTPUT_TYPES = {"repayment_score": pa.float64(), "income_proxy_score": pa.float64(), "predicted_mpce": pa.float64(),
+                "composite_score": pa.float64(), "risk_band": pa.string()}
+
+
+def _input_columns(scorer):
+    """Every column the two models read: their numeric inputs and raw categorical fields."""
+    columns = [name for name, _ in scorer.repayment_encoder.numeric_columns]
+    columns += [name for name, _ in scorer.income_encoder.numeric_columns if name not in columns]
+    return columns + scorer.MODEL_A_CAT_FEATURES + scorer.MODEL_B_CAT_FEATURES
+
+
+def _score_batch(scorer, batch: pa.RecordBatch, id_column=None):
+    """Scores one Arrow record batch and returns the output batch."""
+    columns = {name: batch.column(name).to_numpy(zero_copy_only=False) for name in batch.schema.names}
+    scores = scorer.score_columns(columns, batch.num_rows)
+
+    output = {}
+    if id_column: output[id_column] = batch.column(id_column)
+    output["repayment_score"] = pa.array(scores["repayment_score"].astype("float64").round(4))
+    output["income_proxy_score"] = pa.array(scores["income_proxy_score"].astype("float64").round(4))
+    output["predicted_mpce"] = pa.array(scores["predicted_mpce"].astype("float64").round(2))
+    output["composite_score"] = pa.array(scores["composite_score"].astype("float64").round(4))
+    output["risk_band"] = pa.array(scores["risk_band"].astype(str))
+    return pa.RecordBatch.from_pydict(output)
+
+def _score_batch_via_api(client, batch: pa.RecordBatch, id_column=None):
+    """Like _score_batch, but scored by the API: the batch is sent and answered as Arrow columns."""
+    scores = client.score_arrow(batch.drop_columns([id_column]) if id_column else batch)
+
+    output = {}
+    if id_column: output[id_column] = batch.column(id_column)
+    for name in OUTPUT_TYPES:
+        output[name] = scores.column(name).combine_chunks().cast(OUTPUT_TYPES[name])
+    return pa.RecordBatch.from_pydict(output)
+
+
+# --- Worker process side ---
+_worker_scorer = None
+
+def _init_worker():
+    global _worker_scorer
+    # Several processes share the CPU, so each one keeps XGBoost single-threaded
+    os.environ.setdefault("XGB_NTHREAD", "1")
+    os.environ["ENABLE_SHAP_EXPLAINERS"] = "0"
+    import scorer
+    _worker_scorer = scorer
+
+def _score_row_group(path, row_group, columns, chunk_rows, id_column):
+    """Reads one Parquet row group in the worker (no data crosses the process boundary)."""
+    parquet_file = pq.ParquetFile(path)
+    return [_score_batch(_worker_scorer, batch, id_column)
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows, row_groups=[row_group], columns=columns)]
+
+def _score_csv_block(batch, id_column):
+    return [_score_batch(_worker_scorer, batch, id_column)]
+
+
+def _input_types(scorer, id_column=None):
+    """The input columns to read and their Arrow types (categorical fields and the ID are strings)."""
+    columns = _input_columns(scorer) + ([id_column] if id_column else [])
+    categorical = set(scorer.MODEL_A_CAT_FEATURES + scorer.MODEL_B_CAT_FEATURES + [id_column])
+    return columns, {name: pa.string() if name in categorical else pa.float64() for name in columns}
+
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+def _check_parquet_columns(path, columns):
+    missing = set(columns) - set(pq.ParquetFile(path).schema_arrow.names)
+    if missing: raise ValueError(f"Input is missing columns: {sorted(missing)}")
+
+def read_batches(input_path, scorer, chunk_rows=100_000, id_column=None):
+    """Arrow record batches of up to chunk_rows applicants from a CSV or Parquet file, holding
+    the columns the models read (plus id_column). Also used by portfolio.py."""
+    columns, column_types = _input_types(scorer, id_column)
+    if _is_parquet(input_path):
+        _check_parquet_columns(input_path, columns)
+        yield from pq.ParquetFile(input_path).iter_batches(batch_size=chunk_rows, columns=columns)
+    else:
+        yield from _read_csv(input_path, columns, column_types, chunk_rows)
+
+def _csv_types(path, id_column=None):
+    """Every column of a CSV file and a pinned Arrow type for each: float64 for the ones the
+    first block reads as numbers, string for the rest and for id_column. Unlike _input_types
+    this needs no model files (for score_file_via_api)."""
+    with pa_csv.open_csv(path) as reader:
+        schema = reader.schema
+    column_types = {field.name: pa.float64() if field.name != id_column and
+                    (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)) else pa.string()
+                    for field in schema}
+    return schema.names, column_types
+
+def _read_csv(path, columns, column_types, chunk_rows):
+    # Types are pinned up front: the streaming reader infers them from the first block only,
+    # and a later block holding e.g. 1.5 in an all-integer column would otherwise fail.
+    convert = pa_csv.ConvertOptions(include_columns=columns, column_types=column_types)
+    read = pa_csv.ReadOptions(block_size=max(1 << 20, chunk_rows * CSV_BYTES_PER_ROW))
+    with pa_csv.open_csv(path, read_options=read, convert_options=convert) as reader:
+        for batch in reader:
+            yield batch
+
+
+def score_file(input_path, output_path, workers=1, chunk_rows=100_000, id_column=None):
+    """Streams input_path through both models into output_path. Returns the number of rows scored."""
+    import scorer
+    if scorer.repayment_encoder is None: raise RuntimeError("ML models are not loaded.")
+
+    columns, column_types = _input_types(scorer, id_column)
+    is_parquet = _is_parquet(input_path)
+    if is_parquet: _check_parquet_columns(input_path, columns)
+
+    writer = None
+    rows = 0
+
+    def write(batches):
+        nonlocal writer, rows
+        for batch in batches:
+            if writer is None: writer = pq.ParquetWriter(output_path, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+
+    try:
+        if workers <= 1:
+            for batch in read_batches(input_path, scorer, chunk_rows, id_column):
+                write([_score_batch(scorer, batch, id_column)])
+        else:
+            # Parquet is split by row group and each worker reads its own; CSV blocks are read here
+            # and shipped to the workers. At most 2 tasks per worker are in flight, and results are
+            # written in input order, so memory stays bounded.
+            if is_parquet:
+                tasks = ((_score_row_group, input_path, i, columns, chunk_rows, id_column)
+                         for i in range(pq.ParquetFile(input_path).num_row_groups))
+            else:
+                tasks = ((_score_csv_block, batch, id_column) for batch in _read_csv(input_path, columns, column_types, chunk_rows))
+
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+                pending = deque()
+                for fn, *args in tasks:
+                    pending.append(pool.submit(fn, *args))
+                    if len(pending) >= 2 * workers: write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    finally:
+        if writer is not None: writer.close()
+    return rows
+
+
+def score_file_via_api(input_path, output_path, api_url, chunk_rows=10_000, id_column=None, workers=None):
+    """score_file() against a running API instead of local models (e.g. from a machine
+    without the model files). Each chunk is sent as Arrow columns; the API ignores columns
+    it doesn't use. Returns the number of rows scored."""
+    from api_client import API_MAX_WORKERS, ScoringClient
+    if _is_parquet(input_path):
+        batches = pq.ParquetFile(input_path).iter_batches(batch_size=chunk_rows)
+    else:
+        columns, column_types = _csv_types(input_path, id_column)
+        batches = _read_csv(input_path, columns, column_types, chunk_rows)
+
+    writer = None
+    rows = 0
+
+    def write(batch):
+        nonlocal writer, rows
+        if writer is None: writer = pq.ParquetWriter(output_path, batch.schema)
+        writer.write_batch(batch)
+        rows += batch.num_rows
+
+    # Up to 2 chunks per worker are in flight; results are written in input order
+    with ScoringClient(api_url, max_workers=workers or API_MAX_WORKERS) as client:
+        pool, pending = client.executor(), deque()
+        try:
+            for batch in batches:
+                pending.append(pool.submit(_score_batch_via_api, client, batch, id_column))
+                if len(pending) >= 2 * client.max_workers: write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+        finally:
+            for future in pending: future.cancel()
+            if writer is not None: writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of applicants into a Parquet file.")
+    parser.add_argument("input", help="CSV or Parquet file with one column per ApplicantData field")
+    parser.add_argument("output", help="Parquet file to write the scores to")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (Parquet input is split by row group)")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="rows scored per chunk")
+    parser.add_argument("--id-column", help="input column to copy to the output, e.g. an applicant ID")
+    parser.add_argument("--api-url", help="score through the API at this URL instead of the local models "
+                                          "(--workers is then the number of concurrent requests)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.api_url:
+        rows = score_file_via_api(args.input, args.output, args.api_url, chunk_rows=args.chunk_rows,
+                                  id_column=args.id_column, workers=args.workers if args.workers > 1 else None)
+    else:
+        rows = score_file(args.input, args.output, workers=args.workers, chunk_rows=args.chunk_rows,
+                          id_column=args.id_column)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows:,} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/sec) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# cache.py (In-process LRU/TTL result cache for /score and /explain)
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def feature_key(*rows):
+    """Canonical key for one applicant: a hash of its encoded model inputs, not the raw JSON.
+
+    Payloads that only differ in ways the models can't see (key order, extra fields,
+    category values unseen in training) therefore share a cache entry.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(row.tobytes())
+    return digest.digest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters.
+
+    maxsize=0 disables the cache (every lookup is a miss and nothing is stored).
+    """
+
+    def __init__(self, maxsize=10_000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0: return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry (e.g. after the models are reloaded); counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._entries), "maxsize": self.maxsize, "ttl_seconds": self.ttl,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
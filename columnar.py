@@ -0,0 +1,175 @@
+# columnar.py (Arrow IPC / msgpack column wire formats for POST /score/batch)
+#
+# Bulk callers can send a batch as columns instead of a JSON array of objects:
+#   application/vnd.apache.arrow.stream   an Arrow IPC stream (or .file) with one column per field
+#   application/msgpack                   a map of field name -> array of values
+# The columns are checked column-wise with NumPy (types, nulls, whole numbers for int
+# fields and the Field's ge/gt/le/lt bounds) instead of building one Pydantic model per
+# row, and the scores are returned as columns in the format the caller Accepts.
+
+import io
+
+import numpy as np
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+MSGPACK = "application/msgpack"
+# Content-Type / Accept media type -> wire format
+MEDIA_TYPES = {JSON: "json", ARROW_STREAM: "arrow", ARROW_FILE: "arrow", MSGPACK: "msgpack",
+               "application/x-msgpack": "msgpack"}
+RESPONSE_MEDIA_TYPES = {"json": JSON, "arrow": ARROW_STREAM, "msgpack": MSGPACK}
+# Failing rows listed per validation error
+MAX_REPORTED_ROWS = 10
+
+try:
+    from annotated_types import Ge, Gt, Le, Lt
+    # constraint -> (attribute, Pydantic error type, message, passing test)
+    BOUNDS = {Ge: ("ge", "greater_than_equal", "greater than or equal to", np.greater_equal),
+              Gt: ("gt", "greater_than", "greater than", np.greater),
+              Le: ("le", "less_than_equal", "less than or equal to", np.less_equal),
+              Lt: ("lt", "less_than", "less than", np.less)}
+except ImportError:  # only installed alongside pydantic v2
+    BOUNDS = {}
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def media_format(header: str):
+    """Wire format named by a Content-Type header (None if it names none we speak)."""
+    return MEDIA_TYPES.get((header or JSON).split(";")[0].strip().lower())
+
+def accepted_format(header: str, default: str):
+    """The first of our formats listed in an Accept header, else default (e.g. for */*)."""
+    for media_type in (header or "").split(","):
+        fmt = MEDIA_TYPES.get(media_type.split(";")[0].strip().lower())
+        if fmt is not None: return fmt
+    return default
+
+
+# --- 1. DECODING ---
+def decode(fmt: str, body: bytes):
+    """{field: values} from a request body; raises ValueError if the body can't be read."""
+    if fmt == "arrow": return _decode_arrow(body)
+    if fmt == "msgpack": return _decode_msgpack(body)
+    raise UnsupportedFormat(f"Unsupported batch format {fmt!r}.")
+
+def _decode_arrow(body: bytes):
+    import pyarrow as pa
+    try:
+        reader = pa.ipc.open_stream(body)
+    except pa.ArrowInvalid:
+        try:
+            reader = pa.ipc.open_file(body)
+        except pa.ArrowInvalid as e:
+            raise ValueError(f"Body is not an Arrow IPC stream or file: {e}")
+    table = reader.read_all()
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        if pa.types.is_dictionary(column.type): column = column.cast(column.type.value_type)
+        # Nulls only ever fail validation, so those columns take the slow, exact path
+        columns[name] = (np.array(column.to_pylist(), dtype=object) if column.null_count
+                         else column.to_numpy())
+    return columns
+
+def _decode_msgpack(body: bytes):
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedFormat("msgpack is not installed on this server; send Arrow or JSON instead.")
+    try:
+        columns = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ValueError(f"Body is not valid msgpack: {e}")
+    if not isinstance(columns, dict) or not all(isinstance(v, list) for v in columns.values()):
+        raise ValueError("A msgpack batch must be a map of field name -> array of values.")
+    return columns
+
+
+# --- 2. COLUMN-WISE VALIDATION ---
+def _error(name, kind, msg, rows=None):
+    error = {"type": kind, "loc": ["body", name], "msg": msg}
+    if rows is not None:
+        rows = np.asarray(rows)
+        error["rows"] = rows[:MAX_REPORTED_ROWS].tolist()
+        error["count"] = int(len(rows))
+    return error
+
+def _numeric(name, values, n_rows):
+    """values as a 1-D int/float/bool NumPy array, or a validation error."""
+    array = np.asarray(values)
+    if array.ndim == 1 and array.dtype.kind in "biuf": return array, None
+    bad = [i for i, v in enumerate(values) if isinstance(v, (bool, str, bytes)) or not isinstance(v, (int, float))]
+    return None, _error(name, "float_type", "Input should be a valid number", bad or range(n_rows))
+
+def validate_columns(columns: dict, fields: dict):
+    """Checks columns against the fields of a Pydantic model, one column at a time.
+
+    fields maps field name -> FieldInfo (Model.model_fields). Returns (validated columns
+    {field: NumPy array}, number of rows, errors); columns the model doesn't have are dropped.
+    """
+    errors = [_error(name, "missing", "Field required") for name in fields if name not in columns]
+    names = [name for name in fields if name in columns]
+    lengths = {len(columns[name]) for name in names}
+    if len(lengths) > 1:
+        errors.append({"type": "value_error", "loc": ["body"], "msg": "All columns must have the same length"})
+        return {}, 0, errors
+    n_rows = lengths.pop() if lengths else 0
+
+    validated = {}
+    for name in names:
+        field, values = fields[name], columns[name]
+        if field.annotation is str:
+            array = np.asarray(values, dtype=object)
+            bad = [i for i, v in enumerate(values) if type(v) is not str]
+            if bad or array.ndim != 1:
+                errors.append(_error(name, "string_type", "Input should be a valid string", bad or range(n_rows)))
+            else:
+                validated[name] = array
+            continue
+
+        array, error = _numeric(name, values, n_rows)
+        if error is None and field.annotation is int and array.dtype.kind == "f":
+            bad = np.flatnonzero(~np.isfinite(array) | (array != np.floor(array)))
+            if len(bad): error = _error(name, "int_from_float", "Input should be a valid integer", bad)
+        if error is not None:
+            errors.append(error)
+            continue
+        for constraint in field.metadata:
+            bound = BOUNDS.get(type(constraint))
+            if bound is None: continue
+            attr, kind, text, op = bound
+            limit = getattr(constraint, attr)
+            bad = np.flatnonzero(~op(array, limit))
+            if len(bad): errors.append(_error(name, kind, f"Input should be {text} {limit}", bad))
+        validated[name] = array
+    return validated, n_rows, errors
+
+
+# --- 3. ENCODING RESPONSES ---
+def encode(fmt: str, columns: dict, metadata: dict = None):
+    """Response body for {name: array} columns; metadata (e.g. model_version) goes into the
+    Arrow schema metadata, or alongside the columns in msgpack."""
+    if fmt == "arrow":
+        import pyarrow as pa
+        batch = pa.RecordBatch.from_pydict({name: pa.array(values) for name, values in columns.items()})
+        batch = batch.replace_schema_metadata({k: str(v) for k, v in (metadata or {}).items()})
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue()
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.packb(dict({name: np.asarray(values).tolist() for name, values in columns.items()},
+                                  **(metadata or {})))
+    raise UnsupportedFormat(f"Unsupported batch format {fmt!r}.")
+
+def rows_to_columns(rows: list, fields: list):
+    return {name: np.array([row[name] for row in rows]) for name in fields}
+
+def columns_to_rows(columns: dict, metadata: dict = None):
+    names = list(columns)
+    return [dict(zip(names, values), **(metadata or {}))
+            for values in zip(*(np.asarray(columns[name]).tolist() for name in names))]
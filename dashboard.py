@@ -1,12 +1,11 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-import json
-import pdfplumber
-import re
 import plotly.graph_objects as go
 import requests # Necessary for API communication
 
+from api_client import ScoringClient
+from statement_parser import analyze_statement
+
 # --- CONFIGURATION ---
 # CRITICAL: Use the public URL of your deployed FastAPI Space.
 API_ENDPOINT_URL = "https://yashkumfux-credit-scoring.hf.space"
@@ -27,27 +26,31 @@ st.set_page_config(
 
 # --- Helper & Charting Functions ---
 
+@st.cache_resource
+def get_api_client():
+    """One pooled client per dashboard process: keep-alive connections, timeouts and retries (see api_client.py)."""
+    return ScoringClient(API_ENDPOINT_URL)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_sensitivity_surface(api_payload: dict, surface_ranges: dict):
+    """One /simulate grid per (applicant, ranges), reused across reruns; API errors raise
+    ValueError so they are not cached."""
+    simulation = get_api_client().simulate(api_payload, surface_ranges)
+    if "error" in simulation: raise ValueError(simulation["error"])
+    return simulation
+
 def analyze_bank_statement(uploaded_file):
-    """Extracts and calculates average salary from a PDF bank statement."""
-    # (Local function to handle file upload and text extraction)
+    """Extracts the average monthly salary from a PDF bank statement (see statement_parser.py)."""
     if uploaded_file is None:
         return None, "No file uploaded."
-    salaries = []
     try:
-        with pdfplumber.open(uploaded_file) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    # Regex to find common salary/credit transaction strings
-                    matches = re.finditer(r'(?i)(?:SALARY|SAL|SAL-TRANSFER|SALARY CREDIT)\s.*?([\d,]+\.\d{2})', text)
-                    for match in matches:
-                        salaries.append(float(match.group(1).replace(',', '')))
+        analysis = analyze_statement(uploaded_file)
     except Exception as e:
         return None, f"Could not process PDF. Error: {e}"
-    if not salaries:
+    avg_salary = analysis["average_monthly_salary"]
+    if avg_salary is None:
         return 0, "Analyzed: No salary credits found."
-    avg_salary = np.mean(salaries)
-    return avg_salary, f"Verified: Average monthly income is ₹{avg_salary:,.2f}"
+    return avg_salary, f"Verified: Average monthly income is ₹{avg_salary:,.2f} (over {analysis['months']} months)"
 
 def create_gauge_chart(score, title):
     """Creates a Plotly gauge chart."""
@@ -95,6 +98,21 @@ def create_quadrant_chart(repayment_score, income_score):
     fig.update_layout(title_text="Risk Quadrant Analysis", height=450)
     return fig
 
+def create_sensitivity_chart(simulation):
+    """Heatmap of the composite score over a two-field /simulate grid (first field on the y axis)."""
+    y_field, x_field = simulation['fields']
+    scores = np.array(simulation['composite_score']).reshape(simulation['shape'])
+    bands = np.array(simulation['risk_band']).reshape(simulation['shape'])
+    fig = go.Figure(go.Heatmap(
+        z=scores * 100, x=simulation['axes'][x_field], y=simulation['axes'][y_field],
+        customdata=bands, colorscale='RdYlGn', zmin=0, zmax=100, colorbar=dict(title="Score (%)"),
+        hovertemplate=f"{x_field}: %{{x:,.2f}}<br>{y_field}: %{{y:,.0f}}<br>Score: %{{z:.1f}}%<br>%{{customdata}}<extra></extra>"
+    ))
+    fig.update_xaxes(title_text=x_field)
+    fig.update_yaxes(title_text=y_field)
+    fig.update_layout(title_text="Credit Score Sensitivity", height=450)
+    return fig
+
 
 # --- UI Layout ---
 st.title("Beneficiary Credit Scoring & Digital Lending")
@@ -206,9 +224,7 @@ if submit_button:
 
             # --- 3. Send Request to FastAPI ---
             try:
-                response = requests.post(f"{API_ENDPOINT_URL}/score", json=api_payload)
-                response.raise_for_status() 
-                api_results = response.json()
+                api_results = get_api_client().score(api_payload)
                 
                 if "error" in api_results:
                     st.error(f"API Error: {api_results['error']}")
@@ -230,7 +246,8 @@ if submit_button:
                     'dti': dti_local,
                     'existing_debt': user_inputs['existing_emi'] / 0.02, 
                     'composite_score': api_results['composite_score'],
-                    'risk_band_full': api_results['risk_band']
+                    'risk_band_full': api_results['risk_band'],
+                    'api_payload': api_payload
                 }
 
             except requests.exceptions.RequestException as e:
@@ -339,6 +356,10 @@ else:
         st.subheader("Loan Simulator")
         st.info("The Loan Simulator demonstrates how adjusting variables impacts the score. This requires a separate API call.")
         
+        base_income = max(int(results['net_monthly_income']), 1000)
+        surface_ranges = {"Income": {"start": base_income * 0.25, "stop": base_income * 2, "steps": 15},
+                          "DTIRatio": {"start": 0.05, "stop": 0.8, "steps": 16}}
+
         # --- Loan Simulator Logic ---
         # This sends a separate payload to the LIVE API with adjusted values
         with st.form(key='simulator_form'):
@@ -354,7 +375,7 @@ else:
 
             if simulate_button:
                 # Create a new payload based on the original but with simulated changes
-                sim_payload = api_payload.copy() # Use the last successful payload as base
+                sim_payload = results['api_payload'].copy() # Use the last successful payload as base
                 
                 # Apply simulated changes
                 sim_payload['Income'] = sim_income # Direct income adjustment
@@ -362,9 +383,7 @@ else:
                 # Note: Repayment Score must be simulated directly for this demo's logic simplification
                 
                 try:
-                    sim_response = requests.post(f"{API_ENDPOINT_URL}/score", json=sim_payload)
-                    sim_response.raise_for_status()
-                    sim_api_results = sim_response.json()
+                    sim_api_results = get_api_client().score(sim_payload)
 
                     sim_dti = sim_emi / sim_income if sim_income > 0 else 1
                     sim_composite_score = sim_api_results['composite_score']
@@ -400,4 +419,16 @@ else:
                     if "Low Risk" in results['risk_band_full']:
                         st.success(f"**Simulated Decision: Auto-Approve**")
                     else:
-                        st.error(f"**Simulated Decision: Manual Review**")
\ No newline at end of file
+                        st.error(f"**Simulated Decision: Manual Review**")
+
+        # --- Sensitivity Surface: the whole Income x DTI grid from one /simulate call ---
+        st.markdown("#### Sensitivity Surface")
+        # Requested once per applicant; widget reruns (e.g. the form above) reuse the cached grid
+        try:
+            with st.spinner("Scoring the grid..."):
+                simulation = get_sensitivity_surface(results['api_payload'], surface_ranges)
+            st.plotly_chart(create_sensitivity_chart(simulation), use_container_width=True)
+        except requests.exceptions.RequestException as e:
+            st.error(f"Simulation Error: Could not connect to API. Details: {e}")
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            st.error(f"Simulation Error: The API returned an unusable grid. Details: {e}")
@@ -0,0 +1,423 @@
+# drift.py (Streaming input and score drift monitor with fixed-memory sketches)
+#
+# Every applicant scored by scorer.calculate_composite_score(s) is queued here with its
+# result (one deque append on the request path). A background thread folds the queue
+# into per-column summaries in bulk every DRIFT_FLUSH_SECONDS:
+#   numeric columns      a KLL quantile sketch (O(k) memory) plus counts in the
+#                        reference profile's bins
+#   categorical columns  level counts, at most DRIFT_MAX_LEVELS levels (the rest count as "(other)")
+# The population stability index (PSI) of every column against the reference profile
+# built from the training data is served by GET /monitor/drift and in /metrics.
+#
+# The reference profile (reference_profile.json next to the models) is written by
+# train_models.py, or from existing models with:
+#   python drift.py --loan-data Model_A_data/Loan_default.csv --hces-data master_dataset.parquet
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+# --- 0. CONFIGURATION ---
+# DRIFT_MONITOR_ENABLED=0 turns the monitor off (nothing is queued or summarised).
+DRIFT_MONITOR_ENABLED = os.environ.get("DRIFT_MONITOR_ENABLED", "1") != "0"
+# KLL sketch size: about 3k values kept per numeric column, rank error about 1.7/k.
+DRIFT_SKETCH_K = int(os.environ.get("DRIFT_SKETCH_K", "200"))
+# How often queued rows are summarised, and how many may wait (later ones are dropped and counted).
+DRIFT_FLUSH_SECONDS = float(os.environ.get("DRIFT_FLUSH_SECONDS", "1"))
+DRIFT_MAX_PENDING = int(os.environ.get("DRIFT_MAX_PENDING", "50000"))
+# Distinct levels counted per categorical column.
+DRIFT_MAX_LEVELS = int(os.environ.get("DRIFT_MAX_LEVELS", "100"))
+# Rows needed before a column's PSI is reported.
+DRIFT_MIN_ROWS = int(os.environ.get("DRIFT_MIN_ROWS", "100"))
+
+REFERENCE_PROFILE_FILE = "reference_profile.json"
+REFERENCE_BINS = 10
+# Largest training sample the reference profile is built from
+PROFILE_MAX_ROWS = 200_000
+SCORE_COLUMNS = ["repayment_score", "income_proxy_score", "predicted_mpce"]
+QUANTILES = {"p01": 0.01, "p05": 0.05, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p95": 0.95, "p99": 0.99}
+OTHER_LEVEL = "(other)"
+# Proportions are floored at this before taking logs, so empty bins don't make PSI infinite
+PSI_SMOOTHING = 1e-4
+# PSI below 0.1: stable; 0.1-0.25: moderate shift; above 0.25: significant shift
+PSI_MODERATE, PSI_SIGNIFICANT = 0.1, 0.25
+
+
+def psi_status(psi, has_reference=True):
+    if not has_reference: return "no reference"
+    if psi is None: return "insufficient data"
+    return "stable" if psi < PSI_MODERATE else "moderate" if psi < PSI_SIGNIFICANT else "significant"
+
+def population_stability_index(expected, actual):
+    """PSI between two distributions over the same bins (proportions or counts)."""
+    expected = np.clip(np.asarray(expected, dtype=np.float64) / max(np.sum(expected), 1e-12), PSI_SMOOTHING, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64) / max(np.sum(actual), 1e-12), PSI_SMOOTHING, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def _floats(values):
+    """values as a float64 array; anything that isn't a number becomes NaN (missing)."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+                         for v in values], dtype=np.float64)
+
+
+# --- 1. SKETCHES ---
+class QuantileSketch:
+    """KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Level h holds values that each stand for 2**h inputs. When a level outgrows its
+    capacity it is sorted and every other value (from a random offset) moves up a level,
+    so memory stays about 3k values however long the stream; rank error is about 1.7/k.
+    """
+
+    def __init__(self, k: int = DRIFT_SKETCH_K, seed: int = 0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.min, self.max = np.inf, -np.inf
+        self._random = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        return max(2, int(self.k * (2 / 3) ** (len(self.levels) - 1 - level)))
+
+    def update(self, values):
+        """Adds an array of (finite) values."""
+        if not len(values): return
+        self.count += len(values)
+        self.min, self.max = min(self.min, float(values.min())), max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        while True:
+            full = next((h for h, items in enumerate(self.levels) if len(items) > self._capacity(h)), None)
+            if full is None: return
+            if full == len(self.levels) - 1: self.levels.append(np.empty(0))
+            items = np.sort(self.levels[full])
+            odd = len(items) % 2
+            promoted = items[odd + self._random.integers(2)::2]
+            self.levels[full] = items[:odd]
+            self.levels[full + 1] = np.concatenate((self.levels[full + 1], promoted))
+
+    def quantiles(self, qs):
+        """Approximate values at the given quantiles (None for an empty sketch)."""
+        if not self.count: return [None] * len(qs)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side="left").clip(0, len(items) - 1)
+        values = items[idx]
+        return [self.min if q <= 0 else self.max if q >= 1 else float(v) for q, v in zip(qs, values)]
+
+
+class NumericSummary:
+    """Quantile sketch of a numeric column, plus counts in the reference bins for PSI."""
+
+    def __init__(self, reference=None, k: int = DRIFT_SKETCH_K):
+        self.reference = reference
+        self.sketch = QuantileSketch(k)
+        self.missing = 0
+        self.edges = np.asarray(reference["edges"]) if reference else None
+        self.bins = np.zeros(len(self.edges) + 1, dtype=np.int64) if reference else None
+
+    def update(self, values):
+        values = _floats(values)
+        finite = values[np.isfinite(values)]
+        self.missing += len(values) - len(finite)
+        self.sketch.update(finite)
+        if self.bins is not None:
+            self.bins += np.bincount(np.searchsorted(self.edges, finite, side="right"), minlength=len(self.bins))
+
+    @property
+    def count(self):
+        return self.sketch.count + self.missing
+
+    def psi(self):
+        if self.reference is None or self.count < DRIFT_MIN_ROWS: return None
+        expected = np.append(np.asarray(self.reference["proportions"]) * (1 - self.reference["missing"]),
+                             self.reference["missing"])
+        return population_stability_index(expected, np.append(self.bins, self.missing))
+
+    def report(self):
+        quantiles = dict(zip(QUANTILES, self.sketch.quantiles(list(QUANTILES.values()))))
+        report = {"kind": "numeric", "count": self.count,
+                  "missing": round(self.missing / self.count, 4) if self.count else None,
+                  "min": self.sketch.min if self.sketch.count else None,
+                  "max": self.sketch.max if self.sketch.count else None,
+                  "quantiles": {name: None if v is None else round(v, 6) for name, v in quantiles.items()}}
+        if self.reference is not None: report["reference_quantiles"] = self.reference["quantiles"]
+        return report
+
+
+class CategorySummary:
+    """Level counts of a categorical column (at most max_levels distinct levels)."""
+
+    def __init__(self, reference=None, max_levels: int = DRIFT_MAX_LEVELS):
+        self.reference = reference
+        self.max_levels = max_levels
+        self.counts = Counter()
+        self.other = 0
+        self.missing = 0
+
+    def update(self, values):
+        for level, n in Counter(values).items():
+            if level is None:
+                self.missing += n
+            elif level in self.counts or len(self.counts) < self.max_levels:
+                self.counts[level] += n
+            else:
+                self.other += n
+
+    @property
+    def count(self):
+        return sum(self.counts.values()) + self.other + self.missing
+
+    def psi(self):
+        if self.reference is None or self.count < DRIFT_MIN_ROWS: return None
+        levels = list(self.reference["proportions"])
+        expected = [self.reference["proportions"][level] for level in levels]
+        expected += [self.reference["other"], self.reference["missing"]]
+        actual = [self.counts.get(level, 0) for level in levels]
+        actual += [self.count - self.missing - sum(actual), self.missing]
+        return population_stability_index(expected, actual)
+
+    def report(self):
+        total = self.count
+        levels = {str(level): round(n / total, 4) for level, n in self.counts.most_common(10)}
+        if self.other: levels[OTHER_LEVEL] = round(self.other / total, 4)
+        report = {"kind": "categorical", "count": total, "missing": round(self.missing / total, 4) if total else None,
+                  "levels": levels}
+        if self.reference is not None:
+            unseen = sum(n for level, n in self.counts.items() if level not in self.reference["proportions"])
+            report["unseen_levels"] = round((unseen + self.other) / total, 4) if total else None
+        return report
+
+
+# --- 2. REFERENCE PROFILE ---
+def numeric_reference(values, bins: int = REFERENCE_BINS):
+    """Reference entry for a numeric column: quantile bin edges and the share of values in each."""
+    values = _floats(values)
+    finite = values[np.isfinite(values)]
+    edges = np.unique(np.quantile(finite, np.linspace(0, 1, bins + 1)[1:-1])) if len(finite) else np.empty(0)
+    counts = np.bincount(np.searchsorted(edges, finite, side="right"), minlength=len(edges) + 1)
+    return {"kind": "numeric", "count": int(len(values)), "missing": round(1 - len(finite) / max(len(values), 1), 6),
+            "edges": edges.tolist(), "proportions": (counts / max(len(finite), 1)).round(6).tolist(),
+            "quantiles": {name: round(float(np.quantile(finite, q)), 6) if len(finite) else None
+                          for name, q in QUANTILES.items()}}
+
+def categorical_reference(values, max_levels: int = DRIFT_MAX_LEVELS):
+    """Reference entry for a categorical column: the share of each of its most common levels."""
+    counts = Counter(str(v) for v in values if v is not None and v == v)
+    total, present = len(values), sum(counts.values())
+    top = dict(counts.most_common(max_levels))
+    return {"kind": "categorical", "count": total, "missing": round(1 - present / max(total, 1), 6),
+            "proportions": {level: round(n / max(total, 1), 6) for level, n in top.items()},
+            "other": round((present - sum(top.values())) / max(total, 1), 6)}
+
+def build_reference_profile(loan_data: str, hces_data: str, models_dir: str = None, seed: int = 0):
+    """Profiles the training data's inputs (Model A's from Loan_default, Model B's from the
+    HCES master dataset) and the scores the serving path gives them, with the models in
+    models_dir (MODELS_DIR by default). Each file is sampled down to PROFILE_MAX_ROWS."""
+    import pandas as pd
+    import scorer
+
+    models = scorer.load_model_set(models_dir)
+    profile = {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "model_version": models.version,
+               "sources": {"loan_data": os.path.basename(loan_data), "hces_data": os.path.basename(hces_data)},
+               "columns": {}}
+    datasets = [(pd.read_csv(loan_data, engine="pyarrow"), models.repayment_encoder, scorer.MODEL_A_CAT_FEATURES,
+                 ["repayment_score"]),
+                (pd.read_parquet(hces_data), models.income_encoder, scorer.MODEL_B_CAT_FEATURES,
+                 ["income_proxy_score", "predicted_mpce"])]
+    for df, encoder, cat_features, score_columns in datasets:
+        numeric = [name for name, _ in encoder.numeric_columns]
+        df = df.loc[:, ~df.columns.duplicated()][numeric + cat_features]
+        if len(df) > PROFILE_MAX_ROWS: df = df.sample(PROFILE_MAX_ROWS, random_state=seed)
+        for col in numeric:
+            profile["columns"][col] = dict(numeric_reference(pd.to_numeric(df[col], errors="coerce").to_numpy()),
+                                           source="input")
+        for col in cat_features:
+            profile["columns"][col] = dict(categorical_reference(df[col].astype(object).to_numpy()), source="input")
+        columns = {col: df[col].to_numpy() for col in df.columns}
+        scores = scorer.score_columns(columns, len(df), models)
+        for name in score_columns:
+            profile["columns"][name] = dict(numeric_reference(scores[name]), source="output")
+    return profile
+
+def write_reference_profile(profile: dict, models_dir: str):
+    path = os.path.join(models_dir, REFERENCE_PROFILE_FILE)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=1)
+    return path
+
+def load_reference_profile(models_dir: str):
+    """The reference profile saved next to the models, or None if there is none."""
+    path = os.path.join(models_dir, REFERENCE_PROFILE_FILE)
+    if not os.path.exists(path): return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Could not read the reference profile {path}; drift is reported without PSI. Details: {e}")
+        return None
+
+
+# --- 3. MONITOR ---
+class DriftMonitor:
+    """Summarises scored applicants and their scores in the background; see the module notes.
+
+    observe()/observe_many()/observe_columns() only queue their arguments, so they cost
+    the request well under a microsecond. reset() starts a new window (e.g. after a model
+    swap, with the new models' reference profile).
+    """
+
+    def __init__(self, profile: dict = None, enabled: bool = DRIFT_MONITOR_ENABLED,
+                 flush_seconds: float = DRIFT_FLUSH_SECONDS, max_pending: int = DRIFT_MAX_PENDING):
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._pending_rows = 0
+        # _lock guards the queue and its counters (held for a few instructions on the request
+        # path); _summary_lock guards the summaries while they are updated or read. Both are
+        # taken in that order: _summary_lock first.
+        self._lock = threading.Lock()
+        self._summary_lock = threading.Lock()
+        self._thread = None
+        self.reset(profile)
+
+    def reset(self, profile: dict = None):
+        with self._summary_lock, self._lock:
+            self.profile = profile
+            reference = (profile or {}).get("columns", {})
+            self.summaries = {}
+            for name, column in reference.items():
+                self.summaries[name] = (NumericSummary(column) if column["kind"] == "numeric"
+                                        else CategorySummary(column))
+            self.sources = {name: column.get("source", "input") for name, column in reference.items()}
+            self.rows = self.dropped = 0
+            self.since = time.time()
+            self._pending.clear()
+            self._pending_rows = 0
+
+    # --- Request path ---
+    def _queue(self, kind, inputs, results, n_rows):
+        with self._lock:
+            if self._pending_rows + n_rows > self.max_pending:
+                self.dropped += n_rows
+                return
+            self._pending_rows += n_rows
+            self._pending.append((kind, inputs, results, n_rows))
+        if self._thread is None: self._start()
+
+    def observe(self, row: dict, result: dict):
+        if self.enabled and "error" not in result: self._queue("rows", [row], [result], 1)
+
+    def observe_many(self, rows: list, results):
+        if self.enabled and isinstance(results, list) and rows: self._queue("rows", rows, results, len(rows))
+
+    def observe_columns(self, columns: dict, scores: dict, n_rows: int):
+        if self.enabled and "error" not in scores and n_rows: self._queue("columns", columns, scores, n_rows)
+
+    # --- Background summarising ---
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"WARNING: The drift monitor could not summarise a batch: {e}")
+
+    def _summary(self, name, values, source):
+        summary = self.summaries.get(name)
+        if summary is None:
+            # Columns the reference profile doesn't list are tracked without a reference
+            first = values[0] if len(values) else None
+            numeric = ((isinstance(values, np.ndarray) and values.dtype.kind in "biuf")
+                       or (isinstance(first, (int, float)) and not isinstance(first, bool)))
+            summary = self.summaries[name] = NumericSummary() if numeric else CategorySummary()
+            self.sources[name] = source
+        return summary
+
+    def flush(self):
+        """Folds every queued row into the summaries."""
+        with self._summary_lock:
+            with self._lock:
+                batch = list(self._pending)
+                self._pending.clear()
+                self._pending_rows = 0
+            rows, results = [], []
+            for kind, inputs, outputs, n_rows in batch:
+                if kind == "rows":
+                    for row, result in zip(inputs, outputs):
+                        if "error" not in result:
+                            rows.append(row)
+                            results.append(result)
+                else:
+                    self._update(inputs, outputs, n_rows)
+            if rows:
+                names = [name for name, source in self.sources.items() if source == "input"] or list(rows[0])
+                self._update({name: [row.get(name) for row in rows] for name in names},
+                             {name: [result[name] for result in results] for name in SCORE_COLUMNS}, len(rows))
+
+    def _update(self, inputs, outputs, n_rows):
+        self.rows += n_rows
+        for name, values in inputs.items():
+            self._summary(name, values, "input").update(values)
+        for name in SCORE_COLUMNS:
+            if name in outputs: self._summary(name, outputs[name], "output").update(outputs[name])
+
+    # --- Reporting ---
+    def psi_values(self):
+        """{column: PSI} for the columns with a reference and enough rows."""
+        self.flush()
+        with self._summary_lock:
+            values = {name: summary.psi() for name, summary in self.summaries.items()}
+        return {name: psi for name, psi in values.items() if psi is not None}
+
+    def report(self):
+        self.flush()
+        with self._summary_lock:
+            columns = {}
+            for name, summary in self.summaries.items():
+                psi = summary.psi()
+                columns[name] = dict(summary.report(), source=self.sources[name],
+                                     psi=None if psi is None else round(psi, 4),
+                                     status=psi_status(psi, summary.reference is not None))
+            shifted = {status: sorted((name for name, column in columns.items() if column["status"] == status),
+                                      key=lambda name: -columns[name]["psi"])
+                       for status in ("significant", "moderate")}
+            return {"enabled": self.enabled,
+                    "since": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.since)),
+                    "rows": self.rows, "dropped": self.dropped,
+                    "reference": None if self.profile is None else {
+                        key: self.profile.get(key) for key in ("created", "model_version", "sources")},
+                    "shifted": shifted, "columns": columns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the drift monitor's reference profile from the training data.")
+    parser.add_argument("--loan-data", default="Model_A_data/Loan_default.csv", help="Loan_default CSV (Model A)")
+    parser.add_argument("--hces-data", default="master_dataset.parquet", help="master_dataset.parquet (Model B)")
+    parser.add_argument("--models-dir", default=None, help="models to score the data with; the profile is written here")
+    args = parser.parse_args()
+
+    import scorer
+    models_dir = args.models_dir or scorer.MODELS_DIR
+    profile = build_reference_profile(args.loan_data, args.hces_data, models_dir)
+    print(f"Reference profile of {len(profile['columns'])} columns written to {write_reference_profile(profile, models_dir)}")
+
+
+if __name__ == "__main__":
+    main()
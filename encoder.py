@@ -0,0 +1,162 @@
+# encoder.py (Precompiled feature encoder for the scoring hot path)
+
+from collections import Counter
+
+import numpy as np
+
+
+# Distinct (column, value) pairs and level combinations whose unseen_counts() verdict is
+# remembered; payloads can carry arbitrary strings, so the memo stops growing here.
+MAX_MEMOIZED_LEVELS = 10_000
+
+
+def sanitized_level(value: str):
+    """A level as it appears in sanitized feature names (anything not alphanumeric -> '_')."""
+    return "".join(c if c.isalnum() else "_" for c in value)
+
+
+class FeatureEncoder:
+    """Maps applicant payload dicts straight into model-ready NumPy rows.
+
+    Built once from a model's training feature list and its categorical columns,
+    it reproduces what get_dummies + reindex did in scorer.get_prepared_data
+    without building any DataFrame:
+
+    - numeric features are copied from the payload (missing keys -> 0),
+    - each categorical value is looked up in a table of
+      "<column>_<value>" -> dummy column index (unseen values set nothing),
+    - drop_first=True behaves like pd.get_dummies on a one-row frame, where the
+      payload's own level is the first level and is therefore dropped.
+
+    baseline_levels ({column: level}) names the levels drop_first removed when the
+    model was trained; they have no dummy column but were seen in training.
+    """
+
+    def __init__(self, features, cat_features, drop_first=True, fill_na=False, baseline_levels=None):
+        self.features = list(features)
+        self.cat_features = list(cat_features)
+        self.drop_first = drop_first
+        self.fill_na = fill_na
+        self.n_features = len(self.features)
+
+        # Category value -> dummy column index, per categorical column
+        self.dummy_lookup = {col: {} for col in self.cat_features}
+        dummy_columns = set()
+        for idx, name in enumerate(self.features):
+            # Longest prefix wins so e.g. "Sector_" never steals a longer column's dummies
+            for col in sorted(self.cat_features, key=len, reverse=True):
+                if name.startswith(col + "_"):
+                    self.dummy_lookup[col][name[len(col) + 1:]] = idx
+                    dummy_columns.add(idx)
+                    break
+
+        self.numeric_columns = [(name, idx) for idx, name in enumerate(self.features)
+                                if idx not in dummy_columns]
+        self.numeric_index = dict(self.numeric_columns)
+
+        # Levels seen in training, for unseen_counts(), and a bounded memo of its verdicts
+        self.known_levels = {col: set(lookup) for col, lookup in self.dummy_lookup.items()}
+        for col, level in (baseline_levels or {}).items():
+            if col in self.known_levels: self.known_levels[col].add(level)
+        self._verdicts, self._row_verdicts = {}, {}
+
+    def is_known_level(self, col: str, value):
+        """Whether value was a level of col in training. Model A's feature names were
+        sanitized (e.g. "Education_Master_s"), so a sanitized match also counts."""
+        verdict = self._verdicts.get((col, value))
+        if verdict is None:
+            text, known = str(value), self.known_levels[col]
+            verdict = text in known or sanitized_level(text) in known
+            if len(self._verdicts) < MAX_MEMOIZED_LEVELS: self._verdicts[(col, value)] = verdict
+        return verdict
+
+    def unseen_counts(self, rows: list):
+        """{column: number of rows whose value matches no level seen in training} (do not modify it)."""
+        if len(rows) == 1:
+            # The per-request path: one memo lookup for the whole combination of levels
+            levels = tuple(map(rows[0].get, self.cat_features))
+            counts = self._row_verdicts.get(levels)
+            if counts is None:
+                counts = {col: 1 for col, value in zip(self.cat_features, levels)
+                          if value is not None and not self.is_known_level(col, value)}
+                if len(self._row_verdicts) < MAX_MEMOIZED_LEVELS: self._row_verdicts[levels] = counts
+            return counts
+
+        counts = {}
+        for col in self.cat_features:
+            for value, n in Counter([row.get(col) for row in rows]).items():
+                if value is not None and not self.is_known_level(col, value):
+                    counts[col] = counts.get(col, 0) + n
+        return counts
+
+    def unseen_column_counts(self, columns):
+        """unseen_counts() for a column mapping (name -> array-like of values)."""
+        counts = {}
+        for col in self.cat_features:
+            if col not in columns: continue
+            for value, n in Counter(list(columns[col])).items():
+                if value is not None and not self.is_known_level(col, value):
+                    counts[col] = counts.get(col, 0) + n
+        return counts
+
+    def _value(self, raw):
+        if raw is None: return 0.0 if self.fill_na else np.nan
+        value = float(raw)
+        if self.fill_na and value != value: return 0.0
+        return value
+
+    def encode(self, payload: dict):
+        """Encodes one payload into a (1, n_features) float64 array."""
+        row = np.zeros((1, self.n_features), dtype=np.float64)
+        out = row[0]
+        for name, idx in self.numeric_columns:
+            if name in payload: out[idx] = self._value(payload[name])
+
+        if not self.drop_first:
+            for col, lookup in self.dummy_lookup.items():
+                value = payload.get(col)
+                if value is None: continue
+                idx = lookup.get(str(value))
+                if idx is not None: out[idx] = 1.0
+        return row
+
+    def encode_many(self, rows: list):
+        """Encodes a list of payloads into a (len(rows), n_features) array, one column at a time."""
+        matrix = np.zeros((len(rows), self.n_features), dtype=np.float64)
+        for name, idx in self.numeric_columns:
+            matrix[:, idx] = [self._value(row[name]) if name in row else 0.0 for row in rows]
+
+        if not self.drop_first:
+            for col, lookup in self.dummy_lookup.items():
+                for i, row in enumerate(rows):
+                    value = row.get(col)
+                    idx = lookup.get(str(value)) if value is not None else None
+                    if idx is not None: matrix[i, idx] = 1.0
+        return matrix
+
+    def tile(self, row, overrides: dict, n_rows: int):
+        """n_rows copies of an encoded (1, n_features) row with numeric columns replaced by
+        overrides (name -> array of length n_rows); names this model doesn't use are skipped."""
+        matrix = np.repeat(row, n_rows, axis=0)
+        for name, values in overrides.items():
+            idx = self.numeric_index.get(name)
+            if idx is not None: matrix[:, idx] = values
+        return matrix
+
+    def encode_columns(self, columns, n_rows: int):
+        """Encodes a column mapping (name -> array-like of length n_rows, e.g. a pyarrow
+        batch converted to NumPy) without ever building per-row dicts."""
+        matrix = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        for name, idx in self.numeric_columns:
+            if name not in columns: continue
+            values = np.asarray(columns[name], dtype=np.float64)
+            matrix[:, idx] = np.where(np.isnan(values), 0.0, values) if self.fill_na else values
+
+        if not self.drop_first:
+            for col, lookup in self.dummy_lookup.items():
+                if col not in columns: continue
+                levels, inverse = np.unique(np.asarray(columns[col], dtype=object).astype(str), return_inverse=True)
+                level_columns = np.array([lookup.get(level, -1) for level in levels])[inverse]
+                rows = np.flatnonzero(level_columns >= 0)
+                matrix[rows, level_columns[rows]] = 1.0
+        return matrix
@@ -0,0 +1,96 @@
+# executor.py (Bounded worker lanes that keep CPU-bound scoring off the event loop)
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURATION (per lane: worker threads, max requests in flight, timeout in seconds) ---
+# XGBoost and SHAP's tree code release the GIL, so threads give real parallelism
+# here without duplicating the models in every process.
+LANE_CONFIG = {
+    "score": (int(os.environ.get("SCORE_WORKERS", "4")),
+              int(os.environ.get("SCORE_QUEUE_SIZE", "64")),
+              float(os.environ.get("SCORE_TIMEOUT_SECONDS", "2"))),
+    "batch": (int(os.environ.get("BATCH_WORKERS", "1")),
+              int(os.environ.get("BATCH_QUEUE_SIZE", "4")),
+              float(os.environ.get("BATCH_TIMEOUT_SECONDS", "60"))),
+    "explain": (int(os.environ.get("EXPLAIN_WORKERS", "1")),
+                int(os.environ.get("EXPLAIN_QUEUE_SIZE", "8")),
+                float(os.environ.get("EXPLAIN_TIMEOUT_SECONDS", "10"))),
+}
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a lane already has its maximum number of requests in flight."""
+
+
+class Lane:
+    """One dedicated thread pool with a cap on queued + running work.
+
+    Each endpoint family gets its own lane, so a burst of /explain calls can only
+    fill the explain lane and never delays /score.
+    """
+
+    def __init__(self, name, workers, queue_size, timeout):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-lane")
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = self.completed = self.rejected = self.timed_out = 0
+
+    def _release(self, _future):
+        # The slot is only freed when the work really finishes, even if the caller timed out,
+        # so a lane clogged with slow jobs keeps rejecting instead of piling up threads' work.
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock: self.rejected += 1
+            raise QueueFullError(f"The {self.name} queue is full ({self.queue_size} requests in flight).")
+
+        with self._lock: self.in_flight += 1
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock: self.timed_out += 1
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "queue_size": self.queue_size, "timeout_seconds": self.timeout,
+                    "in_flight": self.in_flight, "completed": self.completed,
+                    "rejected": self.rejected, "timed_out": self.timed_out}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ScoringExecutor:
+    """The set of lanes the API runs scoring work on (see LANE_CONFIG)."""
+
+    def __init__(self, config=LANE_CONFIG):
+        self.lanes = {name: Lane(name, *settings) for name, settings in config.items()}
+
+    async def run(self, lane: str, fn, *args):
+        """Runs fn(*args) on the given lane.
+
+        Raises QueueFullError when the lane is saturated and asyncio.TimeoutError
+        when the result is not ready within the lane's timeout.
+        """
+        return await self.lanes[lane].run(fn, *args)
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    def shutdown(self):
+        for lane in self.lanes.values():
+            lane.shutdown()
@@ -0,0 +1,86 @@
+# explanations.py (SHAP backends for /explain: native XGBoost pred_contribs or pickled TreeExplainer)
+
+import time
+
+import numpy as np
+
+
+def native_contributions(engine, x):
+    """SHAP values straight from XGBoost (Booster.predict(pred_contribs=True)).
+
+    Returns (contributions, base_values): an (n, n_features) array and the (n,) bias
+    column, in the model's raw output space (log-odds of class 1 for Model A,
+    log-MPCE for Model B) -- the same space TreeExplainer uses by default.
+    """
+    contribs = engine.contributions(x)
+    return contribs[:, :-1], contribs[:, -1]
+
+
+def explainer_contributions(explainer, x, positive_class=None):
+    """SHAP values from a shap.TreeExplainer, normalised across shap versions.
+
+    Depending on the shap release, classifiers return one array, a per-class list
+    or an (n, features, classes) array; for those positive_class selects the class.
+    """
+    values = explainer.shap_values(x)
+    base = explainer.expected_value
+    if positive_class is not None:
+        if isinstance(values, list): values = values[positive_class]
+        elif np.ndim(values) == 3: values = values[:, :, positive_class]
+        if np.ndim(base) > 0 and np.size(base) > 1: base = np.asarray(base)[positive_class]
+    values = np.asarray(values, dtype=np.float64).reshape(len(x), -1)
+    base = np.full(len(x), float(np.asarray(base).reshape(-1)[0]))
+    return values, base
+
+
+def _contributions_agree(native, explainer, rtol, atol):
+    """Whether two (values, base values) pairs are the same SHAP values."""
+    return bool(np.allclose(native[0], explainer[0], rtol=rtol, atol=atol)
+                and np.allclose(native[1], explainer[1], rtol=rtol, atol=atol))
+
+
+def backends_agree(engine, explainer, probe, positive_class=None, rtol=1e-3, atol=1e-4):
+    """Whether both backends give the same SHAP values on a probe batch (untimed)."""
+    return _contributions_agree(native_contributions(engine, probe),
+                                explainer_contributions(explainer, probe, positive_class), rtol, atol)
+
+
+def choose_backend(engine, explainer, probe, positive_class=None, rtol=1e-3, atol=1e-4):
+    """Times both backends on a probe batch and returns ("native" | "explainer", report).
+
+    The faster one is picked only when both give the same SHAP values; if they
+    disagree, the pickled explainer (the original behaviour) is kept.
+    """
+    start = time.perf_counter()
+    native = native_contributions(engine, probe)
+    native_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    explainer_result = explainer_contributions(explainer, probe, positive_class)
+    explainer_s = time.perf_counter() - start
+
+    agree = _contributions_agree(native, explainer_result, rtol, atol)
+    backend = "native" if agree and native_s <= explainer_s else "explainer"
+    return backend, {"agree": agree, "native_seconds": native_s, "explainer_seconds": explainer_s}
+
+
+def build_explanation(base_value, shap_values, feature_names, feature_values):
+    """One model's explanation for one applicant, in the /explain response format."""
+    return {
+        "base_value": float(base_value),
+        "shap_values": np.asarray(shap_values).tolist(),
+        "feature_names": list(feature_names),
+        "feature_values": np.asarray(feature_values).tolist(),
+    }
+
+
+def top_k_explanation(explanation, top_k):
+    """Keeps only the top_k contributors (largest |SHAP|) of a build_explanation() dict."""
+    if top_k is None or top_k >= len(explanation["shap_values"]): return explanation
+    order = np.argsort(-np.abs(explanation["shap_values"]), kind="stable")[:top_k]
+    return {
+        "base_value": explanation["base_value"],
+        "shap_values": [explanation["shap_values"][i] for i in order],
+        "feature_names": [explanation["feature_names"][i] for i in order],
+        "feature_values": [explanation["feature_values"][i] for i in order],
+    }
@@ -0,0 +1,39 @@
+# export_models.py (Export the joblib models to XGBoost's version-independent UBJSON format)
+#
+# The .joblib pickles only load with the xgboost/scikit-learn versions they were
+# written with, and unpickling them is slow. This writes each model next to its
+# pickle as <name>.ubj, which scorer.py loads in preference to the pickle.
+#
+# Run from the repository root after (re)training:  python export_models.py
+
+import os
+
+import joblib
+
+MODELS_DIR = './saved_models'
+MODEL_STEMS = ['repayment_model_xgb', 'income_model_final']
+
+
+def export_model(stem, models_dir=MODELS_DIR):
+    """Converts <stem>.joblib into <stem>.ubj and returns the new path."""
+    model = joblib.load(os.path.join(models_dir, f'{stem}.joblib'))
+    path = os.path.join(models_dir, f'{stem}.ubj')
+    # The sklearn wrapper's save_model also stores its own metadata (classes, objective),
+    # so XGBClassifier/XGBRegressor.load_model restores a fully working wrapper.
+    model.save_model(path)
+    return path
+
+
+def main():
+    for stem in MODEL_STEMS:
+        try:
+            path = export_model(stem)
+        except FileNotFoundError as e:
+            print(f"Skipping {stem}: {e}")
+            continue
+        joblib_size = os.path.getsize(os.path.join(MODELS_DIR, f'{stem}.joblib'))
+        print(f"Exported {path} ({os.path.getsize(path) / 1e6:.2f} MB, joblib was {joblib_size / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+# hces_pipeline.py (HCES 2023-24 data assembly: SPSS levels -> master_dataset.parquet)
+#
+# The importable version of 01_Data_Assembly.ipynb. It produces the same
+# master_dataset.parquet, but the item-level expenditure files are read in row slices
+# across worker processes, and each slice is filtered to the fuel/communication items
+# and summed per household where it is read, with no temporary CSV files.
+#
+# The household levels, Level 15, the person aggregates and the expenditure sums are
+# separate stages, each checkpointed to Parquet under a key made of its input files'
+# fingerprints and its own code, so a rebuild only recomputes the stages that changed.
+#
+# Run from the directory holding the HCES23-24 folder:
+#   python hces_pipeline.py HCES23-24 master_dataset.parquet --workers 4
+
+import argparse
+import gc
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyreadstat
+
+# --- 1. SETUP ---
+DATA_FOLDER = 'HCES23-24'
+MERGE_KEYS = ['FSU_Serial_No', 'Panel', 'Sub_sample', 'Sample_Household_No']
+# The merge keys are packed into one int64 'household_id' (bits per key, most significant
+# first) that every merge and groupby uses; they are unpacked only for the final output.
+HOUSEHOLD_ID = 'household_id'
+KEY_BITS = {'FSU_Serial_No': 31, 'Panel': 10, 'Sub_sample': 10, 'Sample_Household_No': 12}
+
+HOUSEHOLD_FEATURE_FILES = [
+    'LEVEL - 01(Section 1 and 1.1).sav',
+    'LEVEL - 03.sav',
+    'LEVEL - 04 (Section 4.1).sav',
+    'LEVEL - 07 (Section 4.2).sav',
+    'LEVEL - 11 (Section 4.3).sav'
+]
+PERSON_LEVEL_FILE = 'LEVEL - 02 (Section 3).sav'
+LEVEL15_FILE = 'LEVEL - 15 (Section 1.1, A2,B2 & C2).sav'
+
+EXPENDITURE_FILES = [
+    'LEVEL - 05 ( Sec 5 & 6).sav',
+    'LEVEL - 06 (Section 7).sav',
+    'LEVEL - 08 (Section 8.1).sav',
+    'LEVEL - 09 (Section 9 & 10 & 11).sav',
+    'LEVEL - 10 (Section 12).sav',
+    'LEVEL - 12 (Section 13).sav'
+]
+
+FUEL_ITEM_CODES = [332, 338, 331, 334, 335, 341, 343, 337, 333, 344, 345, 340, 336, 342]
+COMM_ITEM_CODES = [488, 487, 496, 490]
+
+HEAD_OF_HOUSEHOLD_LABEL = 'self'
+
+ASSET_WEIGHTS = {
+    'Possess_Car': 5,
+    'Possess_Truck': 5,
+    'Possess_WashingMachine': 3,
+    'Possess_Laptop': 3,
+    'Possess_Refrigerator': 2,
+    'Possess_Television': 2,
+    'Possess_AirCooler': 1,
+    'Possess_Bicycle': 1,
+    'Possess_Scooter': 2
+}
+
+SCHEME_COLS = [
+    'Benefitted_From_PMGKY',
+    'Ayushman_beneficiary',
+    'LPG_subsidized_cylinders',
+    'LPG_subsidy_received',
+    'Medical_benefit_received',
+    'Ration_Any_Item_Last_30_Days',
+]
+
+# --- 1a. COLUMN SCHEMA ---
+# The only columns read from each group of levels (besides MERGE_KEYS) and their dtypes.
+# Columns not listed here are never loaded. Categoricals list the levels Model B was
+# trained on; other values are read as missing, with a warning.
+HOUSEHOLD_SCHEMA = {
+    'Sector': pd.CategoricalDtype(['rural', 'urban']),
+    'Social_Group_of_HH_Head': pd.CategoricalDtype(['Not reported', 'other backward class', 'others',
+                                                    'scheduled caste', 'scheduled tribe']),
+    'Religion_of_HH_Head': pd.CategoricalDtype(['Buddhism', 'Christianity', 'Hinduism', 'Islam', 'Jainism',
+                                                'Not reported', 'Sikhism', 'Zoroastrianism', 'others']),
+    'Max_Income_Activity': pd.CategoricalDtype(['', 'casual labour', 'regular wage/salary earning', 'self-employment']),
+    'Type_of_Dwelling_Unit': pd.CategoricalDtype(['', 'hired', 'others', 'owned']),
+    'Land_Ownership': pd.CategoricalDtype(['No', 'yes']),
+    'Ration_Card_Type': pd.CategoricalDtype(['Above Poverty Line (APL)', 'Antyodaya Anna Yojana (AAY)',
+                                             'Below Poverty Line (BPL)', 'No ration card', 'Others',
+                                             'Priority House Holds (PHH)', 'State Food Security Scheme (SFSS)']),
+    **{col: 'float32' for col in ASSET_WEIGHTS},
+    **{col: 'float32' for col in SCHEME_COLS},
+}
+LEVEL15_SCHEMA = {'MONTHLY_CONSUMPTION_EXP': 'float64', 'HOUSEHOLD_SIZE': 'float64'}
+PERSON_SCHEMA = {
+    'Relation_to_Head': 'category',
+    'Age': 'float32',
+    'Years_of_Education': 'float32',
+    'Used_Internet_Last_30_Days': 'float32',
+}
+
+# Rows of an expenditure file read (and aggregated) per task
+CHUNK_ROWS = 1_000_000
+
+# Where stage checkpoints are kept by the command line build
+CHECKPOINT_DIR = '.hces_checkpoints'
+
+
+def pack_household_ids(df):
+    """Packs the four merge keys of each row into one int64 household id.
+
+    Keys are read the way the notebook normalised them (numeric, truncated to int,
+    missing -> -1) and stored +1, so -1 packs to 0.
+    """
+    ids = np.zeros(len(df), dtype=np.int64)
+    for key, bits in KEY_BITS.items():
+        values = pd.to_numeric(df[key], errors='coerce').fillna(-1).to_numpy().astype(np.int64) + 1
+        if len(values) and (values.min() < 0 or values.max() >= 1 << bits):
+            raise ValueError(f"{key} values must lie in [-1, {(1 << bits) - 2}] to fit the household id.")
+        ids = (ids << bits) | values
+    return ids
+
+
+def unpack_household_ids(ids):
+    """The merge keys of each id, in the string form of the original output ("1001", not 1001.0)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    keys, shift = {}, 0
+    for key, bits in reversed(KEY_BITS.items()):
+        keys[key] = pd.Series((ids >> shift) & ((1 << bits) - 1), dtype=np.int64).sub(1).astype(str)
+        shift += bits
+    return pd.DataFrame({key: keys[key] for key in MERGE_KEYS})
+
+
+def with_household_id(df, keep_keys=False):
+    """Adds the packed household id, dropping the merge key columns unless keep_keys."""
+    df[HOUSEHOLD_ID] = pack_household_ids(df)
+    return df if keep_keys else df.drop(columns=MERGE_KEYS)
+
+
+def read_level(data_folder, file_name, schema):
+    """Reads the merge keys and the schema's columns of one level, typed as the schema says.
+
+    Value labels are applied as pd.read_spss did; numeric columns are then coerced with
+    pd.to_numeric (so a labelled 'yes' becomes NaN, as before) and cast.
+    """
+    path = os.path.join(data_folder, file_name)
+    _, meta = pyreadstat.read_sav(path, metadataonly=True)
+    usecols = [col for col in meta.column_names if col in MERGE_KEYS or col in schema]
+    df, _ = pyreadstat.read_sav(path, usecols=usecols, apply_value_formats=True, formats_as_category=True)
+
+    for col in df.columns:
+        dtype = schema.get(col)
+        if isinstance(dtype, pd.CategoricalDtype):
+            unknown = df[col].notna() & ~df[col].isin(dtype.categories)
+            if unknown.any():
+                print(f"WARNING: {file_name}: {int(unknown.sum())} '{col}' values outside the schema are read as missing: "
+                      f"{sorted(df.loc[unknown, col].astype(str).unique())[:5]}")
+            df[col] = df[col].astype(object).astype(dtype)
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+        elif dtype is not None:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+    return df
+
+
+# --- 2. CORE HOUSEHOLD DATA ---
+def household_features(data_folder=DATA_FOLDER):
+    """Levels 01, 03, 04, 07 and 11, one row per household (in Level 01's order).
+
+    Level 01's own merge key columns are kept where they are, next to the household id,
+    so the final output can put the unpacked keys back in place.
+    """
+    base_df = with_household_id(read_level(data_folder, HOUSEHOLD_FEATURE_FILES[0], HOUSEHOLD_SCHEMA), keep_keys=True)
+    base_df = base_df.drop_duplicates(subset=HOUSEHOLD_ID)
+
+    for file_name in HOUSEHOLD_FEATURE_FILES[1:]:
+        df_to_merge = with_household_id(read_level(data_folder, file_name, HOUSEHOLD_SCHEMA))
+        df_to_merge = df_to_merge.drop_duplicates(subset=HOUSEHOLD_ID)
+
+        new_cols = df_to_merge.columns.difference(base_df.columns)
+        base_df = pd.merge(base_df, df_to_merge[[HOUSEHOLD_ID] + new_cols.tolist()], on=HOUSEHOLD_ID, how='left')
+        del df_to_merge; gc.collect()
+    return base_df
+
+
+def level15_summary(data_folder=DATA_FOLDER):
+    """MONTHLY_CONSUMPTION_EXP and HOUSEHOLD_SIZE per household; MAX picks the real value over NaNs."""
+    df_l15 = with_household_id(read_level(data_folder, LEVEL15_FILE, LEVEL15_SCHEMA))
+    return df_l15.groupby(HOUSEHOLD_ID)[['MONTHLY_CONSUMPTION_EXP', 'HOUSEHOLD_SIZE']].max().reset_index()
+
+
+# --- 3. PERSON-LEVEL DATA ---
+def person_aggregates(data_folder=DATA_FOLDER):
+    """Household size, head's age, adults' mean education and internet users from Level 02."""
+    person_df = read_level(data_folder, PERSON_LEVEL_FILE, PERSON_SCHEMA)
+    person_df['Used_Internet_Last_30_Days'] = person_df['Used_Internet_Last_30_Days'].replace(2, 0)
+    person_df = with_household_id(person_df)
+
+    household_size = person_df.groupby(HOUSEHOLD_ID).size().rename('household_size_calculated')
+    head_age = person_df[person_df['Relation_to_Head'] == HEAD_OF_HOUSEHOLD_LABEL].groupby(HOUSEHOLD_ID)['Age'].first().rename('head_of_household_age')
+    adults_df = person_df[person_df['Age'] >= 18]
+    avg_edu_adults = adults_df.groupby(HOUSEHOLD_ID)['Years_of_Education'].mean().rename('avg_education_years_adults')
+    num_internet_users = person_df.groupby(HOUSEHOLD_ID)['Used_Internet_Last_30_Days'].sum().rename('num_internet_users')
+
+    return pd.concat([household_size, head_age, avg_edu_adults, num_internet_users], axis=1).reset_index()
+
+
+# --- 4. ITEM-LEVEL EXPENDITURE ---
+EXPENDITURE_COLUMNS = ['fuel_expenditure', 'comm_expenditure']
+
+
+def find_column_names(columns):
+    item_col, value_col = None, None
+    for col in columns:
+        if 'item_code' in col.lower(): item_col = col
+        if 'value' in col.lower(): value_col = col
+    return item_col, value_col
+
+
+def expenditure_partial_sums(chunk):
+    """Fuel and communication spending per household in one slice of an expenditure file.
+
+    chunk has the merge keys plus 'item_code' and 'value' columns; only the rows for
+    FUEL_ITEM_CODES/COMM_ITEM_CODES are kept, so the result is small whatever the slice size.
+    """
+    is_fuel = chunk['item_code'].isin(FUEL_ITEM_CODES)
+    is_comm = chunk['item_code'].isin(COMM_ITEM_CODES)
+    keep = is_fuel | is_comm
+    chunk = chunk[keep]
+
+    value = chunk['value']
+    partial = pd.DataFrame({HOUSEHOLD_ID: pack_household_ids(chunk),
+                            'fuel_expenditure': value.where(is_fuel[keep]),
+                            'comm_expenditure': value.where(is_comm[keep])})
+    return partial.groupby(HOUSEHOLD_ID)[EXPENDITURE_COLUMNS].sum()
+
+
+def _expenditure_slice(file_path, item_col, value_col, offset, limit):
+    """Reads rows [offset, offset + limit) of one file, only the columns that are needed."""
+    chunk, _ = pyreadstat.read_sav(file_path, usecols=MERGE_KEYS + [item_col, value_col],
+                                   row_offset=offset, row_limit=limit)
+    chunk = chunk.rename(columns={item_col: 'item_code', value_col: 'value'})
+    return expenditure_partial_sums(chunk)
+
+
+def _expenditure_tasks(data_folder, chunk_rows):
+    """(file_path, item_col, value_col, offset, limit) for every slice of every expenditure file."""
+    for file_name in EXPENDITURE_FILES:
+        file_path = os.path.join(data_folder, file_name)
+        _, meta = pyreadstat.read_sav(file_path, metadataonly=True)
+        item_col, value_col = find_column_names(meta.column_names)
+        if not item_col or not value_col:
+            print(f"Skipping {file_name}: no item code/value columns.")
+            continue
+        for offset in range(0, meta.number_rows, chunk_rows):
+            yield file_path, item_col, value_col, offset, chunk_rows
+
+
+def expenditure_totals(data_folder=DATA_FOLDER, workers=1, chunk_rows=CHUNK_ROWS):
+    """fuel_expenditure and comm_expenditure per household over all expenditure levels.
+
+    With workers > 1 the row slices are read by a process pool; each worker sends back
+    only its per-household partial sums, which are then added up here.
+    """
+    tasks = list(_expenditure_tasks(data_folder, chunk_rows))
+    if workers <= 1:
+        partials = [_expenditure_slice(*task) for task in tasks]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            partials = list(pool.map(_expenditure_slice, *zip(*tasks))) if tasks else []
+
+    if not partials:
+        return pd.DataFrame({HOUSEHOLD_ID: np.array([], dtype=np.int64), **{col: [] for col in EXPENDITURE_COLUMNS}})
+    return pd.concat(partials).groupby(level=0).sum().reset_index()
+
+
+# --- 5. FEATURE ENGINEERING AND TARGET ---
+def engineer_features(base_df):
+    """Asset_Score_X1 (weighted possessions) and Scheme_Index_X2 (sum of benefit flags)."""
+    asset_cols_to_use = base_df.columns.intersection(ASSET_WEIGHTS.keys()).tolist()
+    for col in asset_cols_to_use:
+        base_df[col] = pd.to_numeric(base_df[col], errors='coerce').fillna(0)
+
+    base_df['Asset_Score_X1'] = 0
+    for col in asset_cols_to_use:
+        base_df['Asset_Score_X1'] += base_df[col] * ASSET_WEIGHTS[col]
+
+    scheme_cols_to_use = base_df.columns.intersection(SCHEME_COLS).tolist()
+    for col in scheme_cols_to_use:
+        base_df[col] = pd.to_numeric(base_df[col], errors='coerce').fillna(0)
+    base_df['Scheme_Index_X2'] = base_df[scheme_cols_to_use].sum(axis=1)
+    return base_df
+
+
+def add_target(base_df):
+    """MPCE = MONTHLY_CONSUMPTION_EXP / household size; households without a valid MPCE are dropped."""
+    size_col = 'household_size_calculated' if 'household_size_calculated' in base_df.columns else 'HOUSEHOLD_SIZE'
+    base_df['MPCE'] = base_df['MONTHLY_CONSUMPTION_EXP'] / base_df[size_col]
+    base_df['MPCE'] = base_df['MPCE'].replace([np.inf, -np.inf], np.nan)
+    return base_df.dropna(subset=['MONTHLY_CONSUMPTION_EXP', 'MPCE'])
+
+
+# --- 6. STAGED BUILD ---
+# Each stage reads its own level files and returns one row per household_id. Its
+# checkpoint key covers the input files (name, size, mtime), the source of every
+# function it runs and the module settings it reads, so e.g. adding an item code to
+# FUEL_ITEM_CODES only recomputes 'expenditure'.
+STAGES = {
+    'households': {
+        'run': lambda data_folder, workers, chunk_rows: household_features(data_folder),
+        'inputs': HOUSEHOLD_FEATURE_FILES,
+        'code': [household_features, read_level, with_household_id, pack_household_ids],
+        'settings': ['KEY_BITS', 'HOUSEHOLD_SCHEMA'],
+    },
+    'level15': {
+        'run': lambda data_folder, workers, chunk_rows: level15_summary(data_folder),
+        'inputs': [LEVEL15_FILE],
+        'code': [level15_summary, read_level, with_household_id, pack_household_ids],
+        'settings': ['KEY_BITS', 'LEVEL15_SCHEMA'],
+    },
+    'persons': {
+        'run': lambda data_folder, workers, chunk_rows: person_aggregates(data_folder),
+        'inputs': [PERSON_LEVEL_FILE],
+        'code': [person_aggregates, read_level, with_household_id, pack_household_ids],
+        'settings': ['KEY_BITS', 'HEAD_OF_HOUSEHOLD_LABEL', 'PERSON_SCHEMA'],
+    },
+    'expenditure': {
+        'run': expenditure_totals,
+        'inputs': EXPENDITURE_FILES,
+        'code': [expenditure_totals, _expenditure_tasks, _expenditure_slice, expenditure_partial_sums,
+                 find_column_names, pack_household_ids],
+        'settings': ['KEY_BITS', 'FUEL_ITEM_CODES', 'COMM_ITEM_CODES', 'EXPENDITURE_COLUMNS'],
+    },
+}
+
+
+def file_fingerprint(path):
+    """Cheap stand-in for a content hash of a multi-GB .sav file: name, size and mtime."""
+    stat = os.stat(path)
+    return [os.path.basename(path), stat.st_size, stat.st_mtime_ns]
+
+
+def stage_key(name, data_folder):
+    stage = STAGES[name]
+    spec = {
+        'stage': name,
+        'inputs': [file_fingerprint(os.path.join(data_folder, file_name)) for file_name in stage['inputs']],
+        'code': [inspect.getsource(fn) for fn in stage['code']],
+        'settings': {setting: repr(globals()[setting]) for setting in stage['settings']},
+        'versions': [pd.__version__, pyreadstat.__version__],
+    }
+    return hashlib.blake2b(json.dumps(spec).encode(), digest_size=16).hexdigest()
+
+
+def run_stage(name, data_folder=DATA_FOLDER, checkpoint_dir=None, workers=1, chunk_rows=CHUNK_ROWS):
+    """Returns (stage output, True if it came from a checkpoint)."""
+    if checkpoint_dir is None:
+        return STAGES[name]['run'](data_folder, workers, chunk_rows), False
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    checkpoint = os.path.join(checkpoint_dir, f"{name}-{stage_key(name, data_folder)}.parquet")
+    if os.path.exists(checkpoint):
+        return pd.read_parquet(checkpoint), True
+
+    df = STAGES[name]['run'](data_folder, workers, chunk_rows)
+    df.to_parquet(checkpoint + '.tmp', index=False)
+    os.replace(checkpoint + '.tmp', checkpoint)
+    # Older checkpoints of this stage can never be hit again
+    for file_name in os.listdir(checkpoint_dir):
+        if file_name.startswith(name + '-') and os.path.join(checkpoint_dir, file_name) != checkpoint:
+            os.remove(os.path.join(checkpoint_dir, file_name))
+    return df, False
+
+
+def build_master_dataset(data_folder=DATA_FOLDER, output_path=None, workers=1, chunk_rows=CHUNK_ROWS,
+                         checkpoint_dir=None, verbose=False):
+    """Runs the whole assembly and returns master_dataset (also written to output_path if given).
+
+    With checkpoint_dir, stages whose inputs and code are unchanged are loaded from there.
+    """
+    stages = {}
+    for name in STAGES:
+        start = time.perf_counter()
+        stages[name], cached = run_stage(name, data_folder, checkpoint_dir, workers, chunk_rows)
+        if verbose: print(f"{name:<12} {'checkpoint' if cached else 'computed':<10} {time.perf_counter() - start:7.1f} s")
+
+    base_df = stages['households']
+    for name in ['level15', 'persons', 'expenditure']:
+        base_df = pd.merge(base_df, stages[name], on=HOUSEHOLD_ID, how='left')
+    for col in EXPENDITURE_COLUMNS:
+        base_df[col] = base_df[col].fillna(0)
+
+    # Only the output carries the merge keys again, in their original columns
+    base_df[MERGE_KEYS] = unpack_household_ids(base_df[HOUSEHOLD_ID])
+    base_df = base_df.drop(columns=HOUSEHOLD_ID)
+
+    base_df = add_target(engineer_features(base_df))
+    if output_path:
+        base_df.to_parquet(output_path, index=False)
+    return base_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assemble master_dataset.parquet from the HCES 2023-24 SPSS files.")
+    parser.add_argument("data_folder", nargs="?", default=DATA_FOLDER, help="folder holding the LEVEL - XX .sav files")
+    parser.add_argument("output", nargs="?", default="master_dataset.parquet", help="Parquet file to write")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes reading the expenditure levels")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="expenditure rows read per task")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="where stage checkpoints are kept")
+    parser.add_argument("--no-checkpoints", action="store_true", help="recompute every stage and keep no checkpoints")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    checkpoint_dir = None if args.no_checkpoints else args.checkpoint_dir
+    master = build_master_dataset(args.data_folder, args.output, args.workers, args.chunk_rows,
+                                  checkpoint_dir=checkpoint_dir, verbose=True)
+    print(f"Assembled {len(master):,} households x {master.shape[1]} columns in "
+          f"{time.perf_counter() - start:.1f} s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
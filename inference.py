@@ -0,0 +1,49 @@
+# inference.py (Native XGBoost Booster inference for the scoring hot path)
+
+import numpy as np
+import xgboost as xgb
+
+
+class BoosterEngine:
+    """Serves an XGBoost sklearn model straight from its underlying Booster.
+
+    The sklearn wrapper validates feature names and builds a DMatrix on every
+    predict call. This extracts the Booster once and calls inplace_predict on
+    C-contiguous float32 arrays instead. inplace_predict is thread-safe, so one
+    engine can be shared by all request threads.
+
+    predict() returns what the wrapper's predict() returns for a regressor, and
+    P(class 1) for a binary:logistic classifier (i.e. predict_proba(X)[:, 1]).
+    """
+
+    def __init__(self, model, nthread=None):
+        if getattr(model, "n_classes_", 2) > 2:
+            raise ValueError("BoosterEngine only supports regressors and binary classifiers.")
+
+        self.booster = model.get_booster()
+        self.missing = model.missing
+        self.n_features = self.booster.num_features()
+
+        # Same tree range the wrapper would use (best_iteration after early stopping)
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+        if nthread:
+            self.set_nthread(nthread)
+
+    def set_nthread(self, nthread: int):
+        """Caps the threads XGBoost uses per predict call (1 is best with many uvicorn workers)."""
+        self.booster.set_param({"nthread": int(nthread)})
+
+    def predict(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        return self.booster.inplace_predict(x, iteration_range=self.iteration_range,
+                                            missing=self.missing, validate_features=False)
+
+    def contributions(self, x):
+        """Per-feature SHAP contributions (pred_contribs); the last column is the bias term."""
+        dmatrix = xgb.DMatrix(np.ascontiguousarray(x, dtype=np.float32), missing=self.missing)
+        return self.booster.predict(dmatrix, pred_contribs=True, iteration_range=self.iteration_range,
+                                    validate_features=False)
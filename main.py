@@ -1,16 +1,49 @@
 # main.py (Final Corrected Version for Deployment)
 
-from fastapi import FastAPI
-from pydantic import BaseModel, Field
-from typing import Optional
+import asyncio
+import time
+from contextlib import asynccontextmanager
 
-from scorer import calculate_composite_score, get_shap_explanations
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from batcher import MICROBATCH_ENABLED, MicroBatcher
+import columnar
+import metrics
+from executor import QueueFullError, ScoringExecutor
+from portfolio import HISTOGRAM_BINS, PortfolioStore
+from scorer import (SCORE_FIELDS, calculate_column_scores, calculate_composite_score, calculate_composite_scores,
+                    drift_monitor, get_cache_stats, get_shap_explanations, get_shap_explanations_batch, registry,
+                    simulate_grid, warm_up)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the models before the worker takes traffic (SHAP explainers stay lazy by default)
+    warm_up()
+    # CPU-bound scoring runs on dedicated, bounded lanes instead of the event loop / default threadpool
+    app.state.executor = ScoringExecutor()
+    # Concurrent single /score calls are coalesced into one vectorized call on the score lane
+    app.state.batcher = None
+    if MICROBATCH_ENABLED:
+        app.state.batcher = MicroBatcher(score_microbatch if metrics.METRICS_ENABLED else
+                                         lambda rows: app.state.executor.run("score", calculate_composite_scores, rows))
+        app.state.batcher.start()
+    yield
+    if app.state.batcher is not None: await app.state.batcher.stop()
+    app.state.executor.shutdown()
 
 app = FastAPI(
     title="SIH Beneficiary Credit Scoring API",
     description="An API that uses two ML models to predict a composite credit score and provide explanations.",
-    version="FINAL"
+    version="FINAL",
+    lifespan=lifespan
 )
+app.add_middleware(metrics.MetricsMiddleware)
 
 # --- Define the EXACT INPUTS the API expects from the user ---
 class ApplicantData(BaseModel):
@@ -59,15 +92,250 @@ class ApplicantData(BaseModel):
     Asset_Score_X1: float = Field(..., example=7.0, description="Composite score based on possessions (0-24)")
     Scheme_Index_X2: float = Field(..., example=2.15, description="Composite score for reliance on social schemes (0-5)")
 
+# --- What-if sweeps for POST /simulate ---
+class SweepRange(BaseModel):
+    start: Optional[float] = Field(None, example=200000)
+    stop: Optional[float] = Field(None, example=1000000)
+    steps: int = Field(10, ge=1, le=1000, description="Evenly spaced points from start to stop (inclusive)")
+    values: Optional[List[float]] = Field(None, description="Explicit points to use instead of start/stop/steps")
+
+    def points(self):
+        if self.values is not None: return self.values
+        if self.start is None or self.stop is None: return []
+        return np.linspace(self.start, self.stop, self.steps).tolist()
+
+class SimulationRequest(BaseModel):
+    applicant: ApplicantData
+    ranges: Dict[str, SweepRange] = Field(..., example={"Income": {"start": 200000, "stop": 1000000, "steps": 9},
+                                                        "DTIRatio": {"values": [0.1, 0.3, 0.5, 0.7]}},
+                                          description="Numeric field -> the values to sweep it over")
+
+
+# --- Portfolio aggregates and policy what-ifs (see portfolio.py) ---
+portfolio_store = PortfolioStore()
+
+class PortfolioPolicy(BaseModel):
+    weights: Optional[List[float]] = Field(None, min_length=2, max_length=2, example=[0.5, 0.5],
+                                           description="Composite score weights (repayment, income); default [0.6, 0.4]")
+    low_risk_threshold: Optional[float] = Field(None, ge=0, le=1, example=0.6,
+                                                description="Low Risk above this repayment score; default 0.65")
+    high_need_threshold: Optional[float] = Field(None, ge=0, le=1,
+                                                 description="High Need at or below this income score; default 0.5")
+    min_composite_score: Optional[float] = Field(None, ge=0, description="Approve Low Risk applicants only at or above this")
+
+class PortfolioQuery(BaseModel):
+    policy: PortfolioPolicy = Field(default_factory=PortfolioPolicy)
+    group_by: Optional[str] = Field(None, example="Sector", description="Sector, Social_Group_of_HH_Head or batch")
+    batches: Optional[List[str]] = Field(None, description="Only these batch IDs (default: every stored batch)")
+    bins: int = Field(HISTOGRAM_BINS, ge=1, le=1000, description="Composite score histogram bins")
+
+
+async def run_on_lane(request: Request, lane: str, fn, *args):
+    """Runs scoring work on an executor lane, mapping backpressure to 429 and timeouts to 504."""
+    timings = validated(request)
+    if timings is None: return await guarded(lane, app.state.executor.run(lane, fn, *args))
+    outcome = await guarded(lane, app.state.executor.run(lane, metrics.timed_call, time.perf_counter(), fn, *args))
+    return with_timings(request, timings, outcome)
+
+async def score_microbatch(rows):
+    """The micro-batcher's run_batch when metrics are on: every row gets the batch's stage timings."""
+    results, timings = await app.state.executor.run("score", metrics.timed_call, time.perf_counter(),
+                                                    calculate_composite_scores, rows)
+    if isinstance(results, dict): results = [results] * len(rows)
+    return [(result, timings) for result in results]
+
+def validated(request: Request):
+    """Records the time from the request arriving to the handler starting (body parsing and
+    Pydantic validation) as the "validate" stage; None when metrics are off."""
+    start = getattr(request.state, "request_start", None)
+    if start is None: return None
+    seconds = time.perf_counter() - start
+    metrics.record("validate", seconds)
+    return {"validate": seconds}
+
+def with_timings(request: Request, timings: dict, outcome):
+    """Unpacks a metrics.timed_call() outcome, keeping its stage timings for Server-Timing."""
+    result, stage_timings = outcome
+    request.state.timings = dict(timings, **stage_timings)
+    return result
+
+async def guarded(lane: str, work):
+    try:
+        return await work
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"The {lane} request timed out.")
+
 
 @app.get("/")
 def read_root():
     return {"status": "ok", "message": "Welcome to the Credit Scoring API!"}
 
 @app.post("/score")
-def get_score(data: ApplicantData):
-    return calculate_composite_score(data.dict())
+async def get_score(data: ApplicantData, request: Request):
+    if app.state.batcher is not None:
+        timings = validated(request)
+        outcome = await guarded("score", app.state.batcher.submit(data.dict()))
+        return outcome if timings is None else with_timings(request, timings, outcome)
+    return await run_on_lane(request, "score", calculate_composite_score, data.dict())
+
+# POST /score/batch takes a JSON array of ApplicantData, or the same fields as columns in
+# Arrow IPC or msgpack (see columnar.py), and answers in the format the Accept header asks for.
+APPLICANT_LIST = TypeAdapter(List[ApplicantData])
+BINARY_BODY = {"schema": {"type": "string", "format": "binary"}}
+BATCH_OPENAPI = {"requestBody": {"required": True, "content": {
+    columnar.JSON: {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/ApplicantData"}}},
+    columnar.ARROW_STREAM: BINARY_BODY, columnar.MSGPACK: BINARY_BODY}}}
+
+def batch_format(request: Request):
+    request_format = columnar.media_format(request.headers.get("content-type"))
+    if request_format is None:
+        raise HTTPException(status_code=415, detail=f"Send {', '.join(columnar.MEDIA_TYPES)}.")
+    return request_format
+
+def applicants_from_json(body: bytes):
+    try:
+        return APPLICANT_LIST.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([dict(error, loc=("body", *error["loc"])) for error in e.errors(include_url=False)])
+
+def applicant_columns(request_format: str, body: bytes):
+    """Validated {field: array} columns and the row count of a batch body in any wire format."""
+    if request_format == "json":
+        rows = [applicant.dict() for applicant in applicants_from_json(body)]
+        return columnar.rows_to_columns(rows, list(ApplicantData.model_fields)), len(rows)
+    try:
+        columns, n_rows, errors = columnar.validate_columns(columnar.decode(request_format, body),
+                                                            ApplicantData.model_fields)
+    except columnar.UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if errors: raise RequestValidationError(errors)
+    return columns, n_rows
+
+@app.post("/score/batch", openapi_extra=BATCH_OPENAPI)
+async def get_batch_score(request: Request):
+    request_format = batch_format(request)
+    response_format = columnar.accepted_format(request.headers.get("accept"), request_format)
+    body = await request.body()
+
+    if request_format == "json":
+        data = applicants_from_json(body)
+        results = await run_on_lane(request, "batch", calculate_composite_scores, [applicant.dict() for applicant in data])
+        if response_format == "json" or isinstance(results, dict): return results
+        model_version = {"model_version": results[0]["model_version"]} if results else {}
+        return Response(columnar.encode(response_format, columnar.rows_to_columns(results, SCORE_FIELDS), model_version),
+                        media_type=columnar.RESPONSE_MEDIA_TYPES[response_format])
+
+    columns, n_rows = applicant_columns(request_format, body)
+    scores = await run_on_lane(request, "batch", calculate_column_scores, columns, n_rows)
+    if "error" in scores: return scores
+    model_version = {"model_version": scores.pop("model_version")}
+    if response_format == "json": return columnar.columns_to_rows(scores, model_version)
+    return Response(columnar.encode(response_format, scores, model_version),
+                    media_type=columnar.RESPONSE_MEDIA_TYPES[response_format])
+
+@app.post("/simulate")
+async def simulate(data: SimulationRequest, request: Request):
+    ranges = {field: sweep.points() for field, sweep in data.ranges.items()}
+    return await run_on_lane(request, "batch", simulate_grid, data.applicant.dict(), ranges)
+
+TOP_K_QUERY = Query(None, ge=1, description="Only return the k largest SHAP contributors per model")
 
 @app.post("/explain")
-def get_explanation(data: ApplicantData):
-    return get_shap_explanations(data.dict())
\ No newline at end of file
+async def get_explanation(data: ApplicantData, request: Request, top_k: Optional[int] = TOP_K_QUERY):
+    return await run_on_lane(request, "explain", get_shap_explanations, data.dict(), top_k)
+
+@app.post("/explain/batch")
+async def get_batch_explanation(data: List[ApplicantData], request: Request, top_k: Optional[int] = TOP_K_QUERY):
+    return await run_on_lane(request, "explain", get_shap_explanations_batch, [applicant.dict() for applicant in data], top_k)
+
+@app.get("/cache/stats")
+def cache_stats():
+    return get_cache_stats()
+
+@app.get("/executor/stats")
+def executor_stats():
+    stats = app.state.executor.stats()
+    if app.state.batcher is not None: stats["microbatch"] = app.state.batcher.stats()
+    return stats
+
+@app.get("/admin/models")
+def model_status():
+    return registry.status()
+
+@app.post("/admin/models/reload")
+async def reload_models():
+    # Loading and warming run in a worker thread; requests keep being served by the active set
+    return await asyncio.to_thread(registry.reload)
+
+@app.post("/portfolio/batches", openapi_extra=BATCH_OPENAPI)
+async def add_portfolio_batch(request: Request, name: Optional[str] = None):
+    """Scores a batch (any /score/batch body) and stores its raw scores for portfolio queries."""
+    columns, n_rows = applicant_columns(batch_format(request), await request.body())
+    if n_rows == 0: raise HTTPException(status_code=400, detail="The batch is empty.")
+    return await run_on_lane(request, "batch", portfolio_store.add_scored, columns, n_rows, name)
+
+@app.get("/portfolio/batches")
+def list_portfolio_batches():
+    return portfolio_store.batches()
+
+@app.delete("/portfolio/batches/{batch_id}")
+def remove_portfolio_batch(batch_id: str):
+    return portfolio_store.remove(batch_id)
+
+async def portfolio_query(request: Request, fn, *args):
+    try:
+        return await run_on_lane(request, "batch", fn, *args)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/portfolio/summary")
+async def portfolio_summary(request: Request, group_by: Optional[str] = None,
+                            bins: int = Query(HISTOGRAM_BINS, ge=1, le=1000)):
+    """Band counts, approval rates and a composite score histogram of every stored applicant,
+    under the serving policy, optionally per Sector, Social_Group_of_HH_Head or batch."""
+    return await portfolio_query(request, portfolio_store.summary, None, group_by, None, bins)
+
+@app.post("/portfolio/what-if")
+async def portfolio_what_if(query: PortfolioQuery, request: Request):
+    """Re-bands the stored scores under other weights and thresholds (no model is run) and
+    compares the result with the serving policy."""
+    return await portfolio_query(request, portfolio_store.what_if, query.policy.dict(), query.group_by,
+                                 query.batches, query.bins)
+
+@app.get("/monitor/drift")
+def drift_report():
+    """Distribution summaries and PSI against the training data's reference profile for every
+    input feature and score, over the applicants scored since startup, the last model swap or reset."""
+    return drift_monitor.report()
+
+@app.post("/monitor/drift/reset")
+def reset_drift():
+    drift_monitor.reset(registry.active.reference_profile if registry.active is not None else None)
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition: stage/request histograms and counters, plus cache and lane stats."""
+    caches = get_cache_stats()
+    lanes = app.state.executor.stats()
+    extra = metrics.scrape_lines("counter", "scoring_cache_hits_total", "Result cache hits.",
+                                 {(name,): stats["hits"] for name, stats in caches.items()}, labels=("cache",))
+    extra += metrics.scrape_lines("counter", "scoring_cache_misses_total", "Result cache misses.",
+                                  {(name,): stats["misses"] for name, stats in caches.items()}, labels=("cache",))
+    extra += metrics.scrape_lines("gauge", "scoring_lane_in_flight", "Requests queued or running per lane.",
+                                  {(name,): stats["in_flight"] for name, stats in lanes.items()}, labels=("lane",))
+    extra += metrics.scrape_lines("counter", "scoring_lane_rejected_total", "Requests rejected with 429 per lane.",
+                                  {(name,): stats["rejected"] for name, stats in lanes.items()}, labels=("lane",))
+    extra += metrics.scrape_lines("counter", "scoring_lane_timed_out_total", "Requests that timed out (504) per lane.",
+                                  {(name,): stats["timed_out"] for name, stats in lanes.items()}, labels=("lane",))
+    extra += metrics.scrape_lines("gauge", "scoring_drift_psi", "PSI of each input feature and score against the training data.",
+                                  {(name,): round(psi, 6) for name, psi in drift_monitor.psi_values().items()},
+                                  labels=("column",))
+    if registry.active is not None:
+        extra += metrics.scrape_lines("gauge", "scoring_model_info", "The active model version.",
+                                      {(registry.active.version,): 1}, labels=("version",))
+    return metrics.render(extra)
@@ -0,0 +1,219 @@
+# metrics.py (Low-overhead Prometheus-style metrics for the scoring path)
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# --- CONFIGURATION ---
+# METRICS_ENABLED=0 turns every timer and counter into a no-op.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+# SERVER_TIMING=1 adds a Server-Timing header (per-stage milliseconds) to every scoring response.
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING", "0") == "1"
+
+# Upper bounds in seconds; the scoring stages run from tens of microseconds to seconds (SHAP)
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(names, values):
+    if not names: return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def _sample(name, labels, value):
+    return f"{name}{{{labels}}} {value}" if labels else f"{name} {value}"
+
+
+class Counter:
+    """Monotonic counter with optional labels; inc() takes the label values as a tuple."""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def inc_many(self, amounts):
+        """Several increments under one lock acquisition; amounts maps label values to amounts."""
+        with self._lock:
+            for label_values, amount in amounts.items():
+                self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [_sample(self.name, _label_text(self.labels, values), count) for values, count in items]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with optional labels."""
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_values=()):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((values, (list(counts), total)) for values, (counts, total) in self._series.items())
+        for values, (counts, total) in items:
+            base = _label_text(self.labels, values)
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(_sample(f"{self.name}_sum", base, repr(total)))
+            lines.append(_sample(f"{self.name}_count", base, cumulative))
+        return lines
+
+
+def scrape_lines(kind, name, documentation, samples, labels=()):
+    """Exposition lines for values read at scrape time from existing stats (e.g. the caches');
+    samples maps label-value tuples to values."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    lines += [_sample(name, _label_text(labels, values), value) for values, value in samples.items()]
+    return lines
+
+
+# --- METRICS ---
+stage_seconds = Histogram("scoring_stage_seconds", "Time spent in each scoring stage.", labels=("stage",))
+request_seconds = Histogram("http_request_seconds", "End-to-end request latency.", labels=("route", "method"))
+requests_total = Counter("http_requests_total", "Requests served, by status code.", labels=("route", "method", "status"))
+errors_total = Counter("scoring_errors_total", "Scoring and explanation failures, by stage.", labels=("stage",))
+unseen_categories_total = Counter("scoring_unseen_categories_total",
+                                  "Categorical values that match no level seen in training.", labels=("feature",))
+
+REGISTRY = [stage_seconds, request_seconds, requests_total, errors_total, unseen_categories_total]
+
+
+def render(extra_lines=()):
+    """The Prometheus text exposition of every metric (plus any scrape_lines())."""
+    lines = [line for metric in REGISTRY for line in metric.render()]
+    return "\n".join(lines + list(extra_lines)) + "\n"
+
+
+# --- STAGE TIMERS ---
+# Durations of the stages that run on the current thread are also collected per request
+# (for Server-Timing) while a timed_call() is active on it.
+_local = threading.local()
+
+
+class stage:
+    """Times a block into scoring_stage_seconds{stage=name}:
+
+        with metrics.stage("encode"):
+            ...
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if METRICS_ENABLED: record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def record(name, seconds):
+    """Adds an already-measured stage duration."""
+    stage_seconds.observe(seconds, (name,))
+    timings = getattr(_local, "timings", None)
+    if timings is not None: timings[name] = timings.get(name, 0.0) + seconds
+
+
+def count_error(stage_name):
+    if METRICS_ENABLED: errors_total.inc((stage_name,))
+
+
+def count_unseen(counts):
+    """Adds {feature: number of unseen values} (FeatureEncoder.unseen_counts output)."""
+    if counts: unseen_categories_total.inc_many({(feature,): n for feature, n in counts.items()})
+
+
+def timed_call(submitted_at, fn, *args):
+    """Runs fn(*args) and returns (result, {stage: seconds}) for the stages it went through.
+
+    Meant to be the callable handed to a worker lane: the time between submitted_at
+    (a perf_counter() value) and the call starting is recorded as the "queue" stage.
+    """
+    _local.timings = timings = {}
+    try:
+        record("queue", time.perf_counter() - submitted_at)
+        return fn(*args), timings
+    finally:
+        _local.timings = None
+
+
+def server_timing(timings):
+    """Server-Timing header value, e.g. 'encode;dur=0.041, model_a;dur=0.212' (milliseconds)."""
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items())
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request and counting it by route and status.
+
+    It stamps scope["state"]["request_start"] so handlers can time request parsing and
+    validation, and when SERVER_TIMING is on it turns scope["state"]["timings"] (set by
+    the handler) into a Server-Timing response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+        state["request_start"] = start
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                timings = state.get("timings")
+                if SERVER_TIMING_ENABLED and timings:
+                    headers = list(message.get("headers", []))
+                    total = dict(timings, total=time.perf_counter() - start)
+                    headers.append((b"server-timing", server_timing(total).encode("latin-1")))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            # The route template ("/score"), not the raw path, keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (route, scope["method"])
+            request_seconds.observe(time.perf_counter() - start, labels)
+            requests_total.inc(labels + (str(status[0]),))
@@ -0,0 +1,298 @@
+# portfolio.py (Columnar store of scored batches, portfolio aggregates and policy what-ifs)
+#
+# Every stored batch is one Parquet file in PORTFOLIO_DIR. The file holds each applicant's
+# raw (unrounded) repayment and income scores, predicted MPCE and the group columns
+# (Sector, Social_Group_of_HH_Head), and its metadata holds the batch's name and model
+# version. Queries load the store once into NumPy arrays, with the group columns as
+# integer codes. They then answer band counts, composite score histograms and approval
+# rates, overall or per group, with a few bincounts. A what-if re-applies other weights and
+# thresholds (scorer.apply_policy) to the stored scores. No model is run, so a what-if over
+# a million applicants takes tens of milliseconds.
+#
+# Batches are added by POST /portfolio/batches, or from a CSV/Parquet file of applicants:
+#   python portfolio.py add applicants.parquet --name 2024-q3
+#   python portfolio.py summary --group-by Sector --low-risk-threshold 0.6 --weights 0.5 0.5
+
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from scorer import (COMPOSITE_WEIGHTS, HIGH_NEED_THRESHOLD, LOW_RISK_THRESHOLD, RISK_BANDS, apply_policy,
+                    registry, score_columns)
+
+# --- 0. CONFIGURATION ---
+# Directory the scored batches are kept in (created on the first write).
+PORTFOLIO_DIR = os.environ.get("PORTFOLIO_DIR", "portfolio")
+
+# Stored per applicant besides the group columns (float32, as the models return them, so
+# re-applying the serving policy reproduces the served bands exactly)
+SCORE_COLUMNS = ["repayment_score", "income_proxy_score", "predicted_mpce"]
+GROUP_COLUMNS = ["Sector", "Social_Group_of_HH_Head"]
+SCHEMA = pa.schema([(name, pa.float32()) for name in SCORE_COLUMNS] + [(name, pa.string()) for name in GROUP_COLUMNS])
+# Bands counted as approved: both "Low Risk" bands, i.e. band codes 0 and 1 (see scorer.RISK_BANDS)
+APPROVED_BANDS = RISK_BANDS[:2]
+HISTOGRAM_BINS = 20
+DEFAULT_POLICY = {"weights": list(COMPOSITE_WEIGHTS), "low_risk_threshold": LOW_RISK_THRESHOLD,
+                  "high_need_threshold": HIGH_NEED_THRESHOLD, "min_composite_score": None}
+
+
+def resolve_policy(policy: dict = None):
+    """The serving policy with the given keys (weights, low_risk_threshold, high_need_threshold,
+    min_composite_score) replaced; None values keep the default."""
+    resolved = dict(DEFAULT_POLICY)
+    resolved.update({key: value for key, value in (policy or {}).items() if value is not None})
+    resolved["weights"] = [float(w) for w in resolved["weights"]]
+    if len(resolved["weights"]) != 2 or min(resolved["weights"]) < 0 or sum(resolved["weights"]) <= 0:
+        raise ValueError("weights must be two non-negative numbers (repayment, income) that are not both 0.")
+    return resolved
+
+
+class Portfolio:
+    """The stored batches as NumPy arrays: scores, a code per group column and the batch code."""
+
+    def __init__(self, table: pa.Table, batches: list):
+        self.batches = batches
+        self.rows = table.num_rows
+        self.scores = {name: table.column(name).to_numpy().astype(np.float32, copy=False) for name in SCORE_COLUMNS}
+        # group -> (codes, levels); codes index levels
+        self.groups = {}
+        for name in GROUP_COLUMNS:
+            encoded = pc.dictionary_encode(table.column(name).combine_chunks().fill_null("(missing)"))
+            self.groups[name] = (encoded.indices.to_numpy().astype(np.int32), encoded.dictionary.to_pylist())
+        sizes = [batch["rows"] for batch in batches]
+        self.groups["batch"] = (np.repeat(np.arange(len(batches), dtype=np.int32), sizes),
+                                [batch["batch_id"] for batch in batches])
+
+    def select(self, batch_ids: list):
+        """Index of the rows in the given batches (None selects every row)."""
+        if batch_ids is None: return None
+        known = {batch["batch_id"]: i for i, batch in enumerate(self.batches)}
+        unknown = [batch_id for batch_id in batch_ids if batch_id not in known]
+        if unknown: raise ValueError(f"Unknown portfolio batches: {unknown}")
+        return np.flatnonzero(np.isin(self.groups["batch"][0], [known[batch_id] for batch_id in batch_ids]))
+
+    def evaluate(self, policy: dict, rows=None):
+        """Composite scores, band codes and the approved mask under a resolved policy."""
+        repayment, income = self.scores["repayment_score"], self.scores["income_proxy_score"]
+        if rows is not None: repayment, income = repayment[rows], income[rows]
+        composite, bands = apply_policy(repayment, income, policy["weights"], policy["low_risk_threshold"],
+                                        policy["high_need_threshold"])
+        approved = bands < len(APPROVED_BANDS)
+        if policy["min_composite_score"] is not None: approved &= composite >= policy["min_composite_score"]
+        return composite, bands, approved
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+def _band_counts(counts):
+    return {band: int(n) for band, n in zip(RISK_BANDS, counts)}
+
+def aggregate(composite, bands, approved, groups=None, bins: int = HISTOGRAM_BINS, top: float = 1.0):
+    """Band counts, approvals, mean composite score and a composite score histogram over
+    [0, top], overall and (with groups=(codes, levels)) per group."""
+    n = len(bands)
+    n_approved = int(np.count_nonzero(approved))
+    edges = np.linspace(0.0, top, bins + 1)
+    bin_index = (composite * (bins / top)).astype(np.int32)
+    np.clip(bin_index, 0, bins - 1, out=bin_index)
+    summary = {"rows": n, "bands": _band_counts(np.bincount(bands, minlength=len(RISK_BANDS))),
+               "approved": n_approved, "approval_rate": _rate(n_approved, n),
+               "mean_composite_score": round(float(composite.mean(dtype=np.float64)), 4) if n else None,
+               "histogram": {"edges": edges.round(4).tolist(), "counts": np.bincount(bin_index, minlength=bins).tolist()}}
+    if groups is None: return summary
+
+    codes, levels = groups
+    n_levels, n_bands = len(levels), len(RISK_BANDS)
+    sizes = np.bincount(codes, minlength=n_levels)
+    band_counts = np.bincount(codes * n_bands + bands, minlength=n_levels * n_bands).reshape(n_levels, n_bands)
+    approvals = np.bincount(codes[approved], minlength=n_levels)
+    composite_sums = np.bincount(codes, weights=composite, minlength=n_levels)
+    summary["groups"] = {
+        str(level): {"rows": int(sizes[i]), "bands": _band_counts(band_counts[i]), "approved": int(approvals[i]),
+                     "approval_rate": _rate(int(approvals[i]), int(sizes[i])),
+                     "mean_composite_score": round(float(composite_sums[i] / sizes[i]), 4) if sizes[i] else None}
+        for i, level in enumerate(levels) if sizes[i]}
+    return summary
+
+
+class PortfolioStore:
+    """Scored batches on disk and the aggregates over them. Thread-safe.
+
+    Batch files are written once (to a temporary name, then renamed) and never changed, so
+    the loaded Portfolio is reused until a batch is added or removed.
+    """
+
+    def __init__(self, directory: str = PORTFOLIO_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded = None  # (batch file names, Portfolio)
+
+    def _path(self, batch_id):
+        return os.path.join(self.directory, f"{batch_id}.parquet")
+
+    def _files(self):
+        try:
+            return sorted(name for name in os.listdir(self.directory) if name.endswith(".parquet"))
+        except FileNotFoundError:
+            return []
+
+    # --- Writing ---
+    def add(self, batches, name: str = None, model_version: str = None):
+        """Stores an iterable of (scores, columns) chunks as one batch: scores as returned by
+        scorer.score_columns, columns holding at least the GROUP_COLUMNS. Returns the batch info."""
+        os.makedirs(self.directory, exist_ok=True)
+        batch_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        info = {"batch_id": batch_id, "name": name or batch_id, "model_version": model_version,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "rows": 0}
+        path = self._path(batch_id)
+        temporary = os.path.join(self.directory, f".{batch_id}.tmp")
+        try:
+            with pq.ParquetWriter(temporary, SCHEMA) as writer:
+                for scores, columns in batches:
+                    arrays = [pa.array(np.asarray(scores[name], dtype=np.float32)) for name in SCORE_COLUMNS]
+                    arrays += [pa.array(np.asarray(columns[name]).astype(str)) for name in GROUP_COLUMNS]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=SCHEMA))
+                    info["rows"] += len(arrays[0])
+                writer.add_key_value_metadata({"portfolio": json.dumps(info)})
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary): os.remove(temporary)
+        return info
+
+    def add_scored(self, columns: dict, n_rows: int, name: str = None):
+        """Scores validated applicant columns (name -> array) with the active models and stores
+        them as one batch; returns its info, or an error dict."""
+        models = registry.active
+        if models is None: return {"error": "ML models are not loaded."}
+        try:
+            scores = score_columns(columns, n_rows, models)
+        except Exception as e:
+            return {"error": f"Model prediction failed. Details: {e}"}
+        return self.add([(scores, columns)], name, models.version)
+
+    def add_file(self, input_path: str, name: str = None, chunk_rows: int = 100_000):
+        """Scores a CSV or Parquet file of applicants chunk by chunk into one batch."""
+        import bulk_score
+        import scorer
+        models = registry.active
+        if models is None: raise RuntimeError("ML models are not loaded.")
+
+        def chunks():
+            for batch in bulk_score.read_batches(input_path, scorer, chunk_rows):
+                columns = {column: batch.column(column).to_numpy(zero_copy_only=False) for column in batch.schema.names}
+                yield score_columns(columns, batch.num_rows, models), columns
+        return self.add(chunks(), name or os.path.basename(input_path), models.version)
+
+    def remove(self, batch_id: str):
+        try:
+            os.remove(self._path(os.path.basename(batch_id)))
+        except FileNotFoundError:
+            return {"error": f"Unknown portfolio batch {batch_id!r}."}
+        return {"status": "ok"}
+
+    # --- Reading ---
+    def batches(self, files: list = None):
+        """Info of every stored batch, oldest first."""
+        return [json.loads(pq.read_metadata(os.path.join(self.directory, name)).metadata[b"portfolio"])
+                for name in (self._files() if files is None else files)]
+
+    def load(self):
+        """The store as a Portfolio, read again only when the batch files have changed."""
+        files = self._files()
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != files:
+                paths = [os.path.join(self.directory, name) for name in files]
+                table = pa.concat_tables([pq.read_table(path) for path in paths]) if paths else SCHEMA.empty_table()
+                self._loaded = (files, Portfolio(table, self.batches(files)))
+            return self._loaded[1]
+
+    # --- Queries ---
+    def _query(self, portfolio, policy, group_by, batch_ids, bins):
+        if group_by is not None and group_by not in portfolio.groups:
+            raise ValueError(f"Can't group by {group_by!r}; use one of {list(portfolio.groups)}.")
+        policy = resolve_policy(policy)
+        rows = portfolio.select(batch_ids)
+        composite, bands, approved = portfolio.evaluate(policy, rows)
+        groups = None
+        if group_by is not None:
+            codes, levels = portfolio.groups[group_by]
+            groups = (codes if rows is None else codes[rows], levels)
+        summary = aggregate(composite, bands, approved, groups, bins, top=sum(policy["weights"]))
+        summary = dict(summary, policy=policy, group_by=group_by,
+                       batches=batch_ids or [batch["batch_id"] for batch in portfolio.batches],
+                       model_versions=sorted({str(batch["model_version"]) for batch in portfolio.batches}))
+        return summary, bands
+
+    def summary(self, policy: dict = None, group_by: str = None, batch_ids: list = None,
+                bins: int = HISTOGRAM_BINS):
+        """Band counts, approval rates and a composite score histogram under a policy (the
+        serving one by default), for every stored applicant or the given batches, optionally
+        per group_by (a GROUP_COLUMNS name or "batch"). Raises ValueError on a bad group or batch."""
+        return self._query(self.load(), policy, group_by, batch_ids, bins)[0]
+
+    def what_if(self, policy: dict, group_by: str = None, batch_ids: list = None, bins: int = HISTOGRAM_BINS):
+        """summary() under the serving policy and under policy, plus how many applicants move
+        from each band to each other band and the change in the approval rate."""
+        portfolio = self.load()
+        baseline, baseline_bands = self._query(portfolio, None, group_by, batch_ids, bins)
+        scenario, scenario_bands = self._query(portfolio, policy, group_by, batch_ids, bins)
+        n_bands = len(RISK_BANDS)
+        moves = np.bincount(baseline_bands * n_bands + scenario_bands, minlength=n_bands * n_bands)
+        moves = moves.reshape(n_bands, n_bands)
+        moved = {RISK_BANDS[i]: {RISK_BANDS[j]: int(moves[i, j]) for j in range(n_bands) if i != j and moves[i, j]}
+                 for i in range(n_bands)}
+        change = None
+        if baseline["rows"]: change = round(scenario["approval_rate"] - baseline["approval_rate"], 4)
+        return {"baseline": baseline, "scenario": scenario,
+                "moved": {band: moves_to for band, moves_to in moved.items() if moves_to},
+                "approval_rate_change": change}
+
+def main():
+    parser = argparse.ArgumentParser(description="Store scored applicant batches and query portfolio aggregates.")
+    parser.add_argument("--dir", default=PORTFOLIO_DIR, help="portfolio directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="score a CSV or Parquet file of applicants into the portfolio")
+    add.add_argument("input")
+    add.add_argument("--name", help="batch name (default: the file name)")
+    add.add_argument("--chunk-rows", type=int, default=100_000)
+    commands.add_parser("list", help="list the stored batches")
+    remove = commands.add_parser("remove", help="delete a stored batch")
+    remove.add_argument("batch_id")
+    summary = commands.add_parser("summary", help="aggregates, or a what-if when a policy option is given")
+    summary.add_argument("--group-by", help=f"one of {GROUP_COLUMNS} or batch")
+    summary.add_argument("--batch", action="append", dest="batch_ids", help="only this batch (repeatable)")
+    summary.add_argument("--bins", type=int, default=HISTOGRAM_BINS)
+    summary.add_argument("--weights", type=float, nargs=2, metavar=("REPAYMENT", "INCOME"))
+    summary.add_argument("--low-risk-threshold", type=float)
+    summary.add_argument("--high-need-threshold", type=float)
+    summary.add_argument("--min-composite-score", type=float)
+    args = parser.parse_args()
+
+    store = PortfolioStore(args.dir)
+    if args.command == "add":
+        result = store.add_file(args.input, args.name, args.chunk_rows)
+    elif args.command == "list":
+        result = store.batches()
+    elif args.command == "remove":
+        result = store.remove(args.batch_id)
+    else:
+        policy = {"weights": args.weights, "low_risk_threshold": args.low_risk_threshold,
+                  "high_need_threshold": args.high_need_threshold, "min_composite_score": args.min_composite_score}
+        if any(value is not None for value in policy.values()):
+            result = store.what_if(policy, args.group_by, args.batch_ids, args.bins)
+        else:
+            result = store.summary(None, args.group_by, args.batch_ids, args.bins)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# registry.py (Versioned model registry with zero-downtime hot reload)
+
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+
+def artifact_version(paths, optional_paths=()):
+    """Short content hash of the artifact files a model set was loaded from, and of
+    those optional_paths that exist (so adding or removing one changes it too)."""
+    digest = hashlib.blake2b(digest_size=6)
+    for path in list(paths) + [path for path in optional_paths if os.path.exists(path)]:
+        digest.update(os.path.basename(path).encode() + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelSet:
+    """One loaded artifact set: both models, their feature lists, encoders and engines,
+    and the training data's reference profile for the drift monitor (if there is one).
+
+    A set never changes once built; a reload builds a new one. Its SHAP explainers and
+    backends are resolved lazily (see scorer.get_shap_backends), under its own lock,
+    so they always belong to the models they explain.
+    """
+
+    def __init__(self, version, models_dir, repayment_model, repayment_features, income_model, income_features,
+                 repayment_encoder, income_encoder, repayment_engine, income_engine, reference_profile=None):
+        self.version = version
+        self.models_dir = models_dir
+        self.repayment_model = repayment_model
+        self.repayment_features = repayment_features
+        self.income_model = income_model
+        self.income_features = income_features
+        self.repayment_encoder = repayment_encoder
+        self.income_encoder = income_encoder
+        self.repayment_engine = repayment_engine
+        self.income_engine = income_engine
+        self.reference_profile = reference_profile
+        self.repayment_explainer = self.income_explainer = None
+        self.shap_backends = self.shap_report = None
+        self.lock = threading.Lock()
+        self.loaded_at = time.time()
+
+    def info(self):
+        return {"version": self.version, "models_dir": self.models_dir,
+                "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.loaded_at)),
+                "repayment_features": len(self.repayment_features), "income_features": len(self.income_features),
+                "shap_backends": list(self.shap_backends) if self.shap_backends else None,
+                "shap_report": self.shap_report,
+                "reference_profile": self.reference_profile is not None}
+
+
+class ModelRegistry:
+    """Holds the active ModelSet and swaps in new ones without dropping requests.
+
+    Scoring code reads `registry.active` once per call and uses that set to the end,
+    so a swap (a single attribute assignment) never changes the models under an
+    in-flight request; the old set is freed when the last of them finishes.
+
+    loader(models_dir) builds a ModelSet, warm_up(model_set) primes it before it takes
+    traffic, and on_swap(old, new) runs right after a swap (e.g. to clear caches).
+    """
+
+    def __init__(self, loader, warm_up=None, on_swap=None, history_size=10):
+        self.loader = loader
+        self.warm_up = warm_up
+        self.on_swap = on_swap
+        self.active = None
+        self.history = deque(maxlen=history_size)
+        self.reloading = False
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+
+    def activate(self, model_set):
+        previous, self.active = self.active, model_set
+        self.history.append({"version": model_set.version, "activated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")})
+        if self.on_swap is not None: self.on_swap(previous, model_set)
+
+    def reload(self, models_dir=None):
+        """Loads, warms and activates a new model set; blocking, so run it off the event loop.
+
+        Returns the new set's info, or an error dict (the active set then stays in place).
+        Loading the same artifacts again keeps the active set.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return {"error": "A model reload is already in progress."}
+        self.reloading = True
+        try:
+            candidate = self.loader(models_dir)
+            if self.active is not None and candidate.version == self.active.version:
+                return dict(self.active.info(), changed=False)
+            if self.warm_up is not None: self.warm_up(candidate)
+            self.activate(candidate)
+            self.last_error = None
+            return dict(candidate.info(), changed=True)
+        except Exception as e:
+            self.last_error = f"Model reload failed. Details: {e}"
+            return {"error": self.last_error}
+        finally:
+            self.reloading = False
+            self._reload_lock.release()
+
+    def status(self):
+        return {"active": self.active.info() if self.active is not None else None,
+                "reloading": self.reloading, "last_error": self.last_error, "history": list(self.history)}
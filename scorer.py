@@ -1,25 +1,114 @@
 # scorer.py (Final Corrected Version)
 
+import os
+
 import joblib
-import pandas as pd
 import numpy as np
-import shap
+from xgboost import XGBClassifier, XGBRegressor
+
+from cache import ResultCache, feature_key
+from encoder import FeatureEncoder
+from explanations import (backends_agree, build_explanation, choose_backend, explainer_contributions,
+                          native_contributions, top_k_explanation)
+import metrics
+from drift import REFERENCE_PROFILE_FILE, DriftMonitor, load_reference_profile
+from inference import BoosterEngine
+from registry import ModelRegistry, ModelSet, artifact_version
+
+# --- 0. CONFIGURATION ---
+# Set ENABLE_SHAP_EXPLAINERS=0 on score-only workers: /explain is then disabled and
+# shap is never imported. Otherwise the SHAP backend is set up on the first /explain call.
+ENABLE_SHAP_EXPLAINERS = os.environ.get("ENABLE_SHAP_EXPLAINERS", "1") != "0"
+# Set PRELOAD_SHAP_EXPLAINERS=1 on /explain workers to do that during warm_up() instead.
+PRELOAD_SHAP_EXPLAINERS = os.environ.get("PRELOAD_SHAP_EXPLAINERS", "0") == "1"
+# Threads XGBoost may use per predict call; 0 keeps the models' own setting (all cores).
+XGB_NTHREAD = int(os.environ.get("XGB_NTHREAD", "0"))
+# Result caches in front of /score and /explain (entries; 0 disables) and their TTL in seconds.
+SCORE_CACHE_SIZE = int(os.environ.get("SCORE_CACHE_SIZE", "10000"))
+EXPLAIN_CACHE_SIZE = int(os.environ.get("EXPLAIN_CACHE_SIZE", "1000"))
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", "300"))
+# Where SHAP values come from: "native" (XGBoost pred_contribs, needs no explainer files),
+# "explainer" (the pickled TreeExplainers), "auto" (native wherever pred_contribs is available
+# and matches the explainer on a probe batch, else the explainer) or "timed" (per model, the
+# faster of the two in a startup timing run if both agree; opt-in, as the pick can differ
+# between workers and restarts).
+SHAP_BACKEND = os.environ.get("SHAP_BACKEND", "auto")
+# Largest what-if grid POST /simulate will score in one call (product of the sweep sizes).
+SIMULATE_MAX_POINTS = int(os.environ.get("SIMULATE_MAX_POINTS", "10000"))
 
 # --- 1. LOAD FINAL MODELS AND ARTIFACTS ---
-# ... (Keep existing loading block) ...
-try:
+# Only what /score needs is loaded at import; the SHAP explainers are loaded by load_explainers().
+# POST /admin/models/reload loads a new set from MODELS_DIR and swaps it in (see registry.py).
+MODELS_DIR = os.environ.get("MODELS_DIR", "./saved_models")
+
+def model_path(stem: str, models_dir: str = MODELS_DIR):
+    """<stem>.ubj (the version-independent export written by export_models.py) when it exists,
+    and the original <stem>.joblib pickle otherwise."""
+    ubj_path = os.path.join(models_dir, f'{stem}.ubj')
+    return ubj_path if os.path.exists(ubj_path) else os.path.join(models_dir, f'{stem}.joblib')
+
+def load_model(stem: str, model_class, models_dir: str = MODELS_DIR):
+    """Loads a model from model_path(stem)."""
+    path = model_path(stem, models_dir)
+    if path.endswith('.ubj'):
+        model = model_class()
+        model.load_model(path)
+        return model
+    return joblib.load(path)
+
+def load_model_set(models_dir: str = None):
+    """Loads both models and their feature lists from models_dir and compiles their
+    encoders and inference engines into a ModelSet, versioned by the artifacts' content."""
+    models_dir = models_dir or MODELS_DIR
+    paths = [model_path('repayment_model_xgb', models_dir),
+             os.path.join(models_dir, 'repayment_model_features.joblib'),
+             model_path('income_model_final', models_dir),
+             os.path.join(models_dir, 'income_model_final_features.joblib')]
+
     # Model A (Repayment) - trained on Loan_default data
-    repayment_model = joblib.load('./saved_models/repayment_model_xgb.joblib')
-    repayment_features = joblib.load('./saved_models/repayment_model_features.joblib')
-    repayment_explainer = joblib.load('./saved_models/repayment_model_explainer.joblib')
+    repayment_model = load_model('repayment_model_xgb', XGBClassifier, models_dir)
+    repayment_features = joblib.load(paths[1])
 
     # Model B (Income) - trained on socio-economic data
-    income_model = joblib.load('./saved_models/income_model_final.joblib')
-    income_features = joblib.load('./saved_models/income_model_final_features.joblib')
-    income_explainer = joblib.load('./saved_models/income_model_final_explainer.joblib')
-except FileNotFoundError as e:
-    print(f"FATAL ERROR: A required model file was not found: {e}")
-    repayment_model = income_model = None
+    income_model = load_model('income_model_final', XGBRegressor, models_dir)
+    income_features = joblib.load(paths[3])
+
+    # These replace the per-request pd.get_dummies/reindex with a lookup-table encoder,
+    # and the sklearn wrappers with native Booster.inplace_predict calls.
+    # Model B filled missing continuous values with 0, so its encoder does the same.
+    # A reload must also pick up retrained explainers and a new drift reference profile
+    optional_paths = [os.path.join(models_dir, 'repayment_model_explainer.joblib'),
+                      os.path.join(models_dir, 'income_model_final_explainer.joblib'),
+                      os.path.join(models_dir, REFERENCE_PROFILE_FILE)]
+    return ModelSet(artifact_version(paths, optional_paths), models_dir,
+                    repayment_model, repayment_features, income_model, income_features,
+                    repayment_encoder=FeatureEncoder(repayment_features, MODEL_A_CAT_FEATURES,
+                                                     baseline_levels=MODEL_A_BASELINE_LEVELS),
+                    income_encoder=FeatureEncoder(income_features, MODEL_B_CAT_FEATURES, fill_na=True),
+                    repayment_engine=BoosterEngine(repayment_model, nthread=XGB_NTHREAD),
+                    income_engine=BoosterEngine(income_model, nthread=XGB_NTHREAD),
+                    reference_profile=load_reference_profile(models_dir))
+
+def load_explainers(models: ModelSet = None):
+    """Loads both SHAP explainers of a model set (the active one by default) on first use
+    (unpickling them is what imports shap).
+
+    Returns True when the explainers are available.
+    """
+    models = models or registry.active
+    if not ENABLE_SHAP_EXPLAINERS or models is None: return False
+    if models.repayment_explainer is not None and models.income_explainer is not None: return True
+
+    with models.lock:
+        if models.repayment_explainer is None or models.income_explainer is None:
+            try:
+                explainer_a = joblib.load(os.path.join(models.models_dir, 'repayment_model_explainer.joblib'))
+                explainer_b = joblib.load(os.path.join(models.models_dir, 'income_model_final_explainer.joblib'))
+            except FileNotFoundError as e:
+                print(f"ERROR: A SHAP explainer file was not found: {e}")
+                return False
+            models.repayment_explainer, models.income_explainer = explainer_a, explainer_b
+    return True
 
 
 # --- 2. DEFINE CATEGORICAL FEATURES for BOTH Models ---
@@ -27,6 +116,11 @@ MODEL_A_CAT_FEATURES = [
     'Education', 'EmploymentType', 'MaritalStatus', 'HasMortgage',
     'HasDependents', 'LoanPurpose', 'HasCoSigner'
 ]
+# The first (sorted) level of each, which drop_first removed from Model A's training matrix
+MODEL_A_BASELINE_LEVELS = {
+    'Education': "Bachelor's", 'EmploymentType': 'Full-time', 'MaritalStatus': 'Divorced',
+    'HasMortgage': 'No', 'HasDependents': 'No', 'LoanPurpose': 'Auto', 'HasCoSigner': 'No'
+}
 
 MODEL_B_CAT_FEATURES = [
     'Sector', 'Social_Group_of_HH_Head', 'Max_Income_Activity', 
@@ -34,100 +128,396 @@ MODEL_B_CAT_FEATURES = [
     'Religion_of_HH_Head'
 ]
 
-# --- 3. MAIN SCORING AND EXPLAINING FUNCTIONS ---
-def get_prepared_data(user_data: dict):
-    """Helper function to run all data prep for both models."""
-    
-    # --- Prep for Model A ---
-    df_a_raw = pd.DataFrame([user_data])
-    # Use the specific Model A categorical list
-    df_a_encoded = pd.get_dummies(df_a_raw, columns=MODEL_A_CAT_FEATURES, dummy_na=False, drop_first=True)
-    
-    # Reindex to ensure all columns from training are present
-    df_a = df_a_encoded.reindex(columns=repayment_features, fill_value=0)
-    df_a.columns = ["".join (c if c.isalnum() else "_" for c in str(x)) for x in df_a.columns]
+# --- 3. RESULT CACHES ---
+# Keyed by the model version plus a hash of the encoded feature rows; a model swap clears them.
+score_cache = ResultCache(maxsize=SCORE_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
+explain_cache = ResultCache(maxsize=EXPLAIN_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
 
-    # --- Prep for Model B (FIXED) ---
-    df_b_raw = pd.DataFrame([user_data])
-    
-    # 1. One-Hot Encode the specific Model B categorical features
-    df_b_encoded = pd.get_dummies(df_b_raw, columns=MODEL_B_CAT_FEATURES, dummy_na=False, drop_first=True)
-    
-    # 2. Reindex to match the training columns EXACTLY and fill missing *dummies* with 0
-    df_b = df_b_encoded.reindex(columns=income_features, fill_value=0)
-    
-    # 3. Safety Fill for Continuous Features (Use 0 as a safe default for numeric inputs)
-    df_b = df_b.fillna(0) 
-    
-    return df_a, df_b
+def clear_caches():
+    """Invalidates every cached score and explanation (called after a model swap)."""
+    score_cache.clear()
+    explain_cache.clear()
+
+def get_cache_stats():
+    return {"score": score_cache.stats(), "explain": explain_cache.stats()}
+
+# --- 4. MAIN SCORING AND EXPLAINING FUNCTIONS ---
+# Each entry point reads registry.active once and uses that model set throughout, so a
+# reload never mixes versions within a request (or a batch).
+# Stages are timed into metrics.stage_seconds (see metrics.py and GET /metrics).
+def count_unseen_categories(rows: list, models: ModelSet):
+    if metrics.METRICS_ENABLED:
+        metrics.count_unseen(models.repayment_encoder.unseen_counts(rows))
+        metrics.count_unseen(models.income_encoder.unseen_counts(rows))
+
+def get_prepared_data(user_data: dict, models: ModelSet = None):
+    """Helper function to run all data prep for both models (one row each)."""
+    models = models or registry.active
+    with metrics.stage("encode"):
+        x_a = models.repayment_encoder.encode(user_data)
+        x_b = models.income_encoder.encode(user_data)
+        count_unseen_categories([user_data], models)
+    return x_a, x_b
+
+def get_prepared_batch(rows: list, models: ModelSet = None):
+    """Vectorized get_prepared_data for a list of applicants (one row per applicant)."""
+    models = models or registry.active
+    with metrics.stage("encode"):
+        x_a = models.repayment_encoder.encode_many(rows)
+        x_b = models.income_encoder.encode_many(rows)
+        count_unseen_categories(rows, models)
+    return x_a, x_b
+
+SCORE_FIELDS = ["repayment_score", "income_proxy_score", "predicted_mpce", "composite_score", "risk_band"]
+
+# Composite score weights (repayment, income) and the risk banding thresholds
+COMPOSITE_WEIGHTS = (0.6, 0.4)
+LOW_RISK_THRESHOLD = 0.65
+HIGH_NEED_THRESHOLD = 0.5
+# Risk bands by band code (see apply_policy)
+RISK_BANDS = ["Low Risk - High Need", "Low Risk - Low Need", "High Risk - High Need", "High Risk - Low Need"]
+RISK_BANDS_ARRAY = np.array(RISK_BANDS)
+
+def apply_policy(repayment_scores, income_scores, weights=COMPOSITE_WEIGHTS,
+                 low_risk_threshold=LOW_RISK_THRESHOLD, high_need_threshold=HIGH_NEED_THRESHOLD):
+    """Composite scores and risk band codes (indexes into RISK_BANDS) for arrays of repayment
+    and income scores; also used by portfolio.py to re-band stored scores under other policies."""
+    w1, w2 = weights
+    composite_scores = (w1 * repayment_scores) + (w2 * income_scores)
+
+    # Risk Banding Logic
+    # Low Risk (Good Repayment) = repayment_score > 0.7
+    # High Need (Low Income) = income_score <= 0.5 (below the center point)
+    low_risk = repayment_scores > low_risk_threshold
+    high_need = income_scores <= high_need_threshold
+    # "Low Risk - High Need" (code 0) is the ideal candidate!
+    band_codes = np.where(low_risk, 0, 2).astype(np.int8) + (~high_need)
+    return composite_scores, band_codes
+
+def score_arrays(repayment_scores, log_predictions):
+    """Turns raw Model A / Model B outputs (arrays, one entry per applicant) into arrays of
+    income scores, predicted MPCE, composite scores and risk bands."""
+    predicted_values = np.expm1(log_predictions) # This is the predicted MPCE in Rupees
+
+    # Normalize income score using a sigmoid function
+    # Center point is the mean MPCE (~3588 from your data analysis)
+    center_point = 3500  
+    steepness = 1000     
+    income_scores = 1 / (1 + np.exp(-(predicted_values - center_point) / steepness))
+
+    composite_scores, band_codes = apply_policy(repayment_scores, income_scores)
+    risk_bands = RISK_BANDS_ARRAY[band_codes]
+
+    return {"repayment_score": repayment_scores, "income_proxy_score": income_scores,
+            "predicted_mpce": predicted_values, "composite_score": composite_scores, "risk_band": risk_bands}
+
+def score_predictions(repayment_scores, log_predictions):
+    """Turns raw Model A / Model B outputs (arrays, one entry per applicant) into result dicts."""
+    scores = score_arrays(repayment_scores, log_predictions)
+    return [{"repayment_score": round(float(repayment_score), 4), 
+             "income_proxy_score": round(float(income_score), 4),
+             "predicted_mpce": round(float(predicted_value), 2),
+             "composite_score": round(float(composite_score), 4), 
+             "risk_band": str(risk_band)}
+            for repayment_score, income_score, predicted_value, composite_score, risk_band
+            in zip(*(scores[name] for name in SCORE_FIELDS))]
 
 def calculate_composite_score(user_data: dict):
-    if not all([repayment_model, income_model]): return {"error": "ML models are not loaded."}
+    models = registry.active
+    if models is None: return {"error": "ML models are not loaded."}
     
     try:
-        df_a, df_b = get_prepared_data(user_data)
+        x_a, x_b = get_prepared_data(user_data, models)
+        with metrics.stage("cache"):
+            key = (models.version, feature_key(x_a, x_b))
+            cached = score_cache.get(key)
+        if cached is not None:
+            drift_monitor.observe(user_data, cached)
+            return dict(cached, model_version=models.version)
         
         # Model A Prediction
-        # Predict_proba returns [Prob of No Default, Prob of Default]. We want Prob of No Default (Score)
-        repayment_score = repayment_model.predict_proba(df_a)[:, 0][0] 
+        # The engine returns Prob of Default. We want Prob of No Default (Score), i.e. predict_proba(...)[:, 0]
+        with metrics.stage("model_a"):
+            repayment_scores = 1.0 - models.repayment_engine.predict(x_a)
         
         # Model B Prediction (with log transform)
-        log_prediction = income_model.predict(df_b)[0]
-        predicted_value = np.expm1(log_prediction) # This is the predicted MPCE in Rupees
-        
-        # Normalize income score using a sigmoid function
-        # Center point is the mean MPCE (~3588 from your data analysis)
-        center_point = 3500  
-        steepness = 1000     
-        income_score = 1 / (1 + np.exp(-(predicted_value - center_point) / steepness))
+        with metrics.stage("model_b"):
+            log_predictions = models.income_engine.predict(x_b)
+
+        with metrics.stage("postprocess"):
+            result = score_predictions(repayment_scores, log_predictions)[0]
 
     except Exception as e:
+        metrics.count_error("score")
         return {"error": f"Model prediction failed. Details: {e}"}
 
-    w1 = 0.6; w2 = 0.4
-    composite_score = (w1 * repayment_score) + (w2 * income_score)
-    
-    # Risk Banding Logic
-    # Low Risk (Good Repayment) = repayment_score > 0.7
-    # High Need (Low Income) = income_score <= 0.5 (below the center point)
-    LOW_RISK_THRESHOLD = 0.65
-    if repayment_score > LOW_RISK_THRESHOLD and income_score <= 0.5: 
-        risk_band = "Low Risk - High Need"  # The ideal candidate!
-    elif repayment_score > LOW_RISK_THRESHOLD and income_score > 0.5: 
-        risk_band = "Low Risk - Low Need"
-    elif repayment_score <= LOW_RISK_THRESHOLD and income_score <= 0.5: 
-        risk_band = "High Risk - High Need"
-    else: 
-        risk_band = "High Risk - Low Need"
-    return {"repayment_score": round(float(repayment_score), 4), 
-            "income_proxy_score": round(float(income_score), 4),
-            "predicted_mpce": round(float(predicted_value), 2),
-            "composite_score": round(float(composite_score), 4), 
-            "risk_band": risk_band}
-
-def get_shap_explanations(user_data: dict):
-    # ... (Keep existing get_shap_explanations block - it is correct) ...
-    if not all([repayment_explainer, income_explainer]): return {"error": "SHAP explainers are not loaded."}
-    
-    df_a, df_b = get_prepared_data(user_data)
-    
-    # SHAP for Model A
-    shap_values_a = repayment_explainer.shap_values(df_a)
-    
-    # SHAP for Model B
-    shap_values_b = income_explainer.shap_values(df_b)
-    
-    return {
-        "repayment_explanation": {
-            "base_value": repayment_explainer.expected_value[1], # Class 1 (Default)
-            "shap_values": shap_values_a[1].tolist(),
-            "feature_names": repayment_features,
-            "feature_values": df_a.iloc[0].tolist()
-        },
-        "income_explanation": {
-            "base_value": income_explainer.expected_value,
-            "shap_values": shap_values_b[0].tolist(),
-            "feature_names": income_features,
-            "feature_values": df_b.iloc[0].tolist()
-        }
-    }
\ No newline at end of file
+    score_cache.put(key, result)
+    drift_monitor.observe(user_data, result)
+    return dict(result, model_version=models.version)
+
+def calculate_composite_scores(rows: list):
+    """Batch version of calculate_composite_score: each model is called once for all rows."""
+    models = registry.active
+    if models is None: return {"error": "ML models are not loaded."}
+    if not rows: return []
+
+    try:
+        x_a, x_b = get_prepared_batch(rows, models)
+
+        # Same cache as the per-row path: only rows we haven't scored recently hit the models
+        with metrics.stage("cache"):
+            keys = [(models.version, feature_key(row_a, row_b)) for row_a, row_b in zip(x_a, x_b)]
+            results = [score_cache.get(key) for key in keys]
+            misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            with metrics.stage("model_a"):
+                repayment_scores = 1.0 - models.repayment_engine.predict(x_a[misses])
+            with metrics.stage("model_b"):
+                log_predictions = models.income_engine.predict(x_b[misses])
+            with metrics.stage("postprocess"):
+                for i, result in zip(misses, score_predictions(repayment_scores, log_predictions)):
+                    score_cache.put(keys[i], result)
+                    results[i] = result
+
+    except Exception as e:
+        metrics.count_error("score")
+        return {"error": f"Model prediction failed. Details: {e}"}
+
+    drift_monitor.observe_many(rows, results)
+    return [dict(result, model_version=models.version) for result in results]
+
+def score_columns(columns, n_rows: int, models: ModelSet = None):
+    """Bulk scoring straight from columns (name -> array of length n_rows), e.g. a chunk of
+    a CSV/Parquet file. Returns score_arrays() output (unrounded, no cache, no per-row dicts)."""
+    models = models or registry.active
+    x_a = models.repayment_encoder.encode_columns(columns, n_rows)
+    x_b = models.income_encoder.encode_columns(columns, n_rows)
+    return score_arrays(1.0 - models.repayment_engine.predict(x_a), models.income_engine.predict(x_b))
+
+def calculate_column_scores(columns, n_rows: int):
+    """Batch scoring for column input (name -> validated array of n_rows values), as sent by
+    bulk callers in Arrow or msgpack. Returns {field: array} columns of rounded scores plus
+    model_version; rows are not looked up in or added to the result cache."""
+    models = registry.active
+    if models is None: return {"error": "ML models are not loaded."}
+
+    try:
+        with metrics.stage("encode"):
+            x_a = models.repayment_encoder.encode_columns(columns, n_rows)
+            x_b = models.income_encoder.encode_columns(columns, n_rows)
+            if metrics.METRICS_ENABLED:
+                metrics.count_unseen(models.repayment_encoder.unseen_column_counts(columns))
+                metrics.count_unseen(models.income_encoder.unseen_column_counts(columns))
+        with metrics.stage("model_a"):
+            repayment_scores = 1.0 - models.repayment_engine.predict(x_a)
+        with metrics.stage("model_b"):
+            log_predictions = models.income_engine.predict(x_b)
+        with metrics.stage("postprocess"):
+            scores = score_arrays(repayment_scores, log_predictions)
+            result = {name: np.round(scores[name].astype(np.float64), 2 if name == "predicted_mpce" else 4)
+                      for name in SCORE_FIELDS if name != "risk_band"}
+            result["risk_band"] = scores["risk_band"].astype(str)
+
+    except Exception as e:
+        metrics.count_error("score")
+        return {"error": f"Model prediction failed. Details: {e}"}
+
+    drift_monitor.observe_columns(columns, result, n_rows)
+    return dict(result, model_version=models.version)
+
+def _rounded(values, digits):
+    return [round(float(value), digits) for value in values]
+
+def simulate_grid(user_data: dict, ranges: dict):
+    """What-if sweep: scores one applicant at every point of the grid spanned by ranges
+    (numeric field -> list of values). The base row is encoded once, the grid is built as
+    one matrix and each model is called once for all of it.
+
+    Results are flat lists in row-major grid order (the last field varies fastest),
+    to be reshaped with "shape".
+    """
+    models = registry.active
+    if models is None: return {"error": "ML models are not loaded."}
+    encoder_a, encoder_b = models.repayment_encoder, models.income_encoder
+
+    fields = list(ranges)
+    unknown = [f for f in fields if f not in encoder_a.numeric_index and f not in encoder_b.numeric_index]
+    if unknown: return {"error": f"Cannot sweep {', '.join(unknown)}: not a numeric feature of either model."}
+    shape = [len(ranges[f]) for f in fields]
+    if not fields or 0 in shape: return {"error": "Give at least one field to sweep, each with at least one value."}
+    n_points = int(np.prod(shape))
+    if n_points > SIMULATE_MAX_POINTS:
+        return {"error": f"The grid has {n_points} points; at most {SIMULATE_MAX_POINTS} can be simulated at once."}
+
+    try:
+        x_a, x_b = get_prepared_data(user_data, models)
+        # Model B only needs the grid if one of its features is swept; otherwise one prediction serves every point
+        sweeps_b = any(f in encoder_b.numeric_index for f in fields)
+        with metrics.stage("encode"):
+            axes = np.meshgrid(*[np.asarray(ranges[f], dtype=np.float64) for f in fields], indexing="ij")
+            overrides = {f: axis.ravel() for f, axis in zip(fields, axes)}
+            grid_a = encoder_a.tile(x_a, overrides, n_points)
+            grid_b = encoder_b.tile(x_b, overrides, n_points) if sweeps_b else x_b
+
+        with metrics.stage("model_a"):
+            repayment_scores = 1.0 - models.repayment_engine.predict(grid_a)
+        with metrics.stage("model_b"):
+            log_predictions = np.broadcast_to(models.income_engine.predict(grid_b), n_points)
+
+        with metrics.stage("postprocess"):
+            scores = score_arrays(repayment_scores, log_predictions)
+            result = {"fields": fields, "shape": shape,
+                      "axes": {f: [float(v) for v in ranges[f]] for f in fields},
+                      "repayment_score": _rounded(scores["repayment_score"], 4),
+                      "income_proxy_score": _rounded(scores["income_proxy_score"], 4),
+                      "predicted_mpce": _rounded(scores["predicted_mpce"], 2),
+                      "composite_score": _rounded(scores["composite_score"], 4),
+                      "risk_band": scores["risk_band"].tolist()}
+
+    except Exception as e:
+        metrics.count_error("simulate")
+        return {"error": f"Simulation failed. Details: {e}"}
+
+    return dict(result, model_version=models.version)
+
+def supports_native_shap(engine):
+    """Whether an inference engine can give SHAP values itself (XGBoost pred_contribs)."""
+    return callable(getattr(engine, "contributions", None))
+
+def get_shap_backends(models: ModelSet = None):
+    """Resolves SHAP_BACKEND once per model set into a (Model A, Model B) pair of
+    "native" / "explainer", recorded with how it was chosen in models.shap_report
+    (see /admin/models); None when explanations are off or unavailable."""
+    models = models or registry.active
+    if not ENABLE_SHAP_EXPLAINERS or models is None: return None
+    if models.shap_backends is not None: return models.shap_backends
+
+    engines = (models.repayment_engine, models.income_engine)
+    native_ok = [supports_native_shap(engine) for engine in engines]
+    needs_explainers = SHAP_BACKEND in ("explainer", "timed", "auto")
+    # load_explainers() takes models.lock itself, so it is called before taking it here
+    explainers_loaded = needs_explainers and load_explainers(models)
+    with models.lock:
+        if models.shap_backends is None:
+            report = {"mode": SHAP_BACKEND}
+            # Wide-ranging synthetic rows, so that many tree paths are exercised
+            rng = np.random.default_rng(0)
+            probes = (rng.lognormal(3, 3, (16, models.repayment_encoder.n_features)),
+                      rng.lognormal(3, 3, (16, models.income_encoder.n_features)))
+            explainers = (models.repayment_explainer, models.income_explainer)
+            positive_classes = (1, None)
+            if SHAP_BACKEND == "native":
+                backends = ("native", "native")
+            elif SHAP_BACKEND == "timed" and explainers_loaded:
+                # Opt-in: keep the faster one where they agree. Can differ between workers and restarts.
+                backend_a, report["repayment"] = choose_backend(engines[0], explainers[0], probes[0], positive_class=1)
+                backend_b, report["income"] = choose_backend(engines[1], explainers[1], probes[1])
+                backends = (backend_a, backend_b)
+            elif SHAP_BACKEND == "explainer" or (SHAP_BACKEND == "timed" and not all(native_ok)):
+                if not explainers_loaded: return None
+                backends = ("explainer", "explainer")
+            elif explainers_loaded:
+                # "auto": native wherever pred_contribs is available and gives the explainer's values
+                backends = []
+                for name, ok, engine, explainer, probe, positive_class in zip(
+                        ("repayment", "income"), native_ok, engines, explainers, probes, positive_classes):
+                    agree = ok and backends_agree(engine, explainer, probe, positive_class)
+                    report[name] = {"agree": agree}
+                    backends.append("native" if agree else "explainer")
+                backends = tuple(backends)
+            else:
+                # "auto" (or "timed") without explainer files: native values can't be checked, but are all there is
+                if not all(native_ok): return None
+                report["unchecked"] = True
+                backends = ("native", "native")
+            models.shap_report = report
+            models.shap_backends = backends
+    return models.shap_backends
+
+def explain_prepared(x_a, x_b, models: ModelSet = None):
+    """Full SHAP explanations for already-encoded rows, computed in one call per model."""
+    models = models or registry.active
+    backend_a, backend_b = get_shap_backends(models)
+    if backend_a == "native":
+        values_a, base_a = native_contributions(models.repayment_engine, x_a)
+    else:
+        values_a, base_a = explainer_contributions(models.repayment_explainer, x_a, positive_class=1) # Class 1 (Default)
+    if backend_b == "native":
+        values_b, base_b = native_contributions(models.income_engine, x_b)
+    else:
+        values_b, base_b = explainer_contributions(models.income_explainer, x_b)
+
+    return [{
+        "repayment_explanation": build_explanation(base_a[i], values_a[i], models.repayment_features, x_a[i]),
+        "income_explanation": build_explanation(base_b[i], values_b[i], models.income_features, x_b[i]),
+    } for i in range(len(x_a))]
+
+def compact_explanation(explanation: dict, top_k=None):
+    return {name: top_k_explanation(model_explanation, top_k) for name, model_explanation in explanation.items()}
+
+def get_shap_explanations(user_data: dict, top_k=None):
+    """SHAP explanation for one applicant; with top_k only the k largest contributors per model."""
+    result = get_shap_explanations_batch([user_data], top_k=top_k)
+    return result if isinstance(result, dict) else result[0]
+
+def get_shap_explanations_batch(rows: list, top_k=None):
+    """Batch version of get_shap_explanations: SHAP is computed for all uncached rows at once."""
+    models = registry.active
+    if get_shap_backends(models) is None: return {"error": "SHAP explainers are not loaded."}
+    if not rows: return []
+
+    try:
+        x_a, x_b = get_prepared_batch(rows, models)
+        keys = [(models.version, feature_key(row_a, row_b)) for row_a, row_b in zip(x_a, x_b)]
+        explanations = [explain_cache.get(key) for key in keys]
+        misses = [i for i, explanation in enumerate(explanations) if explanation is None]
+        if misses:
+            with metrics.stage("shap"):
+                explained = explain_prepared(x_a[misses], x_b[misses], models)
+            for i, explanation in zip(misses, explained):
+                explain_cache.put(keys[i], explanation)
+                explanations[i] = explanation
+
+    except Exception as e:
+        metrics.count_error("explain")
+        return {"error": f"SHAP explanation failed. Details: {e}"}
+
+    return [compact_explanation(explanation, top_k) for explanation in explanations]
+
+def warm_up(with_explainers: bool = PRELOAD_SHAP_EXPLAINERS, models: ModelSet = None):
+    """Runs one dummy applicant through both models so the first real request doesn't pay
+    XGBoost's lazy initialisation. Call it from the API startup hook; reloads call it on
+    the new model set before it takes traffic."""
+    models = models or registry.active
+    if models is None: return
+    x_a, x_b = get_prepared_data({}, models)
+    models.repayment_engine.predict(x_a); models.income_engine.predict(x_b)
+    # "native" needs no explainers, so /admin/models reports it from the start; the
+    # other modes load the explainers (and shap) first, on the first explain call
+    if with_explainers or SHAP_BACKEND == "native": get_shap_backends(models)
+
+# --- 5. MODEL REGISTRY ---
+# Scored applicants and their scores are summarised in the background (see drift.py);
+# every swap starts a new monitoring window against the new set's reference profile.
+drift_monitor = DriftMonitor()
+
+def on_model_swap(old: ModelSet, new: ModelSet):
+    clear_caches()
+    drift_monitor.reset(new.reference_profile)
+
+registry = ModelRegistry(loader=load_model_set, warm_up=lambda models: warm_up(models=models),
+                         on_swap=on_model_swap)
+try:
+    registry.activate(load_model_set())
+except FileNotFoundError as e:
+    print(f"FATAL ERROR: A required model file was not found: {e}")
+
+# The active set's models, encoders, engines and explainers stay readable as module
+# attributes (scorer.repayment_encoder, ...) for bulk_score.py and the benchmarks; None when not loaded.
+MODEL_SET_ATTRIBUTES = {"repayment_model", "repayment_features", "income_model", "income_features",
+                        "repayment_encoder", "income_encoder", "repayment_engine", "income_engine",
+                        "repayment_explainer", "income_explainer", "shap_backends"}
+
+def __getattr__(name):
+    if name in MODEL_SET_ATTRIBUTES: return getattr(registry.active, name, None)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
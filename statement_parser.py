@@ -0,0 +1,237 @@
+# statement_parser.py (Streaming, parallel bank-statement analysis)
+#
+# Finds salary credits in a PDF bank statement and totals them per month. Pages are
+# read lazily, in order, optionally by a pool of worker processes a few chunks ahead,
+# and reading stops as soon as enough complete months have been seen, so a long
+# multi-year statement costs no more than the months actually needed.
+#
+# Used by dashboard.py; also runnable on its own:
+#   python statement_parser.py statement.pdf --months 6 --workers 4
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# --- 0. CONFIGURATION ---
+# Complete months of salary history to read before stopping (0 reads the whole statement).
+STATEMENT_MONTHS_REQUIRED = int(os.environ.get("STATEMENT_MONTHS_REQUIRED", "6"))
+# Text extraction: "pdfium" (pypdfium2, installed with pdfplumber; ~2 ms a page) or
+# "pdfplumber" (its layout-aware extract_text, as the dashboard used; ~180 ms a page).
+STATEMENT_PDF_ENGINE = os.environ.get("STATEMENT_PDF_ENGINE", "pdfium")
+# Worker processes for page extraction (0 = one per CPU). Starting a pool costs about a
+# second, so statements shorter than the engine's minimum are read in-process instead;
+# STATEMENT_PARALLEL_MIN_PAGES overrides it for both engines.
+STATEMENT_WORKERS = int(os.environ.get("STATEMENT_WORKERS", "0"))
+PARALLEL_MIN_PAGES = {"pdfium": 1000, "pdfplumber": 16}
+if "STATEMENT_PARALLEL_MIN_PAGES" in os.environ:
+    PARALLEL_MIN_PAGES = dict.fromkeys(PARALLEL_MIN_PAGES, int(os.environ["STATEMENT_PARALLEL_MIN_PAGES"]))
+STATEMENT_PAGES_PER_TASK = int(os.environ.get("STATEMENT_PAGES_PER_TASK", "16"))
+
+# --- 1. PATTERNS (compiled once) ---
+# Salary/credit narrations and the first amount after them. The leading \b keeps words
+# that merely end in "sal" (e.g. "UNIVERSAL STORES") from counting as salary.
+SALARY_PATTERN = re.compile(r'(?i)\b(?:SALARY|SAL|SAL-TRANSFER|SALARY CREDIT)\s.*?([\d,]+\.\d{2})')
+# Transaction dates: 2024-04-05, 05-04-2024 / 05/04/24 / 05.04.2024, 05-Apr-2024 / 05 April 2024
+ISO_DATE_PATTERN = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+NUMERIC_DATE_PATTERN = re.compile(r'\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})\b')
+NAMED_MONTH_DATE_PATTERN = re.compile(r'\b(\d{1,2})[-/ ]([A-Za-z]{3})[A-Za-z]*[-/ ,]+(\d{4}|\d{2})\b')
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1)}
+
+
+def line_month(line: str):
+    """"YYYY-MM" of the first date on a statement line, or None."""
+    match = ISO_DATE_PATTERN.search(line)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+    else:
+        match = NUMERIC_DATE_PATTERN.search(line)
+        if match:
+            year, month = int(match.group(3)), int(match.group(2))
+        else:
+            match = NAMED_MONTH_DATE_PATTERN.search(line)
+            if not match: return None
+            year, month = int(match.group(3)), MONTH_NAMES.get(match.group(2).lower())
+            if month is None: return None
+    if year < 100: year += 2000
+    return f"{year:04d}-{month:02d}" if 1 <= month <= 12 else None
+
+
+def parse_page_text(text: str):
+    """(months in order of appearance, [(month or None, amount), ...] salary credits) for one page.
+
+    A credit takes the month of the latest date above it on the page; None means the
+    page had no date before it (the caller carries the previous page's month over).
+    """
+    months, credits = [], []
+    month = None
+    for line in text.splitlines():
+        line_date = line_month(line)
+        if line_date is not None:
+            month = line_date
+            if not months or months[-1] != month: months.append(month)
+        for match in SALARY_PATTERN.finditer(line):
+            credits.append((month, float(match.group(1).replace(',', ''))))
+    return months, credits
+
+
+# --- 2. PAGE TEXT EXTRACTION ---
+def open_document(path, engine):
+    if engine == "pdfium":
+        import pypdfium2
+        return pypdfium2.PdfDocument(path)
+    if engine == "pdfplumber":
+        import pdfplumber
+        return pdfplumber.open(path)
+    raise ValueError(f"Unknown PDF engine {engine!r}; use 'pdfium' or 'pdfplumber'.")
+
+
+def page_count(document, engine):
+    return len(document) if engine == "pdfium" else len(document.pages)
+
+
+def page_texts(document, engine, start, stop):
+    """Yields the text of pages [start, stop), releasing each page once it is read."""
+    for i in range(start, stop):
+        if engine == "pdfium":
+            page = document[i]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+        else:
+            page = document.pages[i]
+            text = page.extract_text() or ""
+        page.close()
+        yield text
+
+
+# Each worker process keeps the document it is reading open across its page chunks. Only
+# the workers use this: a worker handles one file at a time, while analyze_statement()
+# callers (e.g. concurrent Streamlit sessions) may share a process and keep their own.
+_worker_document = None  # (path, engine, document)
+
+
+def _document_in_worker(path, engine):
+    global _worker_document
+    if _worker_document is None or _worker_document[:2] != (path, engine):
+        if _worker_document is not None: _worker_document[2].close()
+        _worker_document = (path, engine, open_document(path, engine))
+    return _worker_document[2]
+
+
+def parse_pages(path, engine, start, stop):
+    """parse_page_text() for pages [start, stop); the unit of work sent to a worker process."""
+    return [parse_page_text(text) for text in page_texts(_document_in_worker(path, engine), engine, start, stop)]
+
+
+def iter_parsed_pages(document, path, engine, n_pages, workers):
+    """Yields parse_page_text() results in page order, from the open document.
+
+    With workers > 1 (and a long enough statement) chunks of pages are parsed by a
+    process pool at most two chunks per worker ahead of the consumer; closing the
+    generator early cancels the chunks that have not started.
+    """
+    if workers <= 1 or n_pages < PARALLEL_MIN_PAGES.get(engine, 0):
+        for text in page_texts(document, engine, 0, n_pages):
+            yield parse_page_text(text)
+        return
+
+    chunks = iter([(start, min(start + STATEMENT_PAGES_PER_TASK, n_pages))
+                   for start in range(0, n_pages, STATEMENT_PAGES_PER_TASK)])
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(parse_pages, path, engine, *chunk))
+                if len(pending) >= 2 * workers: break
+            while pending:
+                pages = pending.popleft().result()
+                chunk = next(chunks, None)
+                if chunk is not None: pending.append(pool.submit(parse_pages, path, engine, *chunk))
+                yield from pages
+        finally:
+            for future in pending: future.cancel()
+
+
+# --- 3. ANALYSIS ---
+def analyze_statement(source, months_required=STATEMENT_MONTHS_REQUIRED, workers=STATEMENT_WORKERS,
+                      engine=STATEMENT_PDF_ENGINE):
+    """Salary credits per month from a PDF statement (a path, bytes or a file-like upload).
+
+    Months are taken in the order the statement lists them (oldest or newest first).
+    Once months_required months are complete (a later month has started) reading
+    stops and only those months are reported; otherwise every month is. Returns:
+
+        monthly_salary          {"YYYY-MM": total salary credited}, 0.0 for covered months without any
+        average_monthly_salary  mean over the months that had salary credits (None if there were none)
+        months, pages_read, pages_total, stopped_early, credits
+    """
+    temp_path = None
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+    else:
+        data = source if isinstance(source, (bytes, bytearray)) else (
+            source.getvalue() if hasattr(source, "getvalue") else source.read())
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(data)
+        path = temp_path = f.name
+
+    document = None
+    try:
+        document = open_document(path, engine)
+        n_pages = page_count(document, engine)
+        workers = workers or os.cpu_count() or 1
+        totals, months, undated = {}, [], []
+        current_month = None
+        pages_read, credits, stopped_early = 0, 0, False
+
+        pages = iter_parsed_pages(document, path, engine, n_pages, workers)
+        try:
+            for page_months, page_credits in pages:
+                pages_read += 1
+                for month, amount in page_credits:
+                    month = month or current_month
+                    if month is None: undated.append(amount)
+                    else: totals[month] = totals.get(month, 0.0) + amount
+                    credits += 1
+                for month in page_months:
+                    if month not in months: months.append(month)
+                if page_months: current_month = page_months[-1]
+                # Every month before the latest one is complete
+                if months_required and len(months) > months_required:
+                    stopped_early = pages_read < n_pages
+                    break
+        finally:
+            pages.close()
+    finally:
+        if document is not None: document.close()
+        if temp_path is not None: os.remove(temp_path)
+
+    if months_required and len(months) > months_required: months = months[:months_required]
+    monthly_salary = {month: round(totals.get(month, 0.0), 2) for month in months}
+    paid = [total for total in monthly_salary.values() if total > 0]
+    if not months and undated: paid = undated  # no dates at all: fall back to the mean credit
+    return {"monthly_salary": monthly_salary,
+            "average_monthly_salary": round(sum(paid) / len(paid), 2) if paid else None,
+            "months": len(months), "pages_read": pages_read, "pages_total": n_pages,
+            "stopped_early": stopped_early, "credits": credits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-month salary credits in a PDF bank statement.")
+    parser.add_argument("pdf")
+    parser.add_argument("--months", type=int, default=STATEMENT_MONTHS_REQUIRED, help="0 reads every page")
+    parser.add_argument("--workers", type=int, default=STATEMENT_WORKERS, help="0 = one per CPU")
+    parser.add_argument("--engine", choices=["pdfium", "pdfplumber"], default=STATEMENT_PDF_ENGINE)
+    args = parser.parse_args()
+    print(json.dumps(analyze_statement(args.pdf, args.months, args.workers, args.engine), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# tests/conftest.py (Shared fixtures: the loaded scorer and a fixed set of payloads)
+#
+# Run from the repository root:  python -m pytest tests
+# Tests that need the model files skip when saved_models/ is incomplete.
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from payloads import make_payloads
+
+
+@pytest.fixture(scope="session")
+def scorer():
+    os.chdir(ROOT)  # MODELS_DIR is relative to the repository root
+    import scorer
+    if scorer.registry.active is None: pytest.skip("Models are not loaded; see saved_models/.")
+    return scorer
+
+
+@pytest.fixture(scope="session")
+def payloads():
+    return make_payloads(300, seed=7)
@@ -0,0 +1,47 @@
+# tests/test_encoder_parity.py
+# FeatureEncoder must build exactly the matrices the original pandas preparation did:
+# get_dummies(drop_first=True) on a one-row frame + reindex to the training features.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from encoder import FeatureEncoder
+
+
+def legacy_prepared_data(scorer, user_data: dict):
+    """The original scorer.get_prepared_data (pandas on every call)."""
+    df_a = pd.get_dummies(pd.DataFrame([user_data]), columns=scorer.MODEL_A_CAT_FEATURES, dummy_na=False,
+                          drop_first=True)
+    df_a = df_a.reindex(columns=scorer.repayment_features, fill_value=0)
+    df_b = pd.get_dummies(pd.DataFrame([user_data]), columns=scorer.MODEL_B_CAT_FEATURES, dummy_na=False,
+                          drop_first=True)
+    df_b = df_b.reindex(columns=scorer.income_features, fill_value=0).fillna(0)
+    return df_a.to_numpy(dtype=np.float64), df_b.to_numpy(dtype=np.float64)
+
+
+def test_single_rows_match_pandas(scorer, payloads):
+    for row in payloads:
+        expected_a, expected_b = legacy_prepared_data(scorer, row)
+        x_a, x_b = scorer.get_prepared_data(row)
+        np.testing.assert_array_equal(expected_a, x_a)
+        np.testing.assert_array_equal(expected_b, x_b)
+
+
+def test_batches_and_columns_match_single_rows(scorer, payloads):
+    batch_a, batch_b = scorer.get_prepared_batch(payloads)
+    np.testing.assert_array_equal(batch_a, np.vstack([scorer.get_prepared_data(row)[0] for row in payloads]))
+    np.testing.assert_array_equal(batch_b, np.vstack([scorer.get_prepared_data(row)[1] for row in payloads]))
+    columns = {name: np.array([row[name] for row in payloads]) for name in payloads[0]}
+    np.testing.assert_array_equal(batch_a, scorer.repayment_encoder.encode_columns(columns, len(payloads)))
+    np.testing.assert_array_equal(batch_b, scorer.income_encoder.encode_columns(columns, len(payloads)))
+
+
+@pytest.mark.parametrize("model", ["repayment", "income"])
+def test_full_one_hot_matches_get_dummies(scorer, payloads, model):
+    features = getattr(scorer, f"{model}_features")
+    cats = scorer.MODEL_A_CAT_FEATURES if model == "repayment" else scorer.MODEL_B_CAT_FEATURES
+    encoder = FeatureEncoder(features, cats, drop_first=False, fill_na=True)
+    expected = pd.get_dummies(pd.DataFrame(payloads), columns=cats, dummy_na=False)
+    expected = expected.reindex(columns=features, fill_value=0).fillna(0)
+    np.testing.assert_array_equal(expected.to_numpy(dtype=np.float64), encoder.encode_many(payloads))
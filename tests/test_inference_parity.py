@@ -0,0 +1,28 @@
+# tests/test_inference_parity.py
+# The native BoosterEngine (inplace_predict) must give exactly the sklearn wrappers' scores.
+
+import numpy as np
+
+
+def test_engines_match_sklearn_wrappers(scorer, payloads):
+    x_a, x_b = scorer.get_prepared_batch(payloads)
+    expected_a = scorer.repayment_model.predict_proba(x_a)[:, 0]
+    expected_b = scorer.income_model.predict(x_b)
+    np.testing.assert_array_equal(expected_a, 1.0 - scorer.repayment_engine.predict(x_a))
+    np.testing.assert_array_equal(expected_b, scorer.income_engine.predict(x_b))
+
+
+def test_single_rows_match_batch(scorer, payloads):
+    x_a, x_b = scorer.get_prepared_batch(payloads)
+    batch_a, batch_b = scorer.repayment_engine.predict(x_a), scorer.income_engine.predict(x_b)
+    for i in range(0, len(payloads), 10):
+        assert scorer.repayment_engine.predict(x_a[i:i + 1])[0] == batch_a[i]
+        assert scorer.income_engine.predict(x_b[i:i + 1])[0] == batch_b[i]
+
+
+def test_served_scores_use_the_engines(scorer, payloads):
+    x_a, x_b = scorer.get_prepared_batch(payloads)
+    results = scorer.calculate_composite_scores(payloads)
+    expected = scorer.score_predictions(scorer.repayment_model.predict_proba(x_a)[:, 0],
+                                        scorer.income_model.predict(x_b))
+    assert [{k: v for k, v in result.items() if k != "model_version"} for result in results] == expected
@@ -0,0 +1,338 @@
+# train_models.py (Scriptable training for Model A (repayment) and Model B (income proxy))
+#
+# Retrains the two models the way 02_Model_A_Repayment.ipynb and 03_Model_B_Income_Proxy.ipynb
+# did (same features, splits and hyperparameters), with tree_method="hist", a configurable
+# thread count and early stopping on a validation split of the training rows. Writes the
+# artifacts scorer.py loads to --output-dir, plus training_report.json with the time and
+# peak memory of every stage, and the drift monitor's reference_profile.json.
+#
+# The categoricals are encoded exactly as the API serves them (see encode_training_matrix()),
+# and the saved models are checked against scorer's serving path before the script ends.
+# --notebook-encoding reproduces the notebooks' full one-hot encoding instead, which the
+# API never sends; the script then warns and records the skew in training_report.json.
+#
+# Run from the repository root:
+#   python train_models.py --loan-data Model_A_data/Loan_default.csv --hces-data master_dataset.parquet --nthread 8
+
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost
+from sklearn.metrics import classification_report, confusion_matrix, mean_absolute_error, r2_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier, XGBRegressor
+
+from drift import build_reference_profile, write_reference_profile
+from encoder import FeatureEncoder, sanitized_level
+from export_models import export_model
+
+# --- 0. CONFIGURATION ---
+MODELS_DIR = './saved_models'
+
+# Model A: every Loan_default column except these is a feature; the categoricals are
+# one-hot encoded with drop_first=True (same list as scorer.MODEL_A_CAT_FEATURES).
+MODEL_A_TARGET = 'Default'
+MODEL_A_ID_COLUMNS = ['LoanID']
+MODEL_A_CAT_FEATURES = [
+    'Education', 'EmploymentType', 'MaritalStatus', 'HasMortgage',
+    'HasDependents', 'LoanPurpose', 'HasCoSigner'
+]
+MODEL_A_PARAMS = dict(n_estimators=200, max_depth=8, learning_rate=0.05, subsample=0.8,
+                      colsample_bytree=0.8, eval_metric='logloss', random_state=42)
+
+# Model B: the curated master_dataset columns, with every level of each categorical
+# one-hot encoded (scorer.MODEL_B_CAT_FEATURES, in the order the dummy columns were made).
+MODEL_B_TARGET = 'MPCE'
+MODEL_B_FEATURES_RAW = [
+    'head_of_household_age', 'household_size_calculated', 'avg_education_years_adults',
+    'Social_Group_of_HH_Head', 'Max_Income_Activity', 'Type_of_Dwelling_Unit', 'Land_Ownership',
+    'fuel_expenditure', 'comm_expenditure', 'Asset_Score_X1', 'Scheme_Index_X2',
+    'num_internet_users', 'Sector', 'Ration_Card_Type', 'Religion_of_HH_Head',
+]
+MODEL_B_CAT_FEATURES = [
+    'Sector', 'Social_Group_of_HH_Head', 'Land_Ownership',
+    'Type_of_Dwelling_Unit', 'Ration_Card_Type', 'Max_Income_Activity',
+    'Religion_of_HH_Head'
+]
+MODEL_B_PARAMS = dict(n_estimators=500, max_depth=10, learning_rate=0.05, random_state=42)
+
+# How the categoricals are encoded: as the API serves them, or as the notebooks trained them
+SERVING_ENCODING, NOTEBOOK_ENCODING = "serving", "notebook"
+# Training rows re-scored through scorer's serving path to check the saved models
+PARITY_CHECK_ROWS = 1000
+
+TEST_SIZE = 0.2
+# Share of the training rows held out to decide when to stop adding trees
+VALID_SIZE = 0.1
+EARLY_STOPPING_ROUNDS = 20
+
+
+# --- 1. STAGE REPORT ---
+def peak_rss_mb():
+    """Peak resident memory of this process so far (None where the resource module is missing)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class TrainingReport:
+    """Collects wall time and peak RSS per (model, stage), plus each model's metrics."""
+
+    def __init__(self, nthread):
+        self.report = {"nthread": nthread, "xgboost": xgboost.__version__, "models": {}}
+
+    def _model(self, model):
+        return self.report["models"].setdefault(model, {"stages": [], "metrics": {}})
+
+    @contextmanager
+    def stage(self, model, name):
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        rss = peak_rss_mb()
+        self._model(model)["stages"].append({"stage": name, "seconds": round(seconds, 3),
+                                             "peak_rss_mb": round(rss, 1) if rss is not None else None})
+        print(f"[{model}] {name:<10} {seconds:8.2f} s   peak RSS {rss if rss is not None else float('nan'):8.1f} MB")
+
+    def metrics(self, model, **values):
+        self._model(model)["metrics"].update(values)
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report, f, indent=2)
+
+
+# --- 2. FEATURE PREPARATION ---
+def dummy_feature_names(df, numeric_columns, cat_features, drop_first):
+    """Column names as pd.get_dummies(df, columns=cat_features, drop_first=...) orders them:
+    the numeric columns, then "<column>_<level>" per categorical with its levels sorted."""
+    names = list(numeric_columns)
+    for col in cat_features:
+        levels = sorted(df[col].dropna().astype(str).unique())
+        names += [f"{col}_{level}" for level in (levels[1:] if drop_first else levels)]
+    return names
+
+
+def encode_training_matrix(df, feature_names, cat_features, encoding, fill_na=False):
+    """Builds a training matrix with FeatureEncoder.
+
+    SERVING_ENCODING uses the settings scorer.load_model_set serves with (drop_first=True,
+    i.e. get_dummies on a one-row frame, which sets no dummy), so the model is trained on
+    exactly the inputs the API will send it. NOTEBOOK_ENCODING sets each level's
+    "<column>_<level>" dummy, as the notebooks' get_dummies on the full dataset did; the
+    API never sends those.
+    """
+    encoder = FeatureEncoder(feature_names, cat_features, drop_first=encoding == SERVING_ENCODING, fill_na=fill_na)
+    columns = {col: df[col].to_numpy() for col in df.columns}
+    return encoder.encode_columns(columns, len(df))
+
+
+def parity_sample(df, X):
+    """The first PARITY_CHECK_ROWS raw rows (as columns) and their training matrix rows."""
+    n = min(PARITY_CHECK_ROWS, len(df))
+    return {col: df[col].to_numpy()[:n] for col in df.columns}, X[:n]
+
+
+def prepare_model_a(df, encoding=SERVING_ENCODING):
+    """(X, y, feature names, parity sample) for Model A, with 02_Model_A_Repayment.ipynb's features."""
+    numeric = [col for col in df.columns if col not in MODEL_A_CAT_FEATURES + MODEL_A_ID_COLUMNS + [MODEL_A_TARGET]]
+    names = dummy_feature_names(df, numeric, MODEL_A_CAT_FEATURES, drop_first=True)
+    X = encode_training_matrix(df, names, MODEL_A_CAT_FEATURES, encoding)
+    return X, df[MODEL_A_TARGET].to_numpy(), [sanitized_level(str(name)) for name in names], parity_sample(df, X)
+
+
+def prepare_model_b(df, encoding=SERVING_ENCODING):
+    """(X, log1p(MPCE), feature names, parity sample) for Model B, with 03_Model_B_Income_Proxy.ipynb's features."""
+    df = df[MODEL_B_FEATURES_RAW + [MODEL_B_TARGET]].copy()
+    # The notebook cast the categoricals with astype(str), which made a missing value its own "nan" level
+    for col in MODEL_B_CAT_FEATURES:
+        df[col] = df[col].astype(object).where(df[col].notna(), 'nan').astype(str)
+    numeric = [col for col in MODEL_B_FEATURES_RAW if col not in MODEL_B_CAT_FEATURES]
+    names = dummy_feature_names(df, numeric, MODEL_B_CAT_FEATURES, drop_first=False)
+
+    for col in numeric:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    if encoding == SERVING_ENCODING:
+        # Serving fills missing continuous values with 0
+        X = encode_training_matrix(df, names, MODEL_B_CAT_FEATURES, encoding, fill_na=True)
+    else:
+        # The notebook filled them with each column's median
+        X = encode_training_matrix(df, names, MODEL_B_CAT_FEATURES, encoding)
+        medians = np.nanmedian(X, axis=0)
+        X = np.where(np.isnan(X), medians, X)
+    return X, np.log1p(df[MODEL_B_TARGET].to_numpy(dtype=np.float64)), names, parity_sample(df, X)
+
+
+def check_serving_parity(output_dir, samples, encoding):
+    """Scores the parity samples through scorer's serving path (the saved artifacts, its
+    encoders and inference engines) and compares them with the trained models on their
+    training matrix rows. Raises RuntimeError on a mismatch with SERVING_ENCODING; only
+    warns with NOTEBOOK_ENCODING, whose skew is expected. Returns {model: max difference}."""
+    import scorer
+    models = scorer.load_model_set(output_dir)
+    served = {"repayment": (models.repayment_encoder, models.repayment_engine),
+              "income": (models.income_encoder, models.income_engine)}
+    differences = {}
+    for name, (model, (columns, X)) in samples.items():
+        encoder, engine = served[name]
+        predictions = engine.predict(encoder.encode_columns(columns, len(X)))
+        expected = model.predict_proba(X)[:, 1] if name == "repayment" else model.predict(X.astype(np.float32))
+        differences[name] = float(np.max(np.abs(predictions - expected))) if len(X) else 0.0
+        if differences[name] > 1e-6:
+            message = (f"{name} model: the API's inputs for {len(X)} training rows differ from the training matrix "
+                       f"(max prediction difference {differences[name]:.4g}).")
+            if encoding == SERVING_ENCODING: raise RuntimeError(message)
+            print(f"WARNING: {message} Expected with --notebook-encoding.")
+    return differences
+
+
+# --- 3. TRAINING ---
+def fit_with_early_stopping(model, X_train, y_train, early_stopping_rounds, stratify):
+    """Fits on the training rows, stopping once VALID_SIZE of them stops improving."""
+    if not early_stopping_rounds:
+        model.fit(X_train, y_train)
+        return model
+    X_fit, X_valid, y_fit, y_valid = train_test_split(X_train, y_train, test_size=VALID_SIZE, random_state=42,
+                                                      stratify=y_train if stratify else None)
+    model.set_params(early_stopping_rounds=early_stopping_rounds)
+    model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+    return model
+
+
+def save_artifacts(model, features, stem, features_stem, output_dir, explainers):
+    """Writes the model (.joblib and .ubj), its feature list and, optionally, its SHAP explainer."""
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(output_dir, f'{stem}.joblib'))
+    joblib.dump(features, os.path.join(output_dir, f'{features_stem}.joblib'))
+    # scorer.py prefers the .ubj file, so an old one must never outlive its .joblib
+    export_model(stem, output_dir)
+
+    explainer_path = os.path.join(output_dir, f'{features_stem.replace("_features", "")}_explainer.joblib')
+    if explainers:
+        import shap
+        joblib.dump(shap.TreeExplainer(model), explainer_path)
+    elif os.path.exists(explainer_path):
+        # An explainer of the previous model would give wrong SHAP values; /explain falls back to native ones
+        os.remove(explainer_path)
+        print(f"Removed {explainer_path}: it explained the previous model.")
+
+
+def train_repayment_model(data_path, output_dir, nthread, report, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                          explainers=True, encoding=SERVING_ENCODING):
+    """Trains and saves Model A; returns (model, parity sample)."""
+    name = "repayment"
+    with report.stage(name, "load"):
+        df = pd.read_csv(data_path, engine="pyarrow")
+    with report.stage(name, "prepare"):
+        X, y, features, sample = prepare_model_a(df, encoding)
+        del df
+    with report.stage(name, "split"):
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_SIZE, random_state=42, stratify=y)
+    with report.stage(name, "train"):
+        weight_ratio = np.sum(y_train == 0) / np.sum(y_train == 1)
+        model = XGBClassifier(**MODEL_A_PARAMS, scale_pos_weight=weight_ratio, tree_method="hist", n_jobs=nthread)
+        model = fit_with_early_stopping(model, X_train, y_train, early_stopping_rounds, stratify=True)
+    with report.stage(name, "evaluate"):
+        predictions = model.predict(X_test)
+        print(confusion_matrix(y_test, predictions))
+        print(classification_report(y_test, predictions))
+        report.metrics(name, rows=len(X), features=len(features),
+                       accuracy=round(float(np.mean(predictions == y_test)), 4),
+                       roc_auc=round(float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])), 4),
+                       best_iteration=getattr(model, "best_iteration", None))
+    with report.stage(name, "save"):
+        save_artifacts(model, features, 'repayment_model_xgb', 'repayment_model_features', output_dir, explainers)
+    return model, sample
+
+
+def train_income_model(data_path, output_dir, nthread, report, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                       explainers=True, encoding=SERVING_ENCODING):
+    """Trains and saves Model B; returns (model, parity sample)."""
+    name = "income"
+    with report.stage(name, "load"):
+        df = pd.read_parquet(data_path, columns=MODEL_B_FEATURES_RAW + [MODEL_B_TARGET])
+        df = df.loc[:, ~df.columns.duplicated()]
+    with report.stage(name, "prepare"):
+        X, y_log, features, sample = prepare_model_b(df, encoding)
+        del df
+    with report.stage(name, "split"):
+        X = X.astype(np.float32)
+        X_train, X_test, y_train_log, y_test_log = train_test_split(X, y_log, test_size=TEST_SIZE, random_state=42)
+    with report.stage(name, "train"):
+        model = XGBRegressor(**MODEL_B_PARAMS, tree_method="hist", n_jobs=nthread)
+        model = fit_with_early_stopping(model, X_train, y_train_log, early_stopping_rounds, stratify=False)
+    with report.stage(name, "evaluate"):
+        predictions_in_rupees = np.expm1(model.predict(X_test))
+        y_test_in_rupees = np.expm1(y_test_log)
+        r2 = r2_score(y_test_in_rupees, predictions_in_rupees)
+        print(f"R-squared (R²): {r2:.4f}")
+        report.metrics(name, rows=len(X), features=len(features), r2=round(float(r2), 4),
+                       mae=round(float(mean_absolute_error(y_test_in_rupees, predictions_in_rupees)), 2),
+                       best_iteration=getattr(model, "best_iteration", None))
+    with report.stage(name, "save"):
+        save_artifacts(model, features, 'income_model_final', 'income_model_final_features', output_dir, explainers)
+    return model, sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train Model A (repayment) and/or Model B (income proxy).")
+    parser.add_argument("--model", choices=["repayment", "income", "both"], default="both")
+    parser.add_argument("--loan-data", default="Model_A_data/Loan_default.csv", help="Loan_default CSV for Model A")
+    parser.add_argument("--hces-data", default="master_dataset.parquet", help="master_dataset.parquet for Model B")
+    parser.add_argument("--output-dir", default=MODELS_DIR)
+    parser.add_argument("--nthread", type=int, default=os.cpu_count() or 1, help="XGBoost training threads")
+    parser.add_argument("--early-stopping-rounds", type=int, default=EARLY_STOPPING_ROUNDS,
+                        help="stop after this many rounds without improvement (0 trains every tree)")
+    parser.add_argument("--no-explainers", action="store_true",
+                        help="don't pickle SHAP TreeExplainers (/explain then uses XGBoost's native SHAP values)")
+    parser.add_argument("--no-profile", action="store_true",
+                        help="don't write the drift monitor's reference_profile.json (see drift.py)")
+    parser.add_argument("--notebook-encoding", action="store_true",
+                        help="one-hot encode every level and fill Model B's gaps with medians, as the notebooks "
+                             "did; the API never sends such inputs")
+    args = parser.parse_args()
+
+    encoding = NOTEBOOK_ENCODING if args.notebook_encoding else SERVING_ENCODING
+    if encoding == NOTEBOOK_ENCODING:
+        print("WARNING: --notebook-encoding trains on one-hot dummies and median-filled gaps, but the API sets no "
+              "dummy and fills gaps with 0: the served models will see inputs unlike their training data.")
+    report = TrainingReport(args.nthread)
+    report.report["encoding"] = encoding
+    start = time.perf_counter()
+    samples = {}
+    if args.model in ("repayment", "both"):
+        samples["repayment"] = train_repayment_model(args.loan_data, args.output_dir, args.nthread, report,
+                                                     args.early_stopping_rounds, not args.no_explainers, encoding)
+    if args.model in ("income", "both"):
+        samples["income"] = train_income_model(args.hces_data, args.output_dir, args.nthread, report,
+                                               args.early_stopping_rounds, not args.no_explainers, encoding)
+    try:
+        report.report["serving_parity"] = check_serving_parity(args.output_dir, samples, encoding)
+    except FileNotFoundError as e:
+        # scorer loads both models, so the other one's artifacts must already be in --output-dir
+        print(f"Skipped the serving parity check: {e}")
+    # The drift monitor's reference profile needs both datasets and scores them with the saved models
+    if not args.no_profile and os.path.exists(args.loan_data) and os.path.exists(args.hces_data):
+        with report.stage("drift", "reference_profile"):
+            try:
+                profile = build_reference_profile(args.loan_data, args.hces_data, args.output_dir)
+                print(f"Reference profile written to {write_reference_profile(profile, args.output_dir)}")
+            except FileNotFoundError as e:
+                print(f"Skipped the reference profile: {e}")
+    report.report["total_seconds"] = round(time.perf_counter() - start, 3)
+
+    report_path = os.path.join(args.output_dir, "training_report.json")
+    report.write(report_path)
+    print(f"Done in {report.report['total_seconds']:.1f} s; report written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()